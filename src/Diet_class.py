@@ -1,6 +1,10 @@
-from typing import List, Dict
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import List, Dict, Sequence, Tuple, Iterator
 
 SERVINGS = 55
+MEALS_PER_DAY = 3  # 아침/점심/저녁
 
 def set_servings(servings: int):
     global SERVINGS
@@ -10,6 +14,8 @@ def get_servings() -> int:
     return SERVINGS
 
 class Ingredient:
+    __slots__ = ('name', 'price_per_g', 'amount_g', 'package_size', 'package_price')
+
     def __init__(self, name: str, price_per_g: float, amount_g: float, package_size: float):
         self.name = name
         self.price_per_g = price_per_g 
@@ -17,39 +23,176 @@ class Ingredient:
         self.package_size = package_size
         self.package_price = price_per_g * package_size
 
+    def __getstate__(self):
+        return (self.name, self.price_per_g, self.amount_g, self.package_size)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):  # __slots__ 도입 전 저장본
+            state = (state['name'], state['price_per_g'], state['amount_g'], state['package_size'])
+        self.__init__(*state)
+
+class AdjustedNutrients(Mapping):
+    """배식 비율을 반영한 영양소 읽기 전용 뷰 (조회할 때 곱하므로 새 dict 를 만들지 않음)"""
+    __slots__ = ('_nutrients', '_ratio')
+
+    def __init__(self, nutrients: Mapping, ratio: float):
+        self._nutrients = nutrients
+        self._ratio = ratio
+
+    def __getitem__(self, nutrient: str) -> float:
+        return self._nutrients[nutrient] * self._ratio
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._nutrients)
+
+    def __len__(self) -> int:
+        return len(self._nutrients)
+
+class MenuSpec:
+    """
+    메뉴 카탈로그 정보 (이름, 영양소, 식재료, 카테고리) — 변경 불가, 메뉴명 단위로 공유(intern)
+
+    식단 안의 각 자리는 MenuSpec 참조와 배식 비율만 가진 Menu 로 표현하므로
+    교차/변이로 자식 식단을 만들 때 카탈로그 데이터는 복사되지 않는다.
+    """
+    __slots__ = ('spec_id', 'name', 'nutrients', 'ingredients', 'category', '_nutrients_source')
+
+    _registry: Dict[str, 'MenuSpec'] = {}
+    _specs: List['MenuSpec'] = []
+    _lock = threading.Lock()
+
+    def __init__(self, spec_id: int, name: str, nutrients: Mapping[str, float], ingredients: Sequence[Ingredient], category: str):
+        set_attr = object.__setattr__
+        set_attr(self, 'spec_id', spec_id)
+        set_attr(self, 'name', name)
+        set_attr(self, 'nutrients', MappingProxyType(dict(nutrients)))
+        set_attr(self, 'ingredients', tuple(ingredients))
+        set_attr(self, 'category', category)
+        set_attr(self, '_nutrients_source', nutrients)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"MenuSpec 은 변경할 수 없습니다: {name}")
+
+    def __reduce__(self):
+        return (MenuSpec.intern, (self.name, dict(self.nutrients), list(self.ingredients), self.category))
+
+    def _matches(self, nutrients: Mapping, ingredients: Sequence[Ingredient], category: str) -> bool:
+        if category != self.category:
+            return False
+        if not (nutrients is self.nutrients or nutrients is self._nutrients_source or dict(nutrients) == dict(self.nutrients)):
+            return False
+        if ingredients is self.ingredients:
+            return True
+        return len(ingredients) == len(self.ingredients) and all(
+            a is b or (a.name, a.amount_g, a.price_per_g, a.package_size) == (b.name, b.amount_g, b.price_per_g, b.package_size)
+            for a, b in zip(ingredients, self.ingredients)
+        )
+
+    @classmethod
+    def intern(cls, name: str, nutrients: Mapping[str, float], ingredients: Sequence[Ingredient], category: str) -> 'MenuSpec':
+        """같은 이름/데이터의 MenuSpec 이 있으면 그것을, 없거나 데이터가 바뀌었으면 새로 등록해 반환"""
+        spec = cls._registry.get(name)
+        if spec is not None and spec._matches(nutrients, ingredients, category):
+            return spec
+        with cls._lock:
+            spec = cls._registry.get(name)
+            if spec is not None and spec._matches(nutrients, ingredients, category):
+                return spec
+            spec = cls(len(cls._specs), name, nutrients, ingredients, category)
+            cls._specs.append(spec)
+            cls._registry[name] = spec
+            return spec
+
+    @classmethod
+    def get(cls, spec_id: int) -> 'MenuSpec':
+        return cls._specs[spec_id]
+
 class Menu:
+    """
+    식단 한 자리의 메뉴 배치 (MenuSpec 참조 + 배식 비율)
+
+    기존 생성자와 name/nutrients/ingredients/category 속성은 그대로 쓸 수 있고,
+    같은 메뉴를 다른 비율로 놓을 때는 with_ratio 로 카탈로그 조회 없이 만든다.
+    """
+    __slots__ = ('spec', 'serving_ratio')
+
     def __init__(self, name: str, nutrients: Dict[str, float], ingredients: List[Ingredient], category: str, serving_ratio: float = 1.0):
-        self.name = name
-        self.nutrients = nutrients
-        self.ingredients = ingredients
-        self.category = category
+        self.spec = MenuSpec.intern(name, nutrients, ingredients, category)
         self.serving_ratio = serving_ratio  # 0.6, 0.9 범위
-    
-    def get_adjusted_nutrients(self):
-        return {k: v * self.serving_ratio for k, v in self.nutrients.items()}
-    
-    def get_adjusted_ingredients(self):
-        adjusted = []
-        for ing in self.ingredients:
-            adjusted_ing = Ingredient(
-                name=ing.name,
-                price_per_g=ing.price_per_g,
-                amount_g=ing.amount_g * self.serving_ratio,
-                package_size=ing.package_size
-            )
-            adjusted.append(adjusted_ing)
-        return adjusted
+
+    @classmethod
+    def place(cls, spec: MenuSpec, serving_ratio: float = 1.0) -> 'Menu':
+        menu = cls.__new__(cls)
+        menu.spec = spec
+        menu.serving_ratio = serving_ratio
+        return menu
+
+    def with_ratio(self, serving_ratio: float) -> 'Menu':
+        return Menu.place(self.spec, serving_ratio)
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    @property
+    def nutrients(self) -> Mapping[str, float]:
+        return self.spec.nutrients
+
+    @property
+    def ingredients(self) -> Tuple[Ingredient, ...]:
+        return self.spec.ingredients
+
+    @property
+    def category(self) -> str:
+        return self.spec.category
+
+    @property
+    def spec_id(self) -> int:
+        return self.spec.spec_id
+
+    def __getstate__(self):
+        return (self.spec, self.serving_ratio)
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            self.spec, self.serving_ratio = state
+            return
+        # __slots__ 도입 전 저장본
+        self.spec = MenuSpec.intern(state['name'], state['nutrients'], state['ingredients'], state['category'])
+        self.serving_ratio = state.get('serving_ratio', 1.0)
+
+    def get_adjusted_nutrients(self) -> Mapping[str, float]:
+        return AdjustedNutrients(self.spec.nutrients, self.serving_ratio)
+
+    def adjusted_amount(self, ingredient: Ingredient) -> float:
+        """배식 비율을 반영한 1인분 식재료 양 (g)"""
+        return ingredient.amount_g * self.serving_ratio
 
 class Meal:
+    __slots__ = ('menus', 'date', 'meal_type')
+
     def __init__(self, menus: List[Menu], date: str, meal_type: str):
         self.menus = menus
         self.date = date
         self.meal_type = meal_type
 
+    def __getstate__(self):
+        return (self.menus, self.date, self.meal_type)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):  # __slots__ 도입 전 저장본
+            state = (state['menus'], state['date'], state['meal_type'])
+        self.menus, self.date, self.meal_type = state
+
 class Diet:
     def __init__(self, meals: List[Meal]):
         self.meals = meals
 
+    @property
+    def n_days(self) -> int:
+        """식단 기간(일) — 끼니 수 / MEALS_PER_DAY (7일 주간 식단이면 7, 4주 순환 식단이면 28)"""
+        return len(self.meals) // MEALS_PER_DAY
+
 class WeeklyDiet:
     def __init__(self, diets: List[Diet]):
         self.diets = diets
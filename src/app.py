@@ -1,24 +1,18 @@
 import streamlit as st
-import pandas as pd
 import io
 import sys
 import tempfile
-from load_data import load_and_process_data, create_nutrient_constraints, load_all_menus
-from evaluation_function import calculate_harmony_matrix, get_top_n_harmony_pairs, validate_weekly_constraints, validate_weekly_constraints_detailed, calculate_actual_cost
-from spea2_optimizer import SPEA2Optimizer
-from Diet_class import NutrientConstraints, set_servings, get_servings
-from diet_converter import convert_diet_format
-from food_mapper import apply_food_mapping
+from Diet_class import NutrientConstraints, set_servings, get_servings, MEALS_PER_DAY
 import time
 from datetime import datetime, timezone, timedelta
-from utils import diet_to_dataframe, count_menu_changes
 import random
 import os
-from github import Github, Auth
 import base64
 import uuid
 from pathlib import Path
 
+# pandas, 최적화/평가 모듈(scipy), openpyxl, PyGithub 는 무거우므로 로그인 화면을 그린 뒤에 import 한다 (아래 로그인 게이트 참고)
+
 st.set_page_config(page_title="요양원 식단 최적화 프로그램", layout="wide")
 
 KST = timezone(timedelta(hours=9))
@@ -157,6 +151,9 @@ if 'user_servings' not in st.session_state:
     st.session_state.user_servings = 55
 if 'github_token' not in st.session_state:
     st.session_state.github_token = DEFAULT_GITHUB_TOKEN
+if 'job_id' not in st.session_state:
+    # 새로고침/재접속 시 URL 의 작업 ID 로 실행 중인 최적화에 다시 연결
+    st.session_state.job_id = st.experimental_get_query_params().get('job', [None])[0]
 
 def get_user_servings():
     return st.session_state.user_servings
@@ -203,19 +200,74 @@ def logout():
     st.session_state.username = ""
     st.experimental_rerun()
 
+DB_NAME = 'jeongseong'
+DIET_DB_PATH = f'./data/sarang_DB/processed_DB/DIET_{DB_NAME}.xlsx'
+MENU_DB_PATH = f'./data/sarang_DB/processed_DB/Menu_ingredient_nutrient_{DB_NAME}.xlsx'
+INGRE_DB_PATH = f'./data/sarang_DB/processed_DB/Ingredient_Price_{DB_NAME}.xlsx'
+DIET_HISTORY_PATH = f'./data/sarang_DB/processed_DB/diet_history_{DB_NAME}.pkl'
+# 제약조건(영양 슬라이더) 조합별 엔진을 몇 개까지 캐시할지
+ENGINE_CACHE_ENTRIES = int(os.getenv('DIET_ENGINE_CACHE_ENTRIES', '8'))
+
 @st.cache_data
 def load_data():
-    name = 'jeongseong'
-    diet_db_path = f'./data/sarang_DB/processed_DB/DIET_{name}.xlsx'
-    menu_db_path = f'./data/sarang_DB/processed_DB/Menu_ingredient_nutrient_{name}.xlsx'
-    ingre_db_path = f'./data/sarang_DB/processed_DB/Ingredient_Price_{name}.xlsx'
-
-    diet_db = load_and_process_data(diet_db_path, menu_db_path, ingre_db_path)
+    # 메뉴/식재료 DB 는 한 번만 파싱해 식단 DB 와 전체 메뉴 목록이 함께 사용 (조화 행렬은 엔진이 만듦)
+    menu_objects = load_menu_objects(MENU_DB_PATH, INGRE_DB_PATH)
+    diet_db = build_diet_from_dataframe(pd.read_excel(DIET_DB_PATH), menu_objects)
     nutrient_constraints = create_nutrient_constraints()
-    harmony_matrix, menus, menu_counts, _ = calculate_harmony_matrix(diet_db)
-    all_menus = load_all_menus(menu_db_path, ingre_db_path)
-    
-    return diet_db, nutrient_constraints, harmony_matrix, menus, menu_counts, all_menus
+    all_menus = list(menu_objects.values())
+
+    return diet_db, nutrient_constraints, all_menus
+
+@st.cache_resource(show_spinner=False)
+def get_evaluation_tables(snapshot_key, _diet_db):
+    """
+    카탈로그 스냅샷별 평가 테이블 (제약조건이 다른 엔진들이 공유)
+
+    저장된 식단 이력(야간 적재의 누적 통계)이 같은 스냅샷이면 그대로 불러와 쓰고,
+    없거나 DB 파일이 바뀌었으면 diet_db 로 한 번 만들어 저장한다.
+    """
+    history = DietHistory.load(DIET_HISTORY_PATH, snapshot_key)
+    if history is None:
+        history = DietHistory.from_diet(_diet_db, snapshot_key)
+        try:
+            history.save(DIET_HISTORY_PATH)
+        except OSError as e:
+            print(f"식단 이력 저장 실패: {e}")
+    return EvaluationTables.from_history(history, _diet_db)
+
+@st.cache_resource(show_spinner=False)
+def get_catalogue_engine(snapshot_key, _diet_db, _all_menus, _default_constraints):
+    """카탈로그 스냅샷마다 하나만 만드는 기준 엔진 (스레드 풀과 평가 테이블을 소유하고 제약조건별 엔진이 공유)"""
+    return OptimizerEngine(_diet_db, _all_menus, _default_constraints,
+                           tables=get_evaluation_tables(snapshot_key, _diet_db))
+
+@st.cache_resource(show_spinner=False, max_entries=ENGINE_CACHE_ENTRIES)
+def get_optimizer_engine(snapshot_key, constraints_signature, _diet_db, _all_menus, _nutrient_constraints,
+                         _default_constraints):
+    """
+    카탈로그 스냅샷 + 제약조건별로 모든 세션이 공유하는 최적화 엔진
+
+    기준 엔진의 for_problem 으로 만들어 스레드 풀과 평가 테이블을 공유하므로 캐시에서 밀려나도 정리할 스레드가 없고,
+    제약조건 조합마다 생기는 적합도 캐시는 max_entries 개까지만 유지된다.
+    """
+    catalogue_engine = get_catalogue_engine(snapshot_key, _diet_db, _all_menus, _default_constraints)
+    return catalogue_engine.for_problem(_nutrient_constraints)
+
+def render_servings_cost_curve(engine, diets, max_servings=200):
+    """식단별 서빙 인원수-총 식재료 비용 곡선 (포장 단위가 늘어나는 지점을 해석적으로 계산해 바로 그림)"""
+    labels = list(diets.keys())
+    curves = engine.tables.procurement.cost_curves(list(diets.values()), 1, max_servings)
+    servings_range = list(range(1, max_servings + 1))
+    chart_data = pd.DataFrame({label: curve.cost_at(servings_range) for label, curve in zip(labels, curves)},
+                              index=pd.Index(servings_range, name="서빙 인원수"))
+    st.line_chart(chart_data)
+
+    current_servings = get_user_servings()
+    next_step = curves[0].next_breakpoint(current_servings) if 1 <= current_servings <= max_servings else None
+    if next_step is not None:
+        breakpoint, increment, ingredients = next_step
+        shown = ', '.join(ingredients[:3]) + (f" 외 {len(ingredients) - 3}개" if len(ingredients) > 3 else "")
+        st.caption(f"{labels[0]}: {breakpoint:.1f}인분을 넘으면 {shown} 포장이 늘어나 비용이 {increment:,.0f}원 증가합니다.")
 
 def calculate_improvements(initial_fitness, optimized_fitness):
     improvements = []
@@ -243,12 +295,11 @@ def handle_reupload():
     if 'random_diet' in st.session_state:
         del st.session_state.random_diet
 
-def generate_random_weekly_diet():
-    diet_db_path = './data/sarang_DB/processed_DB/DIET_jeongseong.xlsx'
-    df = pd.read_excel(diet_db_path)
+def generate_random_weekly_diet(n_days=7):
+    df = pd.read_excel(DIET_DB_PATH)
 
     unique_days = df['Day'].unique()
-    selected_days = random.sample(list(unique_days), 7)
+    selected_days = random.sample(list(unique_days), min(n_days, len(unique_days)))
     selected_days.sort()
 
     selected_meals = df[df['Day'].isin(selected_days)].copy()
@@ -345,22 +396,22 @@ def create_weekly_diet_table(weekly_diet, title="주간 식단표", return_menu_
     days_data = {}
     meal_types = ['Breakfast', 'Lunch', 'Dinner']
     korean_meals = ['아침', '점심', '저녁']
+    n_days = -(-len(weekly_diet.meals) // MEALS_PER_DAY)
 
-    for day in range(1, 8):
+    for day in range(1, n_days + 1):
         days_data[day] = {meal: [] for meal in meal_types}
 
     for i, meal in enumerate(weekly_diet.meals):
         day = (i // 3) + 1
         meal_type = meal_types[i % 3]
 
-        if day <= 7:
-            menu_names = [menu.name for menu in meal.menus]
-            days_data[day][meal_type] = menu_names
+        menu_names = [menu.name for menu in meal.menus]
+        days_data[day][meal_type] = menu_names
 
     max_menus = {}
     for meal_type in meal_types:
         max_count = 0
-        for day in range(1, 8):
+        for day in range(1, n_days + 1):
             count = len(days_data[day][meal_type])
             if count > max_count:
                 max_count = count
@@ -368,7 +419,7 @@ def create_weekly_diet_table(weekly_diet, title="주간 식단표", return_menu_
 
     today = datetime.now().date()
     weekdays = []
-    for i in range(7):
+    for i in range(n_days):
         date = today + timedelta(days=i)
         weekdays.append(date)
 
@@ -386,7 +437,7 @@ def create_weekly_diet_table(weekly_diet, title="주간 식단표", return_menu_
             else:
                 row = ['']
 
-            for day in range(1, 8):
+            for day in range(1, n_days + 1):
                 menus = days_data[day][meal_type]
                 if menu_idx < len(menus):
                     row.append(menus[menu_idx])
@@ -411,6 +462,7 @@ def upload_to_github(file_buffer, filename, github_token=None, repo_name="diet-o
         }
 
     try:
+        from github import Github, Auth  # 업로드할 때만 필요
         auth = Auth.Token(github_token)
         g = Github(auth=auth)
         user = g.get_user()
@@ -450,67 +502,39 @@ def export_results_to_excel():
     if not st.session_state.optimization_complete or not st.session_state.optimization_results:
         return None
 
-    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
     buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-
-        header_font = Font(bold=True, size=12, color="FFFFFF")
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        center_alignment = Alignment(horizontal='center', vertical='center')
-
-        improved_diets = st.session_state.optimization_results
-        all_improvements = [improvements for _, _, improvements in improved_diets]
-        avg_improvements = [sum(imp[i] for imp in all_improvements) / len(all_improvements) for i in range(4)]
-
-        all_change_rates = []
-        for diet, _, _ in improved_diets:
-            menu_changes = count_menu_changes(st.session_state.weekly_diet, diet)
-            total_menus = sum(counts['total'] for counts in menu_changes.values())
-            total_changed = sum(counts['changed'] for counts in menu_changes.values())
-            change_rate = (total_changed / total_menus * 100) if total_menus > 0 else 0
-            all_change_rates.append(change_rate)
-        overall_change_rate = sum(all_change_rates) / len(all_change_rates) if all_change_rates else 0
-
-        summary_data = {
-            "항목": ["사용자", "알고리즘", "세대수", "시작시간", "완료시간", "소요시간", "개선된 해 개수", "평균 영양 개선율(%)", "평균 비용 개선율(%)", "평균 조화 개선율(%)", "평균 다양성 개선율(%)", "평균 메뉴 변경율(%)"],
-            "값": [
-                st.session_state.username,
-                "SPEA2",
-                getattr(st.session_state, 'generations', 'N/A'),
-                st.session_state.optimization_start_time.strftime("%Y-%m-%d %H:%M:%S") if st.session_state.optimization_start_time else 'N/A',
-                st.session_state.optimization_end_time.strftime("%Y-%m-%d %H:%M:%S") if st.session_state.optimization_end_time else 'N/A',
-                f"{st.session_state.optimization_duration:.1f}초" if st.session_state.optimization_duration else 'N/A',
-                len(improved_diets),
-                f"{avg_improvements[0]:.2f}" if len(avg_improvements) > 0 else 'N/A',
-                f"{avg_improvements[1]:.2f}" if len(avg_improvements) > 1 else 'N/A',
-                f"{avg_improvements[2]:.2f}" if len(avg_improvements) > 2 else 'N/A',
-                f"{avg_improvements[3]:.2f}" if len(avg_improvements) > 3 else 'N/A',
-                f"{overall_change_rate:.1f}"
-            ]
-        }
-        summary_df = pd.DataFrame(summary_data)
-        summary_df.to_excel(writer, sheet_name='📊 최적화 요약', index=False)
-
-        ws_summary = writer.sheets['📊 최적화 요약']
-        ws_summary.column_dimensions['A'].width = 20
-        ws_summary.column_dimensions['B'].width = 25
-
-        for cell in ws_summary[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = center_alignment
-            cell.border = border
-
-        for row in ws_summary.iter_rows(min_row=2, max_row=ws_summary.max_row):
-            for cell in row:
-                cell.border = border
-                cell.alignment = center_alignment
+    improved_diets = st.session_state.optimization_results
+    all_improvements = [improvements for _, _, improvements in improved_diets]
+    avg_improvements = [sum(imp[i] for imp in all_improvements) / len(all_improvements) for i in range(4)]
+
+    all_change_rates = []
+    for diet, _, _ in improved_diets:
+        menu_changes = count_menu_changes(st.session_state.weekly_diet, diet)
+        total_menus = sum(counts['total'] for counts in menu_changes.values())
+        total_changed = sum(counts['changed'] for counts in menu_changes.values())
+        change_rate = (total_changed / total_menus * 100) if total_menus > 0 else 0
+        all_change_rates.append(change_rate)
+    overall_change_rate = sum(all_change_rates) / len(all_change_rates) if all_change_rates else 0
+
+    summary_rows = [
+        ["사용자", st.session_state.username],
+        ["알고리즘", "SPEA2"],
+        ["세대수", getattr(st.session_state, 'generations', 'N/A')],
+        ["시작시간", st.session_state.optimization_start_time.strftime("%Y-%m-%d %H:%M:%S") if st.session_state.optimization_start_time else 'N/A'],
+        ["완료시간", st.session_state.optimization_end_time.strftime("%Y-%m-%d %H:%M:%S") if st.session_state.optimization_end_time else 'N/A'],
+        ["소요시간", f"{st.session_state.optimization_duration:.1f}초" if st.session_state.optimization_duration else 'N/A'],
+        ["개선된 해 개수", len(improved_diets)],
+        ["평균 영양 개선율(%)", f"{avg_improvements[0]:.2f}" if len(avg_improvements) > 0 else 'N/A'],
+        ["평균 비용 개선율(%)", f"{avg_improvements[1]:.2f}" if len(avg_improvements) > 1 else 'N/A'],
+        ["평균 조화 개선율(%)", f"{avg_improvements[2]:.2f}" if len(avg_improvements) > 2 else 'N/A'],
+        ["평균 다양성 개선율(%)", f"{avg_improvements[3]:.2f}" if len(avg_improvements) > 3 else 'N/A'],
+        ["평균 메뉴 변경율(%)", f"{overall_change_rate:.1f}"],
+    ]
+
+    with StreamingWorkbook(buffer) as book:
+        write_block_sheet(book, '📊 최적화 요약', [
+            {'header': ["항목", "값"], 'rows': summary_rows, 'header_style': 'accent_header', 'row_style': 'boxed'}
+        ], column_widths=[20, 25])
 
         for j, (optimized_diet, optimized_fitness, improvements) in enumerate(improved_diets):
             days = len(optimized_diet.meals) // 3
@@ -518,107 +542,126 @@ def export_results_to_excel():
             optimized_cost = calculate_actual_cost(optimized_diet, current_servings)
             initial_cost = st.session_state.initial_cost
             cost_change = initial_cost - optimized_cost
-            menu_changes = count_menu_changes(st.session_state.weekly_diet, optimized_diet)
-
-            sheet_name = f'💡 제안식단 {j+1}'
 
-            weekly_diet_table, max_menus_info = create_weekly_diet_table(optimized_diet, f"제안 식단 {j+1}", return_menu_counts=True)
-            weekly_diet_table.to_excel(writer, sheet_name=sheet_name, startrow=1, index=False, header=False)
+            weekly_diet_table = create_weekly_diet_table(optimized_diet, f"제안 식단 {j+1}")
 
-            ws = writer.sheets[sheet_name]
-            ws['A1'] = f"🍽️ 최적화된 주간 식단표 - 제안 식단 {j+1}"
-            ws['A1'].font = Font(bold=True, size=14, color="2F5597")
-
-            nutrients_start = 22
-            nutrients_data = []
+            nutrients_rows = []
             for nutrient in nutrient_constraints.min_values.keys():
                 total = sum(sum(menu.get_adjusted_nutrients()[nutrient] for menu in meal.menus) for meal in optimized_diet.meals)
                 daily_avg = total / days
                 min_val = nutrient_constraints.min_values[nutrient]
                 max_val = nutrient_constraints.max_values[nutrient]
                 status = "✅" if min_val <= daily_avg <= max_val else "⚠️"
+                nutrients_rows.append([nutrient, f"{daily_avg:.1f}", f"{min_val} ~ {max_val}", status])
 
-                nutrients_data.append({
-                    "영양소": nutrient,
-                    "일일평균": f"{daily_avg:.1f}",
-                    "권장범위": f"{min_val} ~ {max_val}",
-                    "상태": status
-                })
-            nutrients_df = pd.DataFrame(nutrients_data)
-            nutrients_df.to_excel(writer, sheet_name=sheet_name, startrow=nutrients_start, index=False)
-
-            ws[f'A{nutrients_start}'] = "🎯 영양성분 분석"
-            ws[f'A{nutrients_start}'].font = Font(bold=True, size=14, color="2F5597")
-
-            cost_start = 30
-            cost_data = {
-                "항목": ["총 식재료 비용", "1인당 비용", "1라당 비용"],
-                "금액": [
-                    f"{optimized_cost:,.0f}원",
-                    f"{optimized_cost/current_servings:,.0f}원" if current_servings > 0 else "N/A",
-                    f"{optimized_cost/(current_servings*21):,.0f}원" if current_servings > 0 else "N/A"
-                ]
-            }
-            cost_df = pd.DataFrame(cost_data)
-            cost_df.to_excel(writer, sheet_name=sheet_name, startrow=cost_start, index=False)
-            
-            ws[f'A{cost_start}'] = "💰 총 식재료 비용 정보"
-            ws[f'A{cost_start}'].font = Font(bold=True, size=14, color="2F5597")
-
-            perform_start = 36
-            performance_data = {
-                "지표": ["영양 점수", "비용 점수", "조화 점수", "다양성 점수", "총 식재료 비용(원)"],
-                "초기값": [
-                    f"{st.session_state.initial_fitness[0]:.2f}",
-                    f"{st.session_state.initial_fitness[1]:.2f}",
-                    f"{st.session_state.initial_fitness[2]:.2f}",
-                    f"{st.session_state.initial_fitness[3]:.2f}",
-                    f"{initial_cost:,.0f}",
-                ],
-                "최적화값": [
-                    f"{optimized_fitness[0]:.2f}",
-                    f"{optimized_fitness[1]:.2f}",
-                    f"{optimized_fitness[2]:.2f}",
-                    f"{optimized_fitness[3]:.2f}",
-                    f"{optimized_cost:,.0f}",
-                ],
-                "개선율(%)": [
-                    f"{improvements[0]:.2f}",
-                    f"{improvements[1]:.2f}",
-                    f"{improvements[2]:.2f}",
-                    f"{improvements[3]:.2f}",
-                    f"{cost_change:,.0f}원",
-                ]
-            }
-            performance_df = pd.DataFrame(performance_data)
-            performance_df.to_excel(writer, sheet_name=sheet_name, startrow=perform_start, index=False)
-
-            ws[f'A{perform_start}'] = "📈 기존 식단과의 성능 비교"
-            ws[f'A{perform_start}'].font = Font(bold=True, size=14, color="2F5597")
-
-            for col in ws.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 25)
-                ws.column_dimensions[column].width = adjusted_width
+            cost_rows = [
+                ["총 식재료 비용", f"{optimized_cost:,.0f}원"],
+                ["1인당 비용", f"{optimized_cost/current_servings:,.0f}원" if current_servings > 0 else "N/A"],
+                ["1라당 비용", f"{optimized_cost/(current_servings*len(optimized_diet.meals)):,.0f}원" if current_servings > 0 else "N/A"],
+            ]
+
+            initial_fitness = st.session_state.initial_fitness
+            performance_rows = [
+                ["영양 점수", f"{initial_fitness[0]:.2f}", f"{optimized_fitness[0]:.2f}", f"{improvements[0]:.2f}"],
+                ["비용 점수", f"{initial_fitness[1]:.2f}", f"{optimized_fitness[1]:.2f}", f"{improvements[1]:.2f}"],
+                ["조화 점수", f"{initial_fitness[2]:.2f}", f"{optimized_fitness[2]:.2f}", f"{improvements[2]:.2f}"],
+                ["다양성 점수", f"{initial_fitness[3]:.2f}", f"{optimized_fitness[3]:.2f}", f"{improvements[3]:.2f}"],
+                ["총 식재료 비용(원)", f"{initial_cost:,.0f}", f"{optimized_cost:,.0f}", f"{cost_change:,.0f}원"],
+            ]
+
+            # 각 블록의 기본 위치(행)는 기존 양식과 동일하게 유지
+            write_block_sheet(book, f'💡 제안식단 {j+1}', [
+                {'row': 0, 'title': f"🍽️ 최적화된 주간 식단표 - 제안 식단 {j+1}", 'rows': weekly_diet_table.values.tolist()},
+                {'row': 21, 'title': "🎯 영양성분 분석", 'header': ["영양소", "일일평균", "권장범위", "상태"], 'rows': nutrients_rows},
+                {'row': 29, 'title': "💰 총 식재료 비용 정보", 'header': ["항목", "금액"], 'rows': cost_rows},
+                {'row': 35, 'title': "📈 기존 식단과의 성능 비교", 'header': ["지표", "초기값", "최적화값", "개선율(%)"], 'rows': performance_rows},
+            ], max_width=25)
 
     buffer.seek(0)
     return buffer
 
-def parallel_optimize(optimizer, diet_db, weekly_diet, generations):
-    """단순 최적화 실행"""
-    return optimizer.optimize(diet_db, weekly_diet, generations)
+@st.cache_resource(show_spinner=False)
+def get_job_manager():
+    """프로세스 전체에서 공유하는 백그라운드 최적화 작업 관리자 (동시 실행/대기열 제한은 환경 변수로 조정)"""
+    scheduler = FairJobScheduler(
+        max_concurrent=int(os.getenv('DIET_MAX_CONCURRENT_JOBS', '2')),
+        max_queued_per_user=int(os.getenv('DIET_MAX_QUEUED_PER_USER', '2')),
+        max_queue_length=int(os.getenv('DIET_MAX_QUEUE_LENGTH', '20')),
+    )
+    return JobManager(scheduler=scheduler)
+
+def select_improved_diets(pareto_front, optimizer, diet_db, initial_fitness, nutrient_constraints):
+    """3가지 이상 개선된 해 중 제약조건 만족 해를 우선하여 최대 5개 선택"""
+    constraint_satisfied_diets = []
+    constraint_violated_diets = []
+
+    for optimized_diet in pareto_front:
+        optimized_fitness = optimizer.fitness(diet_db, optimized_diet, count=False)
+        improvements = calculate_improvements(initial_fitness, optimized_fitness)
+        improved_count = sum(1 for imp in improvements if imp > 0)
+        
+        if improved_count >= 3:
+            is_valid = validate_weekly_constraints(optimized_diet, nutrient_constraints, optimizer.nutrient_matrix)
+            diet_info = (optimized_diet, optimized_fitness, improvements)
+            
+            if is_valid:
+                constraint_satisfied_diets.append(diet_info)
+            else:
+                constraint_violated_diets.append(diet_info)
+    
+    improved_diets = constraint_satisfied_diets[:5]
+    if len(improved_diets) < 5:
+        needed = 5 - len(improved_diets)
+        improved_diets.extend(constraint_violated_diets[:needed])
+    return improved_diets
+
+def reconnect_job(job):
+    """다른 세션에서 시작한 작업에 연결: 작업에 보관된 초기 식단 정보를 세션으로 복원"""
+    for key, value in job.context.items():
+        st.session_state[key] = value
+    st.session_state.file_uploaded = True
+
+def render_job_progress(job):
+    snapshot = job.snapshot()
+    progress = snapshot['progress']
+    generations = progress.get('generations') or job.generations
+    time_limit_s = progress.get('time_limit_s')
+    if time_limit_s:
+        st.progress(min(1.0, progress.get('elapsed_s', 0.0) / time_limit_s))
+    else:
+        st.progress(min(1.0, progress.get('generation', 0) / generations) if generations else 0.0)
+    status_text = {'queued': '대기 중', 'running': '진행 중'}.get(snapshot['status'], snapshot['status'])
+    if snapshot['status'] == 'queued':
+        position = get_job_manager().queue_position(job.job_id)
+        if position is not None:
+            status_text += f" (대기 순번 {position}번)"
+    if time_limit_s:
+        st.markdown(f"**작업 {job.job_id}** · {status_text} · {progress.get('elapsed_s', 0.0):.0f}/{time_limit_s:.0f}초 (세대 {progress.get('generation', 0)}) · 파레토 해 {progress.get('front_size', 0)}개")
+    else:
+        st.markdown(f"**작업 {job.job_id}** · {status_text} · 세대 {progress.get('generation', 0)}/{generations} · 파레토 해 {progress.get('front_size', 0)}개")
+    best_scores = progress.get('best_scores') or []
+    if best_scores:
+        st.caption(f"현재 최고 점수 - 영양: {best_scores[0]:.2f} | 비용: {best_scores[1]:.2f} | 조화: {best_scores[2]:.2f} | 다양성: {best_scores[3]:.2f}")
+    st.caption("페이지를 닫아도 최적화는 계속됩니다. 이 페이지 주소(작업 ID 포함)로 다시 접속하면 이어서 확인할 수 있습니다.")
 
 if not st.session_state.logged_in:
     login_page()
     st.stop()
 
+# 로그인 이후에만 필요한 무거운 모듈 (한 번 import 되면 재실행 때는 sys.modules 에서 바로 가져옴)
+import pandas as pd
+from load_data import load_menu_objects, build_diet_from_dataframe, load_and_process_data, create_nutrient_constraints
+from evaluation_function import validate_weekly_constraints, calculate_actual_cost
+from spea2_optimizer import SPEA2Optimizer
+from optimizer_engine import OptimizerEngine, EvaluationTables, catalogue_snapshot_key, constraints_key
+from diet_history import DietHistory
+from optimization_jobs import JobManager
+from job_scheduler import FairJobScheduler, AdmissionError
+from diet_converter import convert_diet_format
+from food_mapper import apply_food_mapping
+from utils import diet_to_dataframe, count_menu_changes
+from excel_export import StreamingWorkbook, write_block_sheet
+
 col1, col2, col3 = st.columns([3, 5, 1])
 with col1:
     st.markdown(f'<p style="font-size: 20px; font-weight: normal; margin-top: 4px;">🙋‍♀️ {st.session_state.username}님 환영합니다!</p>', unsafe_allow_html=True)
@@ -626,7 +669,7 @@ with col3:
     if st.button("로그아웃", key="logout_btn"):
         logout()
 
-diet_db, default_constraints, harmony_matrix, menus, menu_counts, all_menus = load_data()
+diet_db, default_constraints, all_menus = load_data()
 
 with st.sidebar:
     col1, col2, col3 = st.columns([1, 5, 1])
@@ -742,9 +785,25 @@ with st.sidebar:
 
 st.markdown("---")
 st.title('식단 최적화 프로그램')
-optimizer = SPEA2Optimizer(all_menus, nutrient_constraints, harmony_matrix)
+engine = get_optimizer_engine(
+    catalogue_snapshot_key(DIET_DB_PATH, MENU_DB_PATH, INGRE_DB_PATH),
+    constraints_key(nutrient_constraints),
+    diet_db, all_menus, nutrient_constraints, default_constraints
+)
+# 엔진이 보관한 diet_db 를 사용해야 사전 계산 테이블과 적합도 캐시가 적용됨
+diet_db = engine.diet_db
+optimizer = engine.create_optimizer(SPEA2Optimizer)
+job_manager = get_job_manager()
 st.markdown("---")
 
+if st.session_state.job_id:
+    active_job = job_manager.get(st.session_state.job_id)
+    if active_job is None or active_job.owner != st.session_state.username:
+        st.session_state.job_id = None
+        st.experimental_set_query_params()
+    elif st.session_state.weekly_diet is None:
+        reconnect_job(active_job)
+
 if not st.session_state.file_uploaded:
     st.subheader('📂 초기 식단 설정')
     
@@ -752,10 +811,13 @@ if not st.session_state.file_uploaded:
     with col1:
         uploaded_file = st.file_uploader("초기 식단 파일을 업로드하세요", type="xlsx")
     with col2:
+        plan_days = st.selectbox("식단 기간", [7, 14, 28], format_func=lambda days: f"{days}일 ({days // 7}주)",
+                                 help="랜덤 식단의 기간입니다. 4주 순환 식단은 28일을 선택하세요.")
         if st.button("🎲 랜덤 식단 생성", use_container_width=True):
             st.session_state.file_uploaded = True
             st.session_state.uploaded_file = None
             st.session_state.random_diet = True
+            st.session_state.plan_days = plan_days
             st.experimental_rerun()
     
     if uploaded_file is not None:
@@ -774,12 +836,11 @@ else:
         st.button("↻", key="reupload_button", on_click=handle_reupload, help="다른 식단을 설정합니다", type="secondary")
 
     if st.session_state.weekly_diet is None:
-        name = 'jeongseong'
-        menu_db_path = f'./data/sarang_DB/processed_DB/Menu_ingredient_nutrient_{name}.xlsx'
-        ingre_db_path = f'./data/sarang_DB/processed_DB/Ingredient_Price_{name}.xlsx'
+        menu_db_path = MENU_DB_PATH
+        ingre_db_path = INGRE_DB_PATH
         
         if hasattr(st.session_state, 'random_diet') and st.session_state.random_diet:
-            random_diet_df = generate_random_weekly_diet()
+            random_diet_df = generate_random_weekly_diet(st.session_state.get('plan_days', 7))
             user_id = st.session_state.user_id
             temp_file = f"temp_random_diet_{user_id}.xlsx"
             random_diet_df.to_excel(temp_file, index=False)
@@ -880,48 +941,72 @@ else:
         """, unsafe_allow_html=True)
     
     st.markdown(f"**총 식재료 비용**: {initial_cost:,.0f}원")
+    with st.expander("👥 서빙 인원수별 총 식재료 비용"):
+        render_servings_cost_curve(engine, {"초기 식단": weekly_diet})
 
     st.markdown("---")
     
-    generations = st.slider("최적화 세대수 설정", min_value=50, max_value=500, value=200, step=50, 
-                           help="세대수가 높을수록 더 좋은 결과를 얻을 수 있지만 시간이 더 오래 걸립니다.")
+    budget_mode = st.radio("최적화 종료 기준", ["세대수", "시간 제한"], horizontal=True,
+                           help="시간 제한을 선택하면 정해진 시간 안에서 가능한 만큼 탐색한 뒤 그때까지의 최선 해를 보여줍니다.")
+    if budget_mode == "시간 제한":
+        time_limit_s = st.slider("최적화 시간 제한 (초)", min_value=10, max_value=300, value=60, step=10)
+        generations = 10000  # 시간 제한이 실제 종료 기준
+    else:
+        time_limit_s = None
+        generations = st.slider("최적화 세대수 설정", min_value=50, max_value=500, value=200, step=50, 
+                               help="세대수가 높을수록 더 좋은 결과를 얻을 수 있지만 시간이 더 오래 걸립니다.")
     
-    if st.button("🚀 식단 최적화 시작", key="optimize_button"):
-        st.session_state.generations = generations
-        st.session_state.optimization_start_time = datetime.now(KST)
-        start_time_for_duration = time.time()
-
-        with st.spinner(f'식단 최적화 진행 중... ({generations}세대)'):
-            pareto_front = parallel_optimize(optimizer, diet_db, weekly_diet, generations)
-            
-            st.session_state.optimization_end_time = datetime.now(KST)
-            optimization_duration = time.time() - start_time_for_duration
-            st.session_state.optimization_duration = optimization_duration
-
-            constraint_satisfied_diets = []
-            constraint_violated_diets = []
+    active_job = job_manager.get(st.session_state.job_id) if st.session_state.job_id else None
+
+    if st.button("🚀 식단 최적화 시작", key="optimize_button", disabled=active_job is not None and not active_job.is_finished):
+        st.session_state.generations = generations if time_limit_s is None else f"{time_limit_s}초 제한"
+        st.session_state.optimization_complete = False
+        st.session_state.optimization_results = {}
+        # 작업마다 인분을 고정한 엔진 사용 (다른 세션이 서빙 인원수를 바꿔도 실행 중인 작업의 비용 목적함수는 그대로)
+        # 같은 제약조건 엔진이고 캐시 키에 인분이 들어 있으므로 세션 간 적합도 캐시는 그대로 공유
+        job_engine = engine.for_problem(nutrient_constraints, get_user_servings(), fitness_cache=engine.fitness_cache)
+        job_optimizer = job_engine.create_optimizer(SPEA2Optimizer)
+        try:
+            job_id = job_manager.submit(
+                job_optimizer, job_engine.diet_db, weekly_diet, generations,
+                owner=st.session_state.username,
+                time_limit_s=time_limit_s,
+                postprocess=lambda front: select_improved_diets(front, job_optimizer, diet_db, initial_fitness, nutrient_constraints),
+                context={
+                    'weekly_diet': weekly_diet,
+                    'initial_fitness': initial_fitness,
+                    'initial_cost': initial_cost,
+                    'nutrients_data': st.session_state.nutrients_data,
+                    'generations': st.session_state.generations,
+                }
+            )
+        except AdmissionError as e:
+            st.warning(f"⚠️ {e}")
+        else:
+            st.session_state.job_id = job_id
+            st.experimental_set_query_params(job=job_id)
+            st.experimental_rerun()
 
-            for optimized_diet in pareto_front:
-                optimized_fitness = optimizer.fitness(diet_db, optimized_diet)
-                improvements = calculate_improvements(initial_fitness, optimized_fitness)
-                improved_count = sum(1 for imp in improvements if imp > 0)
-                
-                if improved_count >= 3:
-                    is_valid = validate_weekly_constraints(optimized_diet, nutrient_constraints)
-                    diet_info = (optimized_diet, optimized_fitness, improvements)
-                    
-                    if is_valid:
-                        constraint_satisfied_diets.append(diet_info)
-                    else:
-                        constraint_violated_diets.append(diet_info)
-            
-            improved_diets = constraint_satisfied_diets[:5]
-            if len(improved_diets) < 5:
-                needed = 5 - len(improved_diets)
-                improved_diets.extend(constraint_violated_diets[:needed])
-            
-            st.session_state.optimization_results = improved_diets
-            st.session_state.optimization_complete = True
+    if active_job is not None:
+        if not active_job.is_finished:
+            render_job_progress(active_job)
+            if st.button("⏹ 최적화 중단", key="cancel_job_button"):
+                job_manager.cancel(active_job.job_id)
+            time.sleep(1)
+            st.experimental_rerun()
+        else:
+            if active_job.status == 'failed':
+                st.error(f"⏱ 최적화 중 오류가 발생했습니다: {active_job.error}")
+            else:
+                if active_job.status == 'cancelled':
+                    st.info("최적화가 중단되었습니다. 중단 시점까지 찾은 해를 보여드립니다.")
+                st.session_state.optimization_start_time = datetime.fromtimestamp(active_job.started_at, KST)
+                st.session_state.optimization_end_time = datetime.fromtimestamp(active_job.finished_at, KST)
+                st.session_state.optimization_duration = active_job.duration
+                st.session_state.optimization_results = active_job.result
+                st.session_state.optimization_complete = True
+            st.session_state.job_id = None
+            st.experimental_set_query_params()
 
     if st.session_state.optimization_complete and st.session_state.optimization_results:
         st.subheader('🏆 최적화 된 식단 🏆')
@@ -1029,6 +1114,12 @@ else:
                             </div>
                         </div>
                         """, unsafe_allow_html=True)
+
+            st.markdown('---')
+            st.markdown('#### 👥 서빙 인원수별 총 식재료 비용 비교')
+            curve_diets = {"초기 식단": weekly_diet}
+            curve_diets.update({f"제안 식단 {i+1}": diet for i, (diet, _, _) in enumerate(improved_diets)})
+            render_servings_cost_curve(engine, curve_diets)
             
             if (st.session_state.optimization_start_time and 
                 st.session_state.optimization_end_time and 
@@ -1052,7 +1143,7 @@ else:
                 summary_data = {
                     "사용자": [st.session_state.username],
                     "알고리즘": ["SPEA2"],
-                    "세대수": [generations],
+                    "세대수": [st.session_state.generations],
                     "소요시간": [f"{st.session_state.optimization_duration:.1f}초"],
                     "개선된 해 개수": [len(improved_diets)],
                     "평균 개선율": [f"영양: {avg_improvements[0]:+.1f}% | 비용: {avg_improvements[1]:+.1f}% | 조화: {avg_improvements[2]:+.1f}% | 다양성: {avg_improvements[3]:+.1f}%"],
@@ -0,0 +1,148 @@
+import contextlib
+import io
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import List, Dict, Tuple, Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from Diet_class import Diet
+from catalogue import MenuCatalogue, MEAL_TYPES
+from diet_converter import convert_diet_format
+from food_mapper import apply_food_mapping
+
+def _convert_and_map_plan(plan_path: str, mapping_file_path: str, converter: Callable) -> pd.DataFrame:
+    """워커 프로세스: 주간 식단표 1개를 변환 + 음식 매핑하여 Day/MealType/Menus 형식으로 반환"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        converted_path = os.path.join(tmp_dir, 'converted.xlsx')
+        mapped_path = os.path.join(tmp_dir, 'mapped.xlsx')
+        # 파일마다 매핑 로그가 수백 줄 출력되므로 워커에서는 숨김
+        with contextlib.redirect_stdout(io.StringIO()):
+            converter(plan_path, converted_path)
+            mapped_df = apply_food_mapping(converted_path, mapping_file_path, mapped_path)
+
+    standard_df = mapped_df[['Day', 'MealType', 'Mapped_Menus']].copy()
+    standard_df.rename(columns={'Mapped_Menus': 'Menus'}, inplace=True)
+    return standard_df
+
+def _encode_plan(diet_df: pd.DataFrame, catalogue: MenuCatalogue) -> Tuple[List[List[int]], List[int], List[int], List[str]]:
+    meal_menu_ids, days, meal_types, missing_menus = [], [], [], []
+    for _, row in diet_df.iterrows():
+        menu_ids = []
+        menus = row['Menus']
+        if pd.notna(menus):
+            for menu_name in str(menus).split(','):
+                menu_name = menu_name.strip()
+                if not menu_name or menu_name == 'nan':
+                    continue
+                menu_id = catalogue.resolve(menu_name)
+                if menu_id >= 0:
+                    menu_ids.append(menu_id)
+                else:
+                    missing_menus.append(menu_name)
+        meal_menu_ids.append(menu_ids)
+        days.append(int(row['Day']))
+        meal_types.append(MEAL_TYPES.index(row['MealType']) if row['MealType'] in MEAL_TYPES else -1)
+    return meal_menu_ids, days, meal_types, missing_menus
+
+def load_weekly_plans_batch(plan_dir: str, menu_db_path: str, ingre_db_path: str,
+                            mapping_file_path: str = 'food_mapping.csv', pattern: str = 'Processed_*.xlsx',
+                            max_workers: int = None, converter: Callable = convert_diet_format,
+                            catalogue: MenuCatalogue = None) -> Tuple[Dict[str, np.ndarray], Dict[str, Dict]]:
+    """
+    디렉터리의 주간 식단표들을 병렬로 변환/매핑한 뒤 하나의 공유 카탈로그로 해석하여
+    모든 주차를 하나의 배열 데이터셋으로 쌓아서 반환
+
+    Args:
+        plan_dir: 주간 식단표 파일들이 있는 디렉터리
+        menu_db_path: 메뉴 DB 경로 (카탈로그는 한 번만 파싱)
+        ingre_db_path: 식재료 단가 DB 경로
+        mapping_file_path: 음식 매핑 파일 경로
+        pattern: 식단표 파일 glob 패턴
+        max_workers: 변환/매핑 워커 프로세스 수
+        converter: (입력 경로, 출력 경로)를 받는 식단표 변환 함수 (모듈 최상위 함수여야 함)
+        catalogue: 이미 생성된 카탈로그 (없으면 DB에서 생성)
+
+    Returns:
+        dataset: files, menu_ids(주차×끼니×슬롯, 빈 칸 -1), serving_ratios, days, meal_types, n_meals, menu_names
+        report: 파일명별 처리 결과 (status, error, n_meals, missing_menus)
+    """
+    plan_files = sorted(Path(plan_dir).glob(pattern))
+    if catalogue is None:
+        catalogue = MenuCatalogue.from_excel(menu_db_path, ingre_db_path)
+
+    report = {}
+    plan_frames = {}
+    if plan_files:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(_convert_and_map_plan, str(plan_file), mapping_file_path, converter): plan_file
+                for plan_file in plan_files
+            }
+            for future in as_completed(futures):
+                plan_file = futures[future]
+                try:
+                    plan_frames[plan_file] = future.result()
+                except Exception as e:
+                    report[plan_file.name] = {'status': 'failed', 'error': f"{type(e).__name__}: {e}",
+                                              'n_meals': 0, 'missing_menus': []}
+
+    # 메뉴명 해석은 카탈로그 캐시를 공유하도록 메인 프로세스에서 순서대로 수행
+    encoded_plans = []
+    for plan_file in plan_files:
+        if plan_file not in plan_frames:
+            continue
+        try:
+            meal_menu_ids, days, meal_types, missing_menus = _encode_plan(plan_frames[plan_file], catalogue)
+        except Exception as e:
+            report[plan_file.name] = {'status': 'failed', 'error': f"{type(e).__name__}: {e}",
+                                      'n_meals': 0, 'missing_menus': []}
+            continue
+        encoded_plans.append((plan_file, meal_menu_ids, days, meal_types))
+        report[plan_file.name] = {'status': 'ok', 'error': None, 'n_meals': len(meal_menu_ids),
+                                  'missing_menus': sorted(set(missing_menus))}
+
+    n_weeks = len(encoded_plans)
+    max_meals = max((len(plan[1]) for plan in encoded_plans), default=0)
+    max_slots = max((len(ids) for plan in encoded_plans for ids in plan[1]), default=0)
+
+    menu_ids = np.full((n_weeks, max_meals, max_slots), -1, dtype=np.int32)
+    serving_ratios = np.zeros((n_weeks, max_meals, max_slots), dtype=np.float32)
+    days = np.zeros((n_weeks, max_meals), dtype=np.int16)
+    meal_types = np.full((n_weeks, max_meals), -1, dtype=np.int8)
+    n_meals = np.zeros(n_weeks, dtype=np.int32)
+
+    for w, (_, meal_menu_ids, plan_days, plan_meal_types) in enumerate(encoded_plans):
+        n_meals[w] = len(meal_menu_ids)
+        days[w, :n_meals[w]] = plan_days
+        meal_types[w, :n_meals[w]] = plan_meal_types
+        for m, ids in enumerate(meal_menu_ids):
+            menu_ids[w, m, :len(ids)] = ids
+            serving_ratios[w, m, :len(ids)] = 1.0
+
+    report = {plan_file.name: report[plan_file.name] for plan_file in plan_files if plan_file.name in report}
+    failed = sum(1 for entry in report.values() if entry['status'] == 'failed')
+    print(f"식단표 일괄 변환 완료: {n_weeks}개 성공, {failed}개 실패")
+
+    dataset = {
+        'files': [plan[0].name for plan in encoded_plans],
+        'menu_ids': menu_ids,
+        'serving_ratios': serving_ratios,
+        'days': days,
+        'meal_types': meal_types,
+        'n_meals': n_meals,
+        'menu_names': catalogue.menu_names,
+    }
+    return dataset, report
+
+def dataset_to_diets(dataset: Dict[str, np.ndarray], catalogue: MenuCatalogue) -> List[Diet]:
+    """일괄 데이터셋을 주차별 Diet 객체 목록으로 복원"""
+    diets = []
+    for w in range(len(dataset['files'])):
+        n = dataset['n_meals'][w]
+        dates = [str(day) for day in dataset['days'][w, :n]]
+        meal_types = [MEAL_TYPES[t] if t >= 0 else '' for t in dataset['meal_types'][w, :n]]
+        diets.append(catalogue.decode_diet(dataset['menu_ids'][w, :n], dataset['serving_ratios'][w, :n],
+                                           dates, meal_types))
+    return diets
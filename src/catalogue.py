@@ -0,0 +1,61 @@
+import numpy as np
+from typing import List, Dict, Tuple
+from Diet_class import Menu, Meal, Diet
+from load_data import load_menu_objects, _normalize_menu_name
+
+MEAL_TYPES = ['Breakfast', 'Lunch', 'Dinner']
+
+class MenuCatalogue:
+    """메뉴 DB를 한 번만 파싱해 여러 식단이 공유하는 메뉴 목록 (메뉴명 ↔ 인덱스)"""
+
+    def __init__(self, menus: List[Menu]):
+        self.menus = list(menus)
+        self.menu_names = [menu.name for menu in self.menus]
+        self.menu_to_index = {name: i for i, name in enumerate(self.menu_names)}
+        self.categories = [menu.category for menu in self.menus]
+        self._resolved = {}  # 원본 메뉴명 → 인덱스 (정규화 결과 캐시)
+
+    @classmethod
+    def from_excel(cls, menu_db_path: str, ingre_db_path: str) -> 'MenuCatalogue':
+        return cls(list(load_menu_objects(menu_db_path, ingre_db_path).values()))
+
+    @classmethod
+    def from_menus(cls, all_menus: List[Menu]) -> 'MenuCatalogue':
+        return cls(all_menus)
+
+    def __len__(self) -> int:
+        return len(self.menus)
+
+    def resolve(self, menu_name: str) -> int:
+        """메뉴명을 카탈로그 인덱스로 변환 (없으면 -1)"""
+        menu_name = menu_name.strip()
+        if menu_name in self.menu_to_index:
+            return self.menu_to_index[menu_name]
+        if menu_name not in self._resolved:
+            normalized_name = _normalize_menu_name(menu_name, self.menu_names)
+            self._resolved[menu_name] = self.menu_to_index.get(normalized_name, -1) if normalized_name else -1
+        return self._resolved[menu_name]
+
+    def encode_diet(self, diet: Diet, max_slots: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Diet → (메뉴 인덱스 배열, serving_ratio 배열), 빈 슬롯은 -1 / 0"""
+        if max_slots is None:
+            max_slots = max((len(meal.menus) for meal in diet.meals), default=0)
+        menu_ids = np.full((len(diet.meals), max_slots), -1, dtype=np.int32)
+        ratios = np.zeros((len(diet.meals), max_slots), dtype=np.float32)
+        for i, meal in enumerate(diet.meals):
+            for j, menu in enumerate(meal.menus[:max_slots]):
+                menu_ids[i, j] = self.menu_to_index.get(menu.name, -1)
+                ratios[i, j] = menu.serving_ratio
+        return menu_ids, ratios
+
+    def decode_diet(self, menu_ids: np.ndarray, ratios: np.ndarray, dates: List[str], meal_types: List[str]) -> Diet:
+        meals = []
+        for meal_ids, meal_ratios, date, meal_type in zip(menu_ids, ratios, dates, meal_types):
+            menus = []
+            for menu_id, ratio in zip(meal_ids, meal_ratios):
+                if menu_id < 0:
+                    continue
+                spec = self.menus[menu_id]
+                menus.append(spec.with_ratio(float(ratio)))
+            meals.append(Meal(menus, date, meal_type))
+        return Diet(meals)
@@ -0,0 +1,65 @@
+import numpy as np
+from typing import Optional
+
+class HypervolumeStagnation:
+    """
+    하이퍼볼륨 정체 감지기
+
+    첫 세대 적합도의 최솟값을 기준점(nadir), 100점을 이상점으로 하는 상자 안에 고정된 몬테카를로 표본을 두고,
+    지금까지 평가된 해가 지배한 표본의 비율로 하이퍼볼륨을 추정한다.
+    지배 영역은 줄어들지 않으므로 세대마다 새 해와 '아직 지배되지 않은' 표본만 비교하면 된다 (증분 계산).
+    상대 개선량이 tolerance 미만인 세대가 patience 번 연속되면 정체로 판단한다.
+    """
+
+    def __init__(self, patience: Optional[int] = 15, tolerance: float = 1e-3, n_samples: int = 8192,
+                 upper: float = 100.0, seed: int = 0):
+        self.patience = patience
+        self.tolerance = tolerance
+        self.n_samples = n_samples
+        self.upper = upper
+        self.seed = seed
+        self.reset()
+
+    def reset(self):
+        self.samples = None
+        self.dominated = None
+        self.hypervolume = 0.0
+        self.stall_count = 0
+
+    def _init_samples(self, fitnesses: np.ndarray):
+        reference = np.minimum(fitnesses.min(axis=0), self.upper - 1.0)
+        rng = np.random.default_rng(self.seed)
+        self.samples = reference + rng.random((self.n_samples, fitnesses.shape[1])) * (self.upper - reference)
+        self.dominated = np.zeros(self.n_samples, dtype=bool)
+
+    def update(self, fitnesses: np.ndarray) -> float:
+        """이번 세대 적합도를 반영하고 추정 하이퍼볼륨(상자 대비 비율, 0~1) 반환"""
+        fitnesses = np.asarray(fitnesses, dtype=float)
+        if fitnesses.ndim != 2 or len(fitnesses) == 0:
+            self.stall_count += 1
+            return self.hypervolume
+        if self.samples is None:
+            self._init_samples(fitnesses)
+
+        open_idx = np.flatnonzero(~self.dominated)
+        if len(open_idx):
+            open_samples = self.samples[open_idx]
+            newly = np.zeros(len(open_idx), dtype=bool)
+            # 메모리 사용을 제한하기 위해 해를 묶음 단위로 비교
+            for start in range(0, len(fitnesses), 64):
+                chunk = fitnesses[start:start + 64]
+                newly |= np.any(np.all(chunk[:, None, :] >= open_samples[None, :, :], axis=2), axis=0)
+            self.dominated[open_idx[newly]] = True
+
+        previous = self.hypervolume
+        self.hypervolume = float(self.dominated.mean())
+        improvement = (self.hypervolume - previous) / previous if previous > 0 else float('inf')
+        if improvement < self.tolerance:
+            self.stall_count += 1
+        else:
+            self.stall_count = 0
+        return self.hypervolume
+
+    @property
+    def stagnated(self) -> bool:
+        return self.patience is not None and self.stall_count >= self.patience
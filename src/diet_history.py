@@ -0,0 +1,204 @@
+import os
+import pickle
+from collections import Counter, defaultdict
+from typing import List, Dict, Tuple, Optional, Iterable
+from Diet_class import Diet, Meal, Menu
+from evaluation_function import single_menu_cost, cost_bounds_from_extremes
+from harmony_index import HarmonyIndex
+
+class DietHistory:
+    """
+    제공된 식단 이력(diet_db)에서 파생되는 통계를 누적 관리
+
+    조화 쌍 횟수, 메뉴 등장 횟수, 카테고리별 최저가/최고가 메뉴만 보관하고 (끼니 목록은 보관하지 않음)
+    새 끼니가 들어오면 그 끼니만큼만 갱신한다 (append_meals 는 새 끼니 수에 비례). 결과는 calculate_harmony_matrix /
+    calculate_cost_bounds 를 전체 이력으로 다시 계산한 것과 같다.
+    저장 파일은 통계 스냅샷 뒤에 새 메뉴/끼니(메뉴명)만 담은 증분 레코드를 이어 붙이는 형식이라
+    save_delta 의 쓰기량은 새 끼니 수에 비례한다 (load 가 증분을 다시 적용, save 가 스냅샷 하나로 압축).
+    카탈로그(메뉴/식재료 DB) 스냅샷 키와 함께 저장하므로, 단가가 바뀌면 load 가 None 을 돌려 다시 만들게 한다.
+    """
+
+    def __init__(self, catalogue_key: Tuple = None):
+        self.catalogue_key = catalogue_key
+        self.n_meals = 0
+        self.menu_counts: Counter = Counter()
+        self.unique_menus: Dict[str, Menu] = {}  # 처음 등장한 순서 (동가 메뉴 판정 순서와 같음)
+        self._menu_ids: Dict[str, int] = {}
+        self.pair_counts: Dict[Tuple[int, int], int] = defaultdict(int)  # (작은 id, 큰 id) → 같은 끼니 등장 횟수
+        # 인분 → 카테고리 → [최저가 메뉴, 최저 비용, 최고가 메뉴, 최고 비용]
+        self._extremes: Dict[int, Dict[str, list]] = {}
+        self._harmony_index: Optional[HarmonyIndex] = None
+        # 마지막 저장 이후 추가된 메뉴 / 끼니(메뉴명 목록) — save_delta 가 파일 끝에 이어 씀
+        self._pending_menus: List[Menu] = []
+        self._pending_meals: List[List[str]] = []
+        self.n_deltas = 0  # 마지막 스냅샷 뒤에 이어 붙은 증분 레코드 수
+
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        # 조화 행렬 캐시와 미저장 증분은 스냅샷에 넣지 않음
+        state['_harmony_index'] = None
+        state['_pending_menus'], state['_pending_meals'] = [], []
+        state['n_deltas'] = 0
+        return state
+
+    @classmethod
+    def from_diet(cls, diet_db: Diet, catalogue_key: Tuple = None) -> 'DietHistory':
+        history = cls(catalogue_key)
+        history.append_meals(diet_db.meals)
+        return history
+
+    def __len__(self) -> int:
+        return self.n_meals
+
+    # --- 갱신 ---
+    def append_meals(self, meals: Iterable[Meal]) -> int:
+        """새 끼니들을 이력에 추가하고 추가한 끼니 수 반환"""
+        added = 0
+        for meal in meals:
+            for menu in meal.menus:
+                if menu.name not in self._menu_ids:
+                    self._add_menu(menu)
+                    self._pending_menus.append(menu)
+            names = [menu.name for menu in meal.menus]
+            self._count_meal(names)
+            self._pending_meals.append(names)
+            added += 1
+        return added
+
+    def _count_meal(self, names: List[str]):
+        ids = [self._menu_ids[name] for name in names]
+        self.menu_counts.update(names)
+        for i, first in enumerate(ids):
+            for second in ids[i + 1:]:
+                # 같은 메뉴끼리의 쌍은 대각(등장 횟수)으로 대신함
+                if first != second:
+                    self.pair_counts[(min(first, second), max(first, second))] += 1
+        self.n_meals += 1
+        self._harmony_index = None
+
+    def append_diet(self, diet: Diet) -> int:
+        return self.append_meals(diet.meals)
+
+    def _add_menu(self, menu: Menu):
+        self._menu_ids[menu.name] = len(self.unique_menus)
+        self.unique_menus[menu.name] = menu
+        for servings, extremes in self._extremes.items():
+            self._update_extremes(extremes, menu, servings)
+
+    @staticmethod
+    def _update_extremes(extremes: Dict[str, list], menu: Menu, servings: int):
+        # calculate_cost_bounds 와 같이 처음 나온 메뉴가 동가에서 이기도록 엄격한 비교
+        entry = extremes.setdefault(menu.category, [None, float('inf'), None, 0])
+        cost_min = single_menu_cost(menu, 0.6, servings)
+        cost_max = single_menu_cost(menu, 1.0, servings)
+        if cost_min < entry[1]:
+            entry[0], entry[1] = menu, cost_min
+        if cost_max > entry[3]:
+            entry[2], entry[3] = menu, cost_max
+
+    def track_servings(self, servings: int):
+        """인분별 카테고리 최저가/최고가 메뉴를 지금까지의 메뉴로 한 번 계산하고 이후에는 새 메뉴만 반영"""
+        if servings in self._extremes:
+            return
+        extremes: Dict[str, list] = {}
+        for menu in self.unique_menus.values():
+            self._update_extremes(extremes, menu, servings)
+        self._extremes[servings] = extremes
+
+    # --- 조회 ---
+    def harmony_index(self) -> HarmonyIndex:
+        """누적 쌍 횟수로 만든 희소 조화 행렬 (메뉴명 정렬 순서, 다음 추가 전까지 캐시)"""
+        if self._harmony_index is None:
+            import numpy as np
+            import scipy.sparse as sp
+            menus = sorted(self.unique_menus)
+            position = np.empty(len(menus), dtype=np.int64)
+            for rank, name in enumerate(menus):
+                position[self._menu_ids[name]] = rank
+            keys = np.array(list(self.pair_counts.keys()), dtype=np.int64).reshape(-1, 2)
+            values = np.array(list(self.pair_counts.values()), dtype=np.int64)
+            rows, cols = position[keys[:, 0]], position[keys[:, 1]]
+            diagonal = np.array([self.menu_counts[name] for name in menus], dtype=np.int64)
+            matrix = sp.coo_matrix(
+                (np.concatenate([values, values, diagonal]),
+                 (np.concatenate([rows, cols, np.arange(len(menus))]), np.concatenate([cols, rows, np.arange(len(menus))]))),
+                shape=(len(menus), len(menus)),
+            ).tocsr()
+            self._harmony_index = HarmonyIndex(matrix, menus, Counter(self.menu_counts))
+        return self._harmony_index
+
+    def cost_bounds(self, servings: int, n_days: int = 7) -> Tuple[float, float]:
+        self.track_servings(servings)
+        extremes = self._extremes[servings]
+        cheapest = {category: entry[0] for category, entry in extremes.items() if entry[0] is not None}
+        expensive = {category: entry[2] for category, entry in extremes.items() if entry[2] is not None}
+        return cost_bounds_from_extremes(cheapest, expensive, servings, n_days)
+
+    # --- 저장 ---
+    def save(self, path: str):
+        """전체 통계를 스냅샷 하나로 저장 (이어 붙은 증분 레코드도 여기서 압축됨)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+        self._pending_menus, self._pending_meals = [], []
+        self.n_deltas = 0
+
+    def save_delta(self, path: str):
+        """마지막 저장 이후 추가된 메뉴/끼니만 파일 끝에 이어 씀 (파일이 없으면 스냅샷 저장)"""
+        if not os.path.exists(path):
+            self.save(path)
+            return
+        if not self._pending_meals and not self._pending_menus:
+            return
+        with open(path, 'ab') as f:
+            pickle.dump({'menus': self._pending_menus, 'meals': self._pending_meals}, f)
+        self._pending_menus, self._pending_meals = [], []
+        self.n_deltas += 1
+
+    def _apply_delta(self, delta: Dict):
+        for menu in delta['menus']:
+            if menu.name not in self._menu_ids:
+                self._add_menu(menu)
+        for names in delta['meals']:
+            self._count_meal(names)
+
+    @classmethod
+    def load(cls, path: str, catalogue_key: Tuple = None) -> Optional['DietHistory']:
+        """저장된 이력 불러오기 (스냅샷 + 증분 레코드) — 파일이 없거나 카탈로그 스냅샷이 다르면 None"""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            history = pickle.load(f)
+            if catalogue_key is not None and history.catalogue_key != catalogue_key:
+                return None
+            while True:
+                try:
+                    delta = pickle.load(f)
+                except EOFError:
+                    break
+                history._apply_delta(delta)
+                history.n_deltas += 1
+        return history
+
+def update_history(path: str, new_meals: Iterable[Meal], catalogue_key: Tuple,
+                   diet_db: Diet = None, compact_every: int = 30) -> DietHistory:
+    """
+    야간 적재용: 저장된 이력에 새 끼니만 더해 증분 레코드로 이어 씀
+
+    저장본이 없거나 카탈로그가 바뀌었으면 diet_db(기존 전체 이력)로 새로 만든 뒤 새 끼니를 더해 스냅샷으로 저장한다.
+    증분 레코드가 compact_every 개 쌓이면 스냅샷 하나로 다시 씀.
+    """
+    history = DietHistory.load(path, catalogue_key)
+    if history is None:
+        history = DietHistory.from_diet(diet_db, catalogue_key) if diet_db is not None else DietHistory(catalogue_key)
+        added = history.append_meals(new_meals)
+        history.save(path)
+    else:
+        added = history.append_meals(new_meals)
+        if history.n_deltas + 1 >= compact_every:
+            history.save(path)
+        else:
+            history.save_delta(path)
+    print(f"식단 이력 갱신: {added}끼 추가, 총 {len(history)}끼, 메뉴 {len(history.unique_menus)}개")
+    return history
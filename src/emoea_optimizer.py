@@ -1,6 +1,6 @@
 from optimizer_base import DietOptimizer
 import numpy as np
-from typing import List
+from typing import List, Optional
 from Diet_class import Diet
 from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict, OrderedDict
@@ -28,6 +28,10 @@ class LRUCache:
                 if len(self.cache) >= self.capacity:
                     self.cache.popitem(last=False)
             self.cache[key] = value
+
+    def clear(self):
+        with self._lock:
+            self.cache.clear()
             
 class EpsilonMOEAOptimizer(DietOptimizer):
     def __init__(self, all_menus, nutrient_constraints, harmony_matrix):
@@ -53,6 +57,7 @@ class EpsilonMOEAOptimizer(DietOptimizer):
         return cached
 
     def _batch_compute_fitness(self, population: List[Diet], diet_db: Diet) -> np.ndarray:
+        self._prefetch_fitness(population, diet_db)
         fitnesses = []
         for i in range(0, len(population), self.batch_size):
             batch = population[i:i + self.batch_size]
@@ -138,29 +143,37 @@ class EpsilonMOEAOptimizer(DietOptimizer):
                 new_archive[box] = self.archive[box]
             self.archive = new_archive
 
-    def optimize(self, diet_db: Diet, initial_diet: Diet, generations: int = 100) -> List[Diet]:
+    def optimize(self, diet_db: Diet, initial_diet: Diet, generations: int = 100,
+                 time_limit_s: Optional[float] = None, max_evaluations: Optional[int] = None) -> List[Diet]:
         # 초기화
+        self._start_budget(time_limit_s, max_evaluations, diet_db)
         self.good_solutions_archive.clear()
         self.backup_solutions.clear()
         self.constraint_solutions.clear()
         
         population = [initial_diet]
         for _ in range(self.population_size - 1):
-            mutated = self.mutate(initial_diet)
-            for meal in mutated.meals:
-                for menu in meal.menus:
-                    menu.serving_ratio = np.random.uniform(0.6, 0.9)
-            population.append(mutated)
+            population.append(self._create_initial_individual(initial_diet))
         self.archive.clear()
 
         initial_fitness = self._get_cached_fitness(initial_diet, diet_db)
         
         for generation in range(generations):
             print(f"=== Generation {generation + 1}/{generations} ===")
+            population = self._receive_immigrants(population)
             fitnesses = self._batch_compute_fitness(population, diet_db)
+            if self.surrogate is not None:
+                # 아카이브만으로는 학습 표본이 부족하므로 평가된 개체군 전체를 학습에 사용
+                self.surrogate.observe(population, fitnesses)
             self._update_archive_efficient(population, fitnesses)
             self._clean_archive()
 
+            archive_solutions = [diet for diet, _ in self.archive.values()]
+            archive_fitnesses = np.array([fitness for _, fitness in self.archive.values()])
+            if self._on_generation(generation, generations, archive_fitnesses, archive_solutions):
+                print(f"Optimization stopped at generation {generation} ({self.stop_reason})")
+                return self._stopped_solutions(diet_db)
+
             # 종료 조건 체크
             current_solutions = [diet for diet, _ in self.archive.values()]
             if self.check_termination(initial_fitness, current_solutions, diet_db):
@@ -171,7 +184,8 @@ class EpsilonMOEAOptimizer(DietOptimizer):
             new_population = []
             archive_solutions = [diet for diet, _ in self.archive.values()]
             
-            while len(new_population) < self.population_size:
+            n_offspring = self._offspring_target(self.population_size)
+            while len(new_population) < n_offspring:
                 if np.random.random() < self.crossover_prob:
                     parent1 = np.random.choice(archive_solutions) if archive_solutions else np.random.choice(population)
                     parent2 = np.random.choice(population)
@@ -186,7 +200,7 @@ class EpsilonMOEAOptimizer(DietOptimizer):
                     parent = np.random.choice(archive_solutions) if archive_solutions else np.random.choice(population)
                     new_population.append(parent)
             
-            population = new_population[:self.population_size]
+            population = self._screen_offspring(new_population, self.population_size)
 
             if generation % 10 == 0:
                 self.fitness_cache = LRUCache(1000)
@@ -1,39 +1,40 @@
-from Diet_class import Menu, Diet, NutrientConstraints, get_servings
+from Diet_class import Menu, Diet, NutrientConstraints, get_servings, MEALS_PER_DAY
+from harmony_index import HarmonyIndex
+from nutrient_matrix import NutrientMatrix, get_nutrient_matrix
 import numpy as np
+import scipy.sparse as sp
 import math
 from collections import Counter, defaultdict
+from typing import Dict, Tuple
 
-def evaluate_nutrition(weeklydiet: Diet, nutrient_constraints: NutrientConstraints) -> float:
+def _constraint_arrays(nutrient_constraints: NutrientConstraints):
+    nutrients = list(nutrient_constraints.min_values)
+    min_values = np.array([nutrient_constraints.min_values[n] for n in nutrients], dtype=float)
+    max_values = np.array([nutrient_constraints.max_values[n] for n in nutrients], dtype=float)
+    return nutrients, min_values, max_values
+
+def evaluate_nutrition(weeklydiet: Diet, nutrient_constraints: NutrientConstraints,
+                       nutrient_matrix: NutrientMatrix = None) -> float:
     days = len(weeklydiet.meals) // 3
-    total_score = 0
-    
-    for day in range(days):
-        daily_nutrients = {nutrient: 0 for nutrient in nutrient_constraints.min_values}
-        start_idx = day * 3
-        for meal in weeklydiet.meals[start_idx:start_idx + 3]:
-            for menu in meal.menus:
-                adjusted_nutrients = menu.get_adjusted_nutrients()
-                for nutrient, amount in adjusted_nutrients.items():
-                    daily_nutrients[nutrient] += amount
-        
-        day_score = 100
-        nutrient_count = len(daily_nutrients)
-        max_penalty_per_nutrient = 100 / nutrient_count
-        
-        for nutrient, C_n in daily_nutrients.items():
-            L_n = nutrient_constraints.min_values[nutrient]
-            U_n = nutrient_constraints.max_values[nutrient]
-            W_n = nutrient_constraints.weights[nutrient]
+    nutrients, L_n, U_n = _constraint_arrays(nutrient_constraints)
+    W_n = np.array([nutrient_constraints.weights[n] for n in nutrients], dtype=float)
 
-            M_n = L_n if C_n < L_n else U_n if C_n > U_n else C_n
-            P_n = min(max_penalty_per_nutrient, abs((C_n - M_n) / M_n) * W_n * max_penalty_per_nutrient)
-            day_score -= P_n
+    # (일 수 × 영양소 수) 일별 합계를 영양 행렬(엔진이 넘기면 엔진 소유 행렬)에서 한 번에 계산
+    nutrient_matrix = nutrient_matrix if nutrient_matrix is not None else get_nutrient_matrix()
+    C_n = nutrient_matrix.daily_totals(weeklydiet, nutrients, days)
+    return nutrition_score_from_totals(C_n, L_n, U_n, W_n)
 
-        day_score = max(0, day_score)
-        total_score += day_score
+def nutrition_score_from_totals(C_n: np.ndarray, L_n: np.ndarray, U_n: np.ndarray, W_n: np.ndarray) -> float:
+    """(일 수 × 영양소 수) 일별 합계로 영양 점수 계산 (evaluate_nutrition 과 배열 기반 평가가 공유)"""
+    days = len(C_n)
+    max_penalty_per_nutrient = 100 / C_n.shape[1]
 
-    final_score = total_score / days
-    normalized_score = max(0, min(100, final_score))
+    M_n = np.clip(C_n, L_n, U_n)
+    P_n = np.minimum(max_penalty_per_nutrient, np.abs((C_n - M_n) / M_n) * W_n * max_penalty_per_nutrient)
+    day_scores = np.maximum(0, 100 - P_n.sum(axis=1))
+
+    final_score = day_scores.sum() / days
+    normalized_score = max(0, min(100, float(final_score)))
     return normalized_score
 
 def calculate_actual_cost(diet: Diet, servings: int = None) -> float:
@@ -45,9 +46,9 @@ def calculate_actual_cost(diet: Diet, servings: int = None) -> float:
     
     for meal in diet.meals:
         for menu in meal.menus:
-            adjusted_ingredients = menu.get_adjusted_ingredients()
-            for ing in adjusted_ingredients:
-                ingredient_total[ing.name] += ing.amount_g * servings
+            ratio = menu.serving_ratio
+            for ing in menu.ingredients:
+                ingredient_total[ing.name] += ing.amount_g * ratio * servings
                 if ing.name not in ingredient_info:
                     ingredient_info[ing.name] = {
                         'package_size': ing.package_size,
@@ -65,11 +66,12 @@ def calculate_actual_cost(diet: Diet, servings: int = None) -> float:
 
     return total_cost
 
-def evaluate_cost(diet_db: Diet, weekly_diet: Diet) -> float:
+def calculate_cost_bounds(diet_db: Diet, servings: int = None, n_days: int = 7) -> Tuple[float, float]:
+    """카테고리별 최저가/최고가 메뉴로 구성한 n_days 일 식단의 비용 (비용 점수 정규화 기준)"""
     from Diet_class import Menu, Diet, Meal
     
-    servings = get_servings()
-    weekly_cost = calculate_actual_cost(weekly_diet, servings)
+    if servings is None:
+        servings = get_servings()
     
     # 모든 메뉴 수집 및 중복 제거
     all_menus = []
@@ -101,15 +103,8 @@ def evaluate_cost(diet_db: Diet, weekly_diet: Diet) -> float:
         expensive_menu = None
         
         for menu in menus:
-            temp_menu_min = Menu(menu.name, menu.nutrients, menu.ingredients, menu.category, 0.6)
-            temp_meal_min = Meal([temp_menu_min], "temp", "temp")
-            temp_diet_min = Diet([temp_meal_min])
-            cost_min = calculate_actual_cost(temp_diet_min, servings)
-            
-            temp_menu_max = Menu(menu.name, menu.nutrients, menu.ingredients, menu.category, 1.0)
-            temp_meal_max = Meal([temp_menu_max], "temp", "temp")
-            temp_diet_max = Diet([temp_meal_max])
-            cost_max = calculate_actual_cost(temp_diet_max, servings)
+            cost_min = single_menu_cost(menu, 0.6, servings)
+            cost_max = single_menu_cost(menu, 1.0, servings)
             
             if cost_min < min_cost:
                 min_cost = cost_min
@@ -122,18 +117,29 @@ def evaluate_cost(diet_db: Diet, weekly_diet: Diet) -> float:
         category_cheapest[category] = cheapest_menu
         category_expensive[category] = expensive_menu
     
+    return cost_bounds_from_extremes(category_cheapest, category_expensive, servings, n_days)
+
+def single_menu_cost(menu: Menu, ratio: float, servings: int) -> float:
+    """메뉴 하나만 ratio 배로 servings 인분 만들 때의 비용 (카테고리별 최저가/최고가 메뉴 판정 기준)"""
+    from Diet_class import Meal
+    temp_menu = menu.with_ratio(ratio)
+    return calculate_actual_cost(Diet([Meal([temp_menu], "temp", "temp")]), servings)
+
+def cost_bounds_from_extremes(category_cheapest: Dict[str, Menu], category_expensive: Dict[str, Menu],
+                              servings: int, n_days: int = 7) -> Tuple[float, float]:
+    """카테고리별 최저가/최고가 메뉴로 n_days 일 식단을 채웠을 때의 (최저 비용, 최고 비용)"""
+    from Diet_class import Meal
     categories = ['밥', '국', '주찬', '부찬', '부찬', '김치']
     
     # 최저가 식단 생성
     min_meals = []
-    for day in range(1, 8):
+    for day in range(1, n_days + 1):
         for meal_type in ['Breakfast', 'Lunch', 'Dinner']:
             min_menus = []
             for category in categories:
                 if category in category_cheapest:
                     cheapest = category_cheapest[category]
-                    min_menu = Menu(cheapest.name, cheapest.nutrients, 
-                                  cheapest.ingredients, cheapest.category, 0.6)
+                    min_menu = cheapest.with_ratio(0.6)
                     min_menus.append(min_menu)
             min_meals.append(Meal(min_menus, str(day), meal_type))
     
@@ -142,20 +148,36 @@ def evaluate_cost(diet_db: Diet, weekly_diet: Diet) -> float:
     
     # 최고가 식단 생성
     max_meals = []
-    for day in range(1, 8):
+    for day in range(1, n_days + 1):
         for meal_type in ['Breakfast', 'Lunch', 'Dinner']:
             max_menus = []
             for category in categories:
                 if category in category_expensive:
                     expensive = category_expensive[category] 
-                    max_menu = Menu(expensive.name, expensive.nutrients,
-                                  expensive.ingredients, expensive.category, 1.0)
+                    max_menu = expensive.with_ratio(1.0)
                     max_menus.append(max_menu)
             max_meals.append(Meal(max_menus, str(day), meal_type))
     
     max_diet = Diet(max_meals)
     max_cost = calculate_actual_cost(max_diet, servings)
     
+    return min_cost, max_cost
+
+def evaluate_cost(diet_db: Diet, weekly_diet: Diet, cost_bounds: Tuple[float, float] = None,
+                  weekly_cost: float = None) -> float:
+    servings = get_servings()
+    # 구매 비용을 이미 계산했으면(예: ProcurementCostEngine) 그대로 사용
+    if weekly_cost is None:
+        weekly_cost = calculate_actual_cost(weekly_diet, servings)
+    
+    # 비용 상/하한은 diet_db와 인분에만 의존하므로 미리 계산된 값이 있으면 재사용
+    if cost_bounds is None:
+        cost_bounds = calculate_cost_bounds(diet_db, servings, max(weekly_diet.n_days, 1))
+    return cost_score_from_bounds(weekly_cost, cost_bounds)
+
+def cost_score_from_bounds(weekly_cost: float, cost_bounds: Tuple[float, float]) -> float:
+    min_cost, max_cost = cost_bounds
+
     if weekly_cost <= min_cost:
         cost_score = 100.0
     elif weekly_cost >= max_cost:
@@ -166,65 +188,95 @@ def evaluate_cost(diet_db: Diet, weekly_diet: Diet) -> float:
     
     return max(0, min(100, cost_score))
 
-def calculate_harmony_matrix(diet_db: Diet):
-    all_menus = set()
-    menu_counts = Counter()
-    for meal in diet_db.meals:
-        meal_menus = [menu.name for menu in meal.menus]
-        all_menus.update(meal_menus)
-        menu_counts.update(meal_menus)
-    
-    all_menus = sorted(all_menus)
-    menu_to_index = {menu: i for i, menu in enumerate(all_menus)}
-    
-    n_menus = len(all_menus)
-    harmony_matrix = np.zeros((n_menus, n_menus), dtype=int)
-    
-    for meal in diet_db.meals:
-        menu_names = [menu.name for menu in meal.menus]
-        for i, menu1 in enumerate(menu_names):
-            for menu2 in menu_names[i+1:]:
-                idx1, idx2 = menu_to_index[menu1], menu_to_index[menu2]
-                harmony_matrix[idx1, idx2] += 1
-                harmony_matrix[idx2, idx1] += 1
-    
-    for menu, count in menu_counts.items():
-        idx = menu_to_index[menu]
-        harmony_matrix[idx, idx] = count
-    
-    return harmony_matrix, all_menus, menu_counts, menu_to_index
+def calculate_harmony_index(diet_db: Diet) -> HarmonyIndex:
+    """희소 조화 행렬 (밀집 행렬 없이 조회/상위 쌍 질의)"""
+    return HarmonyIndex.from_diet(diet_db)
+
+def calculate_harmony_matrix(diet_db: Diet, dense: bool = False):
+    """(조화 행렬, 메뉴 목록, 메뉴 등장 횟수, 메뉴 → 인덱스) — 행렬은 기본적으로 희소(CSR), dense=True 일 때만 N×N 밀집 행렬"""
+    index = calculate_harmony_index(diet_db)
+    matrix = index.to_dense() if dense else index.matrix
+    return matrix, index.menus, index.menu_counts, index.menu_to_index
+
+HARMONY_SCOPES = ('horizon', 'day', 'meal')
+
+def _harmony_pair_sum(menu_names, harmony_matrix, menu_to_index) -> Tuple[float, int]:
+    """메뉴 목록의 모든 쌍 조화 합과 쌍 개수 — 등장 횟수 c 로 (cᵀHc - Σ c_i H_ii) / 2 계산 (O(L²) 쌍 순회 없음)"""
+    return harmony_pair_sum_indices([menu_to_index[name] for name in menu_names if name in menu_to_index], harmony_matrix)
+
+def harmony_pair_sum_indices(indices, harmony_matrix) -> Tuple[float, int]:
+    """조화 행렬 인덱스 목록의 모든 쌍 조화 합과 쌍 개수"""
+    if len(indices) < 2:
+        return 0.0, 0
+    unique, counts = np.unique(indices, return_counts=True)
+    if sp.issparse(harmony_matrix):
+        pair_sum = _csr_pair_sum(unique, counts, harmony_matrix.tocsr())
+    else:
+        sub = np.asarray(harmony_matrix[np.ix_(unique, unique)], dtype=float)
+        pair_sum = (counts @ sub @ counts - counts @ np.diag(sub)) / 2
+    return float(pair_sum), len(indices) * (len(indices) - 1) // 2
+
+def _csr_pair_sum(unique: np.ndarray, counts: np.ndarray, matrix: sp.csr_matrix) -> float:
+    """CSR 에서 unique 행들의 0 이 아닌 칸만 모아 (cᵀHc - Σ c_i H_ii) / 2 계산 (부분 행렬을 밀집으로 만들지 않음)"""
+    starts = matrix.indptr[unique]
+    lengths = matrix.indptr[unique + 1] - starts
+    row = np.repeat(np.arange(len(unique)), lengths)
+    positions = np.arange(len(row)) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    cols, values = matrix.indices[positions], matrix.data[positions]
+    weight = np.zeros(matrix.shape[1])
+    weight[unique] = counts
+    hc = np.bincount(row, weights=values * weight[cols], minlength=len(unique))
+    diagonal = np.bincount(row, weights=values * (cols == unique[row]), minlength=len(unique))
+    return float((counts @ hc - counts @ diagonal) / 2)
+
+def evaluate_harmony(diet_db: Diet, weeklydiet: Diet, harmony_data: Tuple = None,
+                     scope: str = 'horizon') -> float:
+    """
+    식단 메뉴 쌍의 평균 조화도 (최대 조화도 대비 %)
+
+    scope='horizon' 은 기간 전체의 모든 메뉴 쌍(기존 정의), 'day' 는 같은 날, 'meal' 은 같은 끼니 안의 쌍만 본다.
+    'day'/'meal' 은 기간에 선형으로 늘어나므로 4주 이상의 순환 식단에 적합하다.
+    """
+    if scope not in HARMONY_SCOPES:
+        raise ValueError(f"지원하지 않는 조화도 범위입니다: {scope} (가능: {', '.join(HARMONY_SCOPES)})")
+    max_harmony = None
+    if harmony_data is None:
+        harmony_matrix, _, _, menu_to_index = calculate_harmony_matrix(diet_db)
+    elif len(harmony_data) > 2:
+        # (행렬, 메뉴 → 인덱스, 최대 조화도) — 최댓값을 미리 구해 둔 경우 매번 행렬을 훑지 않음
+        harmony_matrix, menu_to_index, max_harmony = harmony_data
+    else:
+        harmony_matrix, menu_to_index = harmony_data
+
+    if scope == 'meal':
+        groups = [weeklydiet.meals[i:i + 1] for i in range(len(weeklydiet.meals))]
+    elif scope == 'day':
+        groups = [weeklydiet.meals[i:i + MEALS_PER_DAY] for i in range(0, len(weeklydiet.meals), MEALS_PER_DAY)]
+    else:
+        groups = [weeklydiet.meals]
 
-def evaluate_harmony(diet_db: Diet, weeklydiet: Diet) -> float:
-    harmony_matrix, _, _, menu_to_index = calculate_harmony_matrix(diet_db)
-    
-    weekly_menus = [menu.name for meal in weeklydiet.meals for menu in meal.menus]
-    total_pairs = 0
     harmony_sum = 0
-    
-    for i in range(len(weekly_menus)):
-        for j in range(i+1, len(weekly_menus)):
-            menu1, menu2 = weekly_menus[i], weekly_menus[j]
-            if menu1 in menu_to_index and menu2 in menu_to_index:
-                idx1, idx2 = menu_to_index[menu1], menu_to_index[menu2]
-                harmony_sum += harmony_matrix[idx1, idx2]
-                total_pairs += 1
+    total_pairs = 0
+    for meals in groups:
+        pair_sum, pairs = _harmony_pair_sum([menu.name for meal in meals for menu in meal.menus], harmony_matrix, menu_to_index)
+        harmony_sum += pair_sum
+        total_pairs += pairs
     
     if total_pairs == 0:
         return 0
     
     avg_harmony = harmony_sum / total_pairs
-    max_harmony = np.max(harmony_matrix)
+    if max_harmony is None:
+        max_harmony = harmony_matrix.max()
     
     return (avg_harmony / max_harmony * 100) if max_harmony > 0 else 0
 
 def get_top_n_harmony_pairs(harmony_matrix, menus, n=5):
-    harmony_matrix_no_diag = harmony_matrix - np.diag(np.diag(harmony_matrix))
-    top_pairs = []
-    for i in range(len(menus)):
-        for j in range(i+1, len(menus)):
-            if harmony_matrix_no_diag[i, j] > 0:
-                top_pairs.append((menus[i], menus[j], harmony_matrix_no_diag[i, j]))
-    return sorted(top_pairs, key=lambda x: x[2], reverse=True)[:n]
+    """조화도 상위 n 개 메뉴 쌍 (HarmonyIndex 또는 밀집/희소 행렬)"""
+    if not isinstance(harmony_matrix, HarmonyIndex):
+        matrix = sp.csr_matrix(harmony_matrix)
+        harmony_matrix = HarmonyIndex(matrix, list(menus), Counter())
+    return harmony_matrix.top_pairs(n)
 
 def evaluate_diversity(weeklydiet: Diet) -> float:
     menu_counts = Counter()
@@ -235,38 +287,38 @@ def evaluate_diversity(weeklydiet: Diet) -> float:
             menu_counts[menu.name] += 1
             total_menus += 1
     
+    return simpson_diversity(menu_counts.values(), total_menus)
+
+def simpson_diversity(counts, total_menus: int) -> float:
+    """메뉴별 등장 횟수로 심슨 다양성 지수(%) 계산"""
     if total_menus == 0:
         return 0
-    
-    simpson_index = sum((count / total_menus) ** 2 for count in menu_counts.values())
-    simpson_diversity = 1 - simpson_index
-    
-    return simpson_diversity * 100
 
-def validate_weekly_constraints_detailed(weeklydiet: Diet, nutrient_constraints: NutrientConstraints):
+    simpson_index = sum((count / total_menus) ** 2 for count in counts)
+    return (1 - simpson_index) * 100
+
+def validate_weekly_constraints_detailed(weeklydiet: Diet, nutrient_constraints: NutrientConstraints,
+                                         nutrient_matrix: NutrientMatrix = None):
     days = len(weeklydiet.meals) // 3
-    total_nutrients = {nutrient: 0 for nutrient in nutrient_constraints.min_values}
-    
-    for meal in weeklydiet.meals:
-        for menu in meal.menus:
-            adjusted_nutrients = menu.get_adjusted_nutrients()
-            for nutrient, amount in adjusted_nutrients.items():
-                total_nutrients[nutrient] += amount
-    
+    nutrients, min_values, max_values = _constraint_arrays(nutrient_constraints)
+    nutrient_matrix = nutrient_matrix if nutrient_matrix is not None else get_nutrient_matrix()
+    daily_avg = nutrient_matrix.total(weeklydiet, nutrients) / days
+
+    # 위반한 영양소만 메시지로 변환
     violations = []
-    for nutrient, total_amount in total_nutrients.items():
-        daily_avg = total_amount / days
+    for i in np.flatnonzero((daily_avg < min_values) | (daily_avg > max_values)):
+        nutrient = nutrients[i]
         min_val = nutrient_constraints.min_values[nutrient]
         max_val = nutrient_constraints.max_values[nutrient]
-        
-        if daily_avg < min_val:
-            violations.append(f"{nutrient}: {daily_avg:.1f} < {min_val} (부족)")
-        elif daily_avg > max_val:
-            violations.append(f"{nutrient}: {daily_avg:.1f} > {max_val} (과다)")
-    
+        if daily_avg[i] < min_val:
+            violations.append(f"{nutrient}: {daily_avg[i]:.1f} < {min_val} (부족)")
+        else:
+            violations.append(f"{nutrient}: {daily_avg[i]:.1f} > {max_val} (과다)")
+
     is_valid = len(violations) == 0
     return is_valid, violations
 
-def validate_weekly_constraints(weeklydiet: Diet, nutrient_constraints: NutrientConstraints) -> bool:
-    is_valid, _ = validate_weekly_constraints_detailed(weeklydiet, nutrient_constraints)
+def validate_weekly_constraints(weeklydiet: Diet, nutrient_constraints: NutrientConstraints,
+                                nutrient_matrix: NutrientMatrix = None) -> bool:
+    is_valid, _ = validate_weekly_constraints_detailed(weeklydiet, nutrient_constraints, nutrient_matrix)
     return is_valid
\ No newline at end of file
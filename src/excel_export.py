@@ -0,0 +1,159 @@
+import math
+import xlsxwriter
+from typing import List, Dict, Any, Iterable, Optional
+
+# 모든 시트가 공유하는 서식 (워크북당 한 번만 생성)
+FORMAT_SPECS = {
+    'title': {'bold': True, 'font_size': 14, 'font_color': '#2F5597'},
+    'header': {'bold': True, 'border': 1, 'align': 'center', 'valign': 'vcenter'},
+    'accent_header': {'bold': True, 'font_size': 12, 'font_color': '#FFFFFF', 'bg_color': '#4472C4',
+                      'border': 1, 'align': 'center', 'valign': 'vcenter'},
+    'boxed': {'border': 1, 'align': 'center', 'valign': 'vcenter'},
+}
+
+def _cell_width(value: Any) -> int:
+    return len(str(value)) if value is not None else 0
+
+def compute_column_widths(rows: Iterable[List[Any]], max_width: float = None, padding: int = 2) -> List[float]:
+    """행을 한 번만 훑어서 열 너비 계산 (셀 단위 재탐색 없음)"""
+    widths = []
+    for row in rows:
+        for col, value in enumerate(row):
+            length = _cell_width(value)
+            if col >= len(widths):
+                widths.extend([0] * (col + 1 - len(widths)))
+            if length > widths[col]:
+                widths[col] = length
+    widths = [width + padding for width in widths]
+    if max_width is not None:
+        widths = [min(width, max_width) for width in widths]
+    return widths
+
+class StreamingSheet:
+    """행 순서대로만 기록하는 시트 (constant_memory 모드에서는 기록된 행이 바로 디스크로 내려감)"""
+
+    def __init__(self, worksheet, formats: Dict[str, Any]):
+        self.worksheet = worksheet
+        self.formats = formats
+        self.row = 0
+
+    def set_column_widths(self, widths: List[float]):
+        for col, width in enumerate(widths):
+            self.worksheet.set_column(col, col, width)
+
+    def skip_to(self, row: int):
+        if row < self.row:
+            raise ValueError(f"스트리밍 시트는 이전 행({row} < {self.row})으로 돌아갈 수 없습니다")
+        self.row = row
+
+    def write_row(self, values: List[Any], style: str = None):
+        cell_format = self.formats[style] if style else None
+        self.worksheet.write_row(self.row, 0, values, cell_format)
+        self.row += 1
+
+    def write_rows(self, rows: Iterable[List[Any]], style: str = None):
+        for values in rows:
+            self.write_row(values, style)
+
+class StreamingWorkbook:
+    """xlsxwriter 기반 스트리밍 엑셀 작성기 (파일 경로 또는 BytesIO 모두 가능)"""
+
+    def __init__(self, output):
+        self.workbook = xlsxwriter.Workbook(output, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd',
+            'nan_inf_to_errors': True,
+        })
+        self.formats = {name: self.workbook.add_format(spec) for name, spec in FORMAT_SPECS.items()}
+
+    def add_sheet(self, name: str, column_widths: List[float] = None) -> StreamingSheet:
+        sheet = StreamingSheet(self.workbook.add_worksheet(name), self.formats)
+        if column_widths:
+            sheet.set_column_widths(column_widths)
+        return sheet
+
+    def close(self):
+        self.workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def write_block_sheet(book: StreamingWorkbook, name: str, blocks: List[Dict], max_width: float = None,
+                      column_widths: List[float] = None) -> StreamingSheet:
+    """
+    블록(제목 + 표) 단위로 시트 작성
+
+    Args:
+        book: 스트리밍 워크북
+        name: 시트 이름
+        blocks: {'row': 시작 행(0부터, 생략 시 이어서), 'title': 제목, 'header': 헤더 행,
+                 'rows': 데이터 행 목록, 'header_style': 헤더 서식, 'row_style': 데이터 서식}
+        max_width: 자동 계산 열 너비 상한
+        column_widths: 고정 열 너비 (지정 시 자동 계산 생략)
+
+    Returns:
+        작성된 시트
+    """
+    # 앞 블록이 길어지면 뒤 블록을 밀어내되, 기본 위치는 그대로 유지
+    placed_blocks = []
+    next_row = 0
+    for block in blocks:
+        start_row = max(block.get('row', next_row), next_row)
+        placed_blocks.append((start_row, block))
+        n_rows = (1 if block.get('title') is not None else 0) + (1 if block.get('header') else 0) + len(block.get('rows', []))
+        next_row = start_row + n_rows + 1
+
+    if column_widths is None:
+        def iter_rows():
+            for _, block in placed_blocks:
+                if block.get('title') is not None:
+                    yield [block['title']]
+                if block.get('header'):
+                    yield block['header']
+                yield from block.get('rows', [])
+        column_widths = compute_column_widths(iter_rows(), max_width=max_width)
+
+    sheet = book.add_sheet(name, column_widths)
+    for start_row, block in placed_blocks:
+        sheet.skip_to(start_row)
+        if block.get('title') is not None:
+            sheet.write_row([block['title']], 'title')
+        if block.get('header'):
+            sheet.write_row(block['header'], block.get('header_style', 'header'))
+        sheet.write_rows(block.get('rows', []), block.get('row_style'))
+    return sheet
+
+def _number(value) -> Optional[float]:
+    """지표 값 → 셀 값 (nan 은 계산할 수 없는 실행이므로 빈 셀)"""
+    value = float(value)
+    return None if math.isnan(value) else value
+
+def write_benchmark_workbook(filename, results: Dict[str, Dict[str, List[float]]], metrics: List[str],
+                             statistics: Dict[str, Dict[str, Dict[str, float]]]):
+    """PerformanceEvaluator 결과를 'Raw Results' / 'Summary Statistics' 시트로 스트리밍 저장"""
+    alg_names = list(results.keys())
+    n_runs = max((len(results[name][metric]) for name in alg_names for metric in metrics), default=0)
+    # 열 너비는 데이터 크기로부터 바로 계산 (셀을 다시 읽지 않음)
+    first_col_width = max([len('Algorithm')] + [len(name) for name in alg_names] + [len(m) for m in metrics]) + 2
+    value_width = max(len(f'Run {n_runs}'), 12) + 2
+
+    with StreamingWorkbook(filename) as book:
+        raw_sheet = book.add_sheet('Raw Results', [first_col_width] + [value_width] * n_runs)
+        for metric in metrics:
+            raw_sheet.write_row([metric.upper()])
+            raw_sheet.write_row(['Algorithm'] + [f'Run {i+1}' for i in range(len(results[alg_names[0]][metric]))])
+            for alg_name in alg_names:
+                raw_sheet.write_row([alg_name] + [_number(value) for value in results[alg_name][metric]])
+            raw_sheet.skip_to(raw_sheet.row + 1)
+
+        summary_sheet = book.add_sheet('Summary Statistics', [first_col_width] + [value_width] * 4)
+        for metric in metrics:
+            summary_sheet.write_row([metric.upper()])
+            summary_sheet.write_row(['Algorithm', 'Mean', 'Std', 'Min', 'Max'])
+            for alg_name in alg_names:
+                stats = statistics[alg_name][metric]
+                summary_sheet.write_row([alg_name] + [_number(stats[key]) for key in ('mean', 'std', 'min', 'max')])
+            summary_sheet.skip_to(summary_sheet.row + 1)
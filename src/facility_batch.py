@@ -0,0 +1,118 @@
+import contextlib
+import io
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Tuple, Optional, Type
+from Diet_class import Diet, Menu, NutrientConstraints
+from optimizer_base import DietOptimizer
+from optimizer_engine import OptimizerEngine
+
+class FacilityProblem:
+    """시설 하나의 최적화 문제 (시작 식단, 영양 제약, 서빙 인원수, 종료 기준)"""
+
+    def __init__(self, name: str, initial_diet: Diet, nutrient_constraints: NutrientConstraints, servings: int,
+                 generations: int = 100, time_limit_s: Optional[float] = None, max_evaluations: Optional[int] = None,
+                 seed: Optional[int] = None):
+        self.name = name
+        self.initial_diet = initial_diet
+        self.nutrient_constraints = nutrient_constraints
+        self.servings = servings
+        self.generations = generations
+        self.time_limit_s = time_limit_s
+        self.max_evaluations = max_evaluations
+        self.seed = seed
+
+def _solve_facility(engine: OptimizerEngine, problem: FacilityProblem, optimizer_cls: Type[DietOptimizer],
+                    optimizer_params: Dict, repair: bool) -> Dict:
+    facility_engine = engine.for_problem(problem.nutrient_constraints, problem.servings)
+    optimizer = facility_engine.create_optimizer(optimizer_cls, repair=repair)
+    for name, value in optimizer_params.items():
+        setattr(optimizer, name, value)
+    if problem.seed is not None:
+        np.random.seed(problem.seed)
+
+    started = time.monotonic()
+    solutions = optimizer.optimize(facility_engine.diet_db, problem.initial_diet, problem.generations,
+                                   time_limit_s=problem.time_limit_s, max_evaluations=problem.max_evaluations)
+    return {
+        'name': problem.name,
+        'status': 'ok',
+        'error': None,
+        'servings': problem.servings,
+        'solutions': solutions,
+        'fitnesses': [facility_engine.fitness(diet) for diet in solutions],
+        'costs': facility_engine.tables.procurement.cost(solutions, problem.servings).tolist() if solutions else [],
+        'initial_fitness': facility_engine.fitness(problem.initial_diet),
+        'stop_reason': optimizer.stop_reason,
+        'evaluations': optimizer.evaluation_count,
+        'elapsed_s': time.monotonic() - started,
+    }
+
+def _solve_facility_chunk(diet_db: Diet, all_menus: List[Menu], problems: List[Tuple[int, FacilityProblem]],
+                          optimizer_cls: Type[DietOptimizer], optimizer_params: Dict, repair: bool,
+                          threads_per_worker: int, quiet: bool) -> List[Tuple[int, Dict]]:
+    """워커 프로세스: 카탈로그 테이블(조화 행렬, 구매 비용 엔진)을 한 번만 만들고 맡은 시설 문제들을 차례로 최적화"""
+    engine = OptimizerEngine(diet_db, all_menus, problems[0][1].nutrient_constraints, max_workers=threads_per_worker)
+    results = []
+    for index, problem in problems:
+        output = io.StringIO() if quiet else None
+        try:
+            with (contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext()):
+                results.append((index, _solve_facility(engine, problem, optimizer_cls, optimizer_params, repair)))
+        except Exception as e:
+            results.append((index, {'name': problem.name, 'status': 'failed', 'error': f"{type(e).__name__}: {e}",
+                                    'servings': problem.servings, 'solutions': [], 'fitnesses': [], 'costs': []}))
+    engine.shutdown()
+    return results
+
+def optimize_facilities(diet_db: Diet, all_menus: List[Menu], problems: List[FacilityProblem],
+                        optimizer_cls: Type[DietOptimizer] = None, optimizer_params: Dict = None,
+                        max_workers: int = None, threads_per_worker: int = 2, repair: bool = True,
+                        quiet: bool = True) -> List[Dict]:
+    """
+    여러 시설의 식단 최적화를 하나의 프로세스 풀에서 일괄 실행
+
+    시설마다 영양 제약과 서빙 인원수가 다르지만 메뉴 카탈로그, 단가 테이블, 조화 행렬은 같으므로
+    문제들을 워커 수만큼 묶어 보내고, 각 워커는 공유 테이블을 한 번만 만든 뒤 시설별 엔진(for_problem)으로 최적화한다.
+    인분은 엔진마다 따로 보관하므로 전역 SERVINGS 를 바꾸지 않는다.
+
+    Args:
+        diet_db: 조화 행렬/비용 상하한 기준 식단 DB
+        all_menus: 전체 메뉴 목록
+        problems: 시설별 최적화 문제
+        optimizer_cls: 사용할 최적화기 클래스 (기본값 SPEA2)
+        optimizer_params: 최적화기에 설정할 속성 (population_size 등)
+        max_workers: 워커 프로세스 수 (기본값 CPU 수, 문제 수를 넘지 않음)
+        threads_per_worker: 워커별 적합도 평가 스레드 수
+        repair: 자식 해 영양 보정 사용 여부
+        quiet: 워커의 최적화 로그 숨김
+
+    Returns:
+        입력 순서대로 시설별 결과 (name, status, error, servings, solutions, fitnesses, costs,
+        initial_fitness, stop_reason, evaluations, elapsed_s)
+    """
+    if not problems:
+        return []
+    if optimizer_cls is None:
+        from spea2_optimizer import SPEA2Optimizer
+        optimizer_cls = SPEA2Optimizer
+    n_workers = max(1, min(max_workers or os.cpu_count() or 1, len(problems)))
+    # 라운드 로빈으로 묶어 워커마다 공유 테이블을 한 번만 만들게 함
+    chunks = [[(i, problems[i]) for i in range(worker, len(problems), n_workers)] for worker in range(n_workers)]
+
+    results: List[Optional[Dict]] = [None] * len(problems)
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = [
+            pool.submit(_solve_facility_chunk, diet_db, all_menus, chunk, optimizer_cls, dict(optimizer_params or {}),
+                        repair, threads_per_worker, quiet)
+            for chunk in chunks
+        ]
+        for future in as_completed(futures):
+            for index, result in future.result():
+                results[index] = result
+
+    failed = sum(1 for result in results if result['status'] == 'failed')
+    print(f"시설 일괄 최적화 완료: {len(results) - failed}개 성공, {failed}개 실패 ({n_workers}개 워커)")
+    return results
@@ -0,0 +1,98 @@
+import numpy as np
+import scipy.sparse as sp
+from collections import Counter
+from typing import List, Dict, Tuple, Optional
+from Diet_class import Diet
+
+class HarmonyIndex:
+    """
+    희소(CSR) 메뉴 조화 행렬
+
+    과거 식단에서 같은 끼니에 함께 나온 횟수(대각은 메뉴 등장 횟수)를 calculate_harmony_matrix 와 같은 정의로 보관하되,
+    끼니별 메뉴 쌍을 배열로 한 번에 펼쳐 만들고 0 이 아닌 칸만 저장한다.
+    메뉴가 수천 개여도 밀집 N×N 행렬 없이 조회와 상위 쌍 질의를 할 수 있다.
+    """
+
+    def __init__(self, matrix: sp.csr_matrix, menus: List[str], menu_counts: Counter):
+        self.matrix = matrix
+        self.menus = menus
+        self.menu_counts = menu_counts
+        self.menu_to_index = {menu: i for i, menu in enumerate(menus)}
+        self.max_value = int(matrix.max()) if matrix.nnz else 0
+        self._dense: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_diet(cls, diet_db: Diet) -> 'HarmonyIndex':
+        meal_names = [[menu.name for menu in meal.menus] for meal in diet_db.meals]
+        menu_counts = Counter(name for names in meal_names for name in names)
+        menus = sorted(menu_counts)
+        menu_to_index = {menu: i for i, menu in enumerate(menus)}
+        n_menus = len(menus)
+
+        # 끼니 크기별로 묶어 (끼니 수 × 크기) 인덱스 배열에서 상삼각 위치 쌍을 한 번에 펼침
+        by_size: Dict[int, List[List[int]]] = {}
+        for names in meal_names:
+            if len(names) > 1:
+                by_size.setdefault(len(names), []).append([menu_to_index[name] for name in names])
+        rows, cols = [], []
+        for size, meals in by_size.items():
+            meal_indices = np.array(meals, dtype=np.int64)
+            first, second = np.triu_indices(size, k=1)
+            rows.append(meal_indices[:, first].ravel())
+            cols.append(meal_indices[:, second].ravel())
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+        # 같은 메뉴끼리의 쌍은 대각(등장 횟수)으로 덮어쓰므로 제외
+        distinct = rows != cols
+        rows, cols = rows[distinct], cols[distinct]
+
+        diagonal = np.array([menu_counts[menu] for menu in menus], dtype=np.int64)
+        matrix = sp.coo_matrix(
+            (np.concatenate([np.ones(2 * len(rows), dtype=np.int64), diagonal]),
+             (np.concatenate([rows, cols, np.arange(n_menus)]), np.concatenate([cols, rows, np.arange(n_menus)]))),
+            shape=(n_menus, n_menus),
+        ).tocsr()
+        matrix.sum_duplicates()
+        return cls(matrix, menus, menu_counts)
+
+    def __len__(self) -> int:
+        return len(self.menus)
+
+    def get(self, menu1: str, menu2: str) -> int:
+        """두 메뉴의 조화도 (같은 메뉴면 등장 횟수, 모르는 메뉴면 0)"""
+        i, j = self.menu_to_index.get(menu1), self.menu_to_index.get(menu2)
+        if i is None or j is None:
+            return 0
+        return int(self.matrix[i, j])
+
+    def neighbours(self, menu: str, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """menu 와 함께 나온 메뉴와 횟수 (많은 순, n 개까지)"""
+        i = self.menu_to_index.get(menu)
+        if i is None:
+            return []
+        start, end = self.matrix.indptr[i], self.matrix.indptr[i + 1]
+        cols, values = self.matrix.indices[start:end], self.matrix.data[start:end]
+        keep = cols != i
+        cols, values = cols[keep], values[keep]
+        order = np.lexsort((cols, -values))[:n]
+        return [(self.menus[c], int(v)) for c, v in zip(cols[order], values[order])]
+
+    def top_pairs(self, n: int = 5) -> List[Tuple[str, str, int]]:
+        """조화도가 가장 높은 메뉴 쌍 n 개 — 상삼각 0 이 아닌 칸에서 argpartition 으로 후보만 골라 정렬"""
+        upper = sp.triu(self.matrix, k=1, format='coo')
+        rows, cols, values = upper.row, upper.col, upper.data
+        if n <= 0 or not len(values):
+            return []
+        if len(values) > n:
+            # 경계값과 같은 칸까지 남겨야 (행, 열) 순 동점 처리가 전체 정렬과 같아짐
+            threshold = values[np.argpartition(values, len(values) - n)[len(values) - n]]
+            keep = values >= threshold
+            rows, cols, values = rows[keep], cols[keep], values[keep]
+        order = np.lexsort((cols, rows, -values))[:n]
+        return [(self.menus[r], self.menus[c], int(v)) for r, c, v in zip(rows[order], cols[order], values[order])]
+
+    def to_dense(self) -> np.ndarray:
+        """밀집 N×N 사본 — 처음 요청할 때 한 번만 만듦 (평가 경로는 CSR 을 그대로 사용)"""
+        if self._dense is None:
+            self._dense = self.matrix.toarray()
+        return self._dense
@@ -0,0 +1,205 @@
+import contextlib
+import io
+import queue
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Optional, Type
+from Diet_class import Diet, Menu
+from catalogue import MenuCatalogue
+from optimizer_base import DietOptimizer
+
+TOPOLOGIES = ('ring', 'fully_connected', 'random')
+
+def migration_targets(topology: str, island_id: int, n_islands: int, rng: np.random.Generator) -> List[int]:
+    """이주 해를 보낼 섬 번호 목록"""
+    if n_islands < 2:
+        return []
+    if topology == 'ring':
+        return [(island_id + 1) % n_islands]
+    if topology == 'fully_connected':
+        return [i for i in range(n_islands) if i != island_id]
+    if topology == 'random':
+        others = [i for i in range(n_islands) if i != island_id]
+        return [int(rng.choice(others))]
+    raise ValueError(f"지원하지 않는 이주 토폴로지입니다: {topology} (가능: {', '.join(TOPOLOGIES)})")
+
+def _island_catalogue(all_menus: List[Menu], initial_diet: Diet) -> MenuCatalogue:
+    """전체 메뉴 + 초기 식단 메뉴로 만든 카탈로그 (모든 섬이 같은 순서로 만들어 인덱스가 일치)"""
+    menus = {menu.name: menu for menu in all_menus}
+    for meal in initial_diet.meals:
+        for menu in meal.menus:
+            menus.setdefault(menu.name, menu)
+    return MenuCatalogue.from_menus(list(menus.values()))
+
+class _DietCodec:
+    """섬 사이에 식단을 (메뉴 인덱스, 배식 비율) 배열로 주고받기 위한 변환기"""
+
+    def __init__(self, catalogue: MenuCatalogue, template: Diet):
+        self.catalogue = catalogue
+        self.max_slots = max((len(meal.menus) for meal in template.meals), default=0)
+        self.dates = [meal.date for meal in template.meals]
+        self.meal_types = [meal.meal_type for meal in template.meals]
+
+    def encode(self, diet: Diet) -> Tuple[np.ndarray, np.ndarray]:
+        return self.catalogue.encode_diet(diet, self.max_slots)
+
+    def decode(self, encoded: Tuple[np.ndarray, np.ndarray]) -> Diet:
+        menu_ids, ratios = encoded
+        return self.catalogue.decode_diet(menu_ids, ratios, self.dates, self.meal_types)
+
+class MigrationChannel:
+    """섬마다 받은 편지함(큐)을 두고 토폴로지에 따라 이웃 섬으로 이주 해를 보내는 채널"""
+
+    def __init__(self, inboxes, topology: str):
+        self.inboxes = inboxes
+        self.topology = topology
+
+    def exchange(self, island_id: int, optimizer: DietOptimizer, codec: _DietCodec, rng: np.random.Generator,
+                 emigrants: List[Diet]) -> List[Diet]:
+        packet = [codec.encode(diet) for diet in emigrants]
+        for target in migration_targets(self.topology, island_id, len(self.inboxes), rng):
+            self.inboxes[target].put((island_id, packet))
+        # 도착해 있는 이주 해만 가져옴 (다른 섬을 기다리지 않는 비동기 이주)
+        immigrants = []
+        while True:
+            try:
+                _, incoming = self.inboxes[island_id].get_nowait()
+            except queue.Empty:
+                break
+            immigrants.extend(codec.decode(encoded) for encoded in incoming)
+        return immigrants
+
+def _run_island(island_id: int, optimizer_cls: Type[DietOptimizer], optimizer_params: Dict,
+                all_menus: List[Menu], nutrient_constraints, harmony_matrix, diet_db: Diet, initial_diet: Diet,
+                generations: int, time_limit_s: Optional[float], max_evaluations: Optional[int],
+                migration_interval: int, migration_size: int, channel, seed: int,
+                archive_limit: int, quiet: bool) -> Dict:
+    """워커 프로세스: 섬 하나의 진화를 실행하고 결과 아카이브를 압축 표현으로 반환"""
+    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
+    codec = _DietCodec(_island_catalogue(all_menus, initial_diet), initial_diet)
+
+    optimizer = optimizer_cls(all_menus, nutrient_constraints, harmony_matrix)
+    for name, value in optimizer_params.items():
+        setattr(optimizer, name, value)
+    optimizer.migration_interval = migration_interval
+    optimizer.migration_size = migration_size
+    optimizer.migration_callback = lambda generation, emigrants: channel.exchange(island_id, optimizer, codec, rng, emigrants)
+
+    output = io.StringIO() if quiet else None
+    with (contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext()):
+        solutions = optimizer.optimize(diet_db, initial_diet, generations,
+                                       time_limit_s=time_limit_s, max_evaluations=max_evaluations)
+    optimizer.thread_pool.shutdown(wait=False)
+    # 채널이 종료 시 최종 프론트를 받으면 (공유 아카이브) 교환 주기 전에 끝난 섬의 해도 합쳐지도록 전달
+    publish = getattr(channel, 'publish', None)
+    if publish is not None:
+        publish(island_id, optimizer, codec)
+
+    backup = sorted(optimizer.backup_solutions, key=lambda entry: entry[1], reverse=True)[:archive_limit]
+    constraint = sorted(optimizer.constraint_solutions, key=lambda entry: entry[1], reverse=True)[:archive_limit]
+    return {
+        'island': island_id,
+        'algorithm': optimizer_cls.__name__,
+        'stop_reason': optimizer.stop_reason,
+        'evaluations': optimizer.evaluation_count,
+        'elapsed_s': optimizer.elapsed_s,
+        'solutions': [codec.encode(diet) for diet in solutions],
+        'good': [codec.encode(diet) for diet in optimizer.good_solutions_archive],
+        'backup': [(codec.encode(diet), improvements, satisfied) for diet, improvements, satisfied in backup],
+        'constraint': [(codec.encode(diet), improvements) for diet, improvements in constraint],
+        'front': [(codec.encode(diet), fitness) for diet, fitness in optimizer.get_best_front()],
+    }
+
+class IslandModelOptimizer(DietOptimizer):
+    """
+    섬 모델 병렬 최적화기
+
+    임의의 DietOptimizer 하위 클래스로 K개의 독립 개체군(섬)을 각각 별도 프로세스에서 진화시키고,
+    migration_interval 세대마다 최선 프론트의 해 일부를 토폴로지에 따라 이웃 섬으로 보낸다.
+    종료 후 섬들의 아카이브를 합쳐 get_final_solutions 로 최종 해를 고른다.
+    """
+
+    def __init__(self, all_menus, nutrient_constraints, harmony_matrix, optimizer_cls: Type[DietOptimizer] = None,
+                 n_islands: int = 4, migration_interval: int = 10, migration_size: int = 5, topology: str = 'ring',
+                 optimizer_params: Dict = None, archive_limit: int = 50, quiet: bool = True):
+        super().__init__(all_menus, nutrient_constraints, harmony_matrix)
+        if optimizer_cls is None:
+            from spea2_optimizer import SPEA2Optimizer
+            optimizer_cls = SPEA2Optimizer
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"지원하지 않는 이주 토폴로지입니다: {topology} (가능: {', '.join(TOPOLOGIES)})")
+        self.optimizer_cls = optimizer_cls
+        self.n_islands = n_islands
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.topology = topology
+        self.optimizer_params = dict(optimizer_params or {})
+        self.archive_limit = archive_limit
+        self.quiet = quiet
+        self.island_reports: List[Dict] = []
+
+    def _describe(self) -> str:
+        return f"Island model: {self.n_islands} x {self.optimizer_cls.__name__} ({self.topology}, every {self.migration_interval} generations)"
+
+    def _island_classes(self) -> List[Type[DietOptimizer]]:
+        """섬별 최적화기 클래스"""
+        return [self.optimizer_cls] * self.n_islands
+
+    def _make_channel(self, manager):
+        """섬 사이 이주 채널 (워커 프로세스로 전달되므로 매니저 프록시만 보관해야 함)"""
+        return MigrationChannel([manager.Queue() for _ in range(self.n_islands)], self.topology)
+
+    def _merge_reports(self, reports: List[Dict], codec: _DietCodec):
+        """섬 아카이브를 이 최적화기의 아카이브로 병합"""
+        for report in reports:
+            print(f"Island {report['island']} ({report['algorithm']}): {report['stop_reason'] or 'completed'}, "
+                  f"{report['evaluations']} evaluations, {report['elapsed_s']:.1f}s")
+            self.good_solutions_archive.extend(codec.decode(encoded) for encoded in report['good'])
+            self.backup_solutions.extend((codec.decode(encoded), improvements, satisfied)
+                                         for encoded, improvements, satisfied in report['backup'])
+            self.constraint_solutions.extend((codec.decode(encoded), improvements)
+                                             for encoded, improvements in report['constraint'])
+            if report['front']:
+                self._update_best_front([codec.decode(encoded) for encoded, _ in report['front']],
+                                        np.array([fitness for _, fitness in report['front']]))
+            self.evaluation_count += report['evaluations']
+
+    def _after_islands(self, channel, codec: _DietCodec):
+        """모든 섬이 끝난 뒤 (매니저 종료 전) 채널에 남은 정보를 처리할 하위 클래스용 훅"""
+
+    def optimize(self, diet_db: Diet, initial_diet: Diet, generations: int = 100,
+                 time_limit_s: Optional[float] = None, max_evaluations: Optional[int] = None,
+                 seed: int = None) -> List[Diet]:
+        # 초기화
+        self._start_budget(time_limit_s, max_evaluations, diet_db)
+        self.good_solutions_archive.clear()
+        self.backup_solutions.clear()
+        self.constraint_solutions.clear()
+        self.island_reports = []
+
+        if seed is None:
+            seed = int(np.random.randint(0, 2**31 - 1))
+        island_evaluations = max_evaluations // len(self._island_classes()) if max_evaluations is not None else None
+        codec = _DietCodec(_island_catalogue(self.all_menus, initial_diet), initial_diet)
+
+        print(f"=== {self._describe()} ===")
+        with multiprocessing.Manager() as manager:
+            channel = self._make_channel(manager)
+            island_classes = self._island_classes()
+            with ProcessPoolExecutor(max_workers=len(island_classes)) as executor:
+                futures = [
+                    executor.submit(
+                        _run_island, island_id, optimizer_cls, self.optimizer_params,
+                        self.all_menus, self.nutrient_constraints, self.harmony_matrix, diet_db, initial_diet,
+                        generations, time_limit_s, island_evaluations, self.migration_interval,
+                        self.migration_size, channel, seed + island_id, self.archive_limit, self.quiet,
+                    )
+                    for island_id, optimizer_cls in enumerate(island_classes)
+                ]
+                self.island_reports = [future.result() for future in futures]
+            self._merge_reports(self.island_reports, codec)
+            self._after_islands(channel, codec)
+
+        return self._stopped_solutions(diet_db)
@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional
+
+class AdmissionError(Exception):
+    """대기열이 가득 차서 작업을 받을 수 없을 때 발생"""
+
+class FairJobScheduler:
+    """
+    프로세스 내 작업 스케줄러
+
+    - 전체 동시 실행 수 상한 (max_concurrent 개의 워커 스레드)
+    - 사용자별 대기열을 라운드로빈으로 꺼내 사용자 간 공정성 보장 (사용자당 동시 실행 max_running_per_user)
+    - 사용자별/전체 대기열 길이 제한으로 입장 제어
+    """
+
+    def __init__(self, max_concurrent: int = 2, max_running_per_user: int = 1,
+                 max_queued_per_user: int = 3, max_queue_length: int = 30):
+        self.max_concurrent = max_concurrent
+        self.max_running_per_user = max_running_per_user
+        self.max_queued_per_user = max_queued_per_user
+        self.max_queue_length = max_queue_length
+
+        self._queues: 'OrderedDict[str, deque]' = OrderedDict()  # 사용자 → (task_id, 실행 함수) 대기열
+        self._running: Dict[str, int] = {}  # 사용자 → 실행 중 작업 수
+        self._condition = threading.Condition()
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f'diet-scheduler-{i}', daemon=True)
+            for i in range(max_concurrent)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def queued_count(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def submit(self, task_id: str, owner: str, run: Callable[[], None]):
+        """작업을 대기열에 추가 (제한 초과 시 AdmissionError)"""
+        with self._condition:
+            if self.queued_count >= self.max_queue_length:
+                raise AdmissionError(f"대기 중인 작업이 너무 많습니다 ({self.max_queue_length}개). 잠시 후 다시 시도해주세요.")
+            user_queue = self._queues.setdefault(owner, deque())
+            if len(user_queue) >= self.max_queued_per_user:
+                raise AdmissionError(f"사용자당 대기 작업은 최대 {self.max_queued_per_user}개입니다.")
+            user_queue.append((task_id, run))
+            self._condition.notify()
+
+    def cancel(self, task_id: str) -> bool:
+        """아직 시작하지 않은 작업을 대기열에서 제거"""
+        with self._condition:
+            for owner, user_queue in self._queues.items():
+                for entry in user_queue:
+                    if entry[0] == task_id:
+                        user_queue.remove(entry)
+                        return True
+        return False
+
+    def _dispatch_order(self) -> List[str]:
+        """현재 상태에서 작업이 시작될 순서 (라운드로빈 시뮬레이션, 락 보유 상태에서 호출)"""
+        queues = [(owner, list(user_queue)) for owner, user_queue in self._queues.items() if user_queue]
+        order = []
+        depth = 0
+        while True:
+            added = False
+            for owner, entries in queues:
+                if depth < len(entries):
+                    order.append(entries[depth][0])
+                    added = True
+            if not added:
+                return order
+            depth += 1
+
+    def queue_position(self, task_id: str) -> Optional[int]:
+        """대기 순번 (1부터), 대기열에 없으면 None"""
+        with self._condition:
+            order = self._dispatch_order()
+        return order.index(task_id) + 1 if task_id in order else None
+
+    def _next_task(self):
+        """실행 가능한 사용자 중 라운드로빈 순서상 첫 작업 (락 보유 상태에서 호출)"""
+        for owner in list(self._queues.keys()):
+            user_queue = self._queues[owner]
+            if not user_queue or self._running.get(owner, 0) >= self.max_running_per_user:
+                continue
+            task = user_queue.popleft()
+            # 방금 차례가 된 사용자는 맨 뒤로 보내 다른 사용자에게 순서를 넘김
+            self._queues.move_to_end(owner)
+            if not user_queue:
+                del self._queues[owner]
+            return owner, task
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                next_task = self._next_task()
+                while next_task is None:
+                    self._condition.wait()
+                    next_task = self._next_task()
+                owner, (task_id, run) = next_task
+                self._running[owner] = self._running.get(owner, 0) + 1
+            try:
+                run()
+            finally:
+                with self._condition:
+                    self._running[owner] -= 1
+                    if self._running[owner] == 0:
+                        del self._running[owner]
+                    self._condition.notify_all()
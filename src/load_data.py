@@ -1,6 +1,8 @@
 import pandas as pd
 from typing import List, Dict, Tuple
 from Diet_class import Ingredient, Menu, Meal, Diet, NutrientConstraints
+import numpy as np
+from nutrient_matrix import nutrient_columns
 from openpyxl import load_workbook
 
 def _load_excel_files(menu_db_path: str, ingre_db_path: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
@@ -56,26 +58,27 @@ def _create_ingredient_dict(menu_ingre_df: pd.DataFrame, ingre_price_df: pd.Data
 
 def _create_menu_objects(menu_nutri_df: pd.DataFrame, ingredient_dict: Dict[str, List[Ingredient]], menu_categories: Dict[str, str]) -> Dict[str, Menu]:
     menu_objects = {}
-    
-    for _, row in menu_nutri_df.iterrows():
-        menu_name = row['Menu']
-        nutrients = {
-            '에너지(kcal)': float(row['에너지(kcal)']),
-            '탄수화물(g)': float(row['탄수화물(g)']),
-            '단백질(g)': float(row['단백질(g)']),
-            '지방(g)': float(row['지방(g)']),
-            '식이섬유(g)': float(row['식이섬유(g)']),
-        }
+
+    # 'nutrient' 시트의 숫자 열을 모두 영양소로 사용 (나트륨, 칼슘 등 열을 추가하면 그대로 반영)
+    nutrients = nutrient_columns(menu_nutri_df)
+    menu_nutri_df = menu_nutri_df.copy()
+    menu_nutri_df[nutrients] = menu_nutri_df[nutrients].apply(pd.to_numeric, errors='coerce').fillna(0.0)
+    # 같은 메뉴가 여러 행이면 마지막 행 사용 (영양 행렬과 같은 float32 값으로 보관)
+    menu_values = {}
+    for menu_name, row in zip(menu_nutri_df['Menu'], menu_nutri_df[nutrients].to_numpy(dtype=np.float32)):
+        menu_values[menu_name] = row
+
+    for menu_name, row in menu_values.items():
         ingredients = ingredient_dict.get(menu_name, [])
         category = menu_categories.get(menu_name, "Unknown")
-        
+
         menu_objects[menu_name] = Menu(
-            name=menu_name, 
-            nutrients=nutrients, 
-            ingredients=ingredients, 
+            name=menu_name,
+            nutrients=dict(zip(nutrients, row.tolist())),
+            ingredients=ingredients,
             category=category
         )
-    
+
     return menu_objects
 
 def _normalize_menu_name(menu_name: str, available_menus: list) -> str:
@@ -151,14 +154,16 @@ def _normalize_menu_name(menu_name: str, available_menus: list) -> str:
 
     return None
 
-def load_and_process_data(diet_db_path: str, menu_db_path: str, ingre_db_path: str) -> Diet:
-    diet_df = pd.read_excel(diet_db_path)
+def load_menu_objects(menu_db_path: str, ingre_db_path: str) -> Dict[str, Menu]:
+    """메뉴/식재료 DB를 한 번 파싱하여 메뉴명 → Menu 객체 사전 생성"""
     menu_ingre_df, menu_nutri_df, menu_cat_df, ingre_price_df = _load_excel_files(menu_db_path, ingre_db_path)
-    
+
     menu_categories = dict(zip(menu_cat_df['Menu'], menu_cat_df['Category']))
     ingredient_dict = _create_ingredient_dict(menu_ingre_df, ingre_price_df)
-    menu_objects = _create_menu_objects(menu_nutri_df, ingredient_dict, menu_categories)
+    return _create_menu_objects(menu_nutri_df, ingredient_dict, menu_categories)
 
+def build_diet_from_dataframe(diet_df: pd.DataFrame, menu_objects: Dict[str, Menu]) -> Diet:
+    """Day/MealType/Menus 형식의 식단 DataFrame을 이미 로드된 메뉴 객체로 Diet 구성"""
     available_menu_names = list(menu_objects.keys())
     meals = []
     for _, row in diet_df.iterrows():
@@ -188,13 +193,13 @@ def load_and_process_data(diet_db_path: str, menu_db_path: str, ingre_db_path: s
 
     return Diet(meals)
 
+def load_and_process_data(diet_db_path: str, menu_db_path: str, ingre_db_path: str) -> Diet:
+    diet_df = pd.read_excel(diet_db_path)
+    menu_objects = load_menu_objects(menu_db_path, ingre_db_path)
+    return build_diet_from_dataframe(diet_df, menu_objects)
+
 def load_all_menus(menu_db_path: str, ingre_db_path: str) -> List[Menu]:
-    menu_ingre_df, menu_nutri_df, menu_cat_df, ingre_price_df = _load_excel_files(menu_db_path, ingre_db_path)
-    
-    menu_categories = dict(zip(menu_cat_df['Menu'], menu_cat_df['Category']))
-    ingredient_dict = _create_ingredient_dict(menu_ingre_df, ingre_price_df)
-    menu_objects = _create_menu_objects(menu_nutri_df, ingredient_dict, menu_categories)
-    
+    menu_objects = load_menu_objects(menu_db_path, ingre_db_path)
     return list(menu_objects.values())
 
 def create_nutrient_constraints() -> NutrientConstraints:
@@ -0,0 +1,316 @@
+import math
+import numpy as np
+import scipy.sparse as sp
+from collections import Counter, defaultdict
+from typing import List, Dict, Tuple
+from Diet_class import Diet, Meal, Menu, NutrientConstraints, get_servings
+from evaluation_function import calculate_harmony_matrix, calculate_cost_bounds
+from nutrient_matrix import NutrientMatrix, get_nutrient_matrix
+
+class DeltaTables:
+    """증분 평가에 필요한 diet_db 파생 테이블 (조화 행렬, 비용 상/하한, 영양 제약 배열)"""
+
+    def __init__(self, diet_db: Diet, nutrient_constraints: NutrientConstraints, harmony_data=None, cost_bounds=None,
+                 servings: int = None, n_days: int = 7, nutrient_matrix: NutrientMatrix = None):
+        if harmony_data is None:
+            harmony_matrix, _, _, menu_to_index = calculate_harmony_matrix(diet_db)
+        else:
+            harmony_matrix, menu_to_index = harmony_data
+        # 희소(CSR) 그대로 보관 — 이동 평가는 대각/한 칸/한 행만 읽으므로 밀집 N×N 행렬이 필요 없음
+        self.harmony_matrix = sp.csr_matrix(harmony_matrix, dtype=float)
+        self.harmony_matrix.sort_indices()
+        self.harmony_diagonal = self.harmony_matrix.diagonal()
+        self.menu_to_index = menu_to_index
+        self.max_harmony = float(self.harmony_matrix.max()) if self.harmony_matrix.nnz else 0.0
+        self.servings = servings if servings is not None else get_servings()
+        self.cost_bounds = cost_bounds if cost_bounds is not None else calculate_cost_bounds(diet_db, self.servings, n_days)
+        self.nutrients = list(nutrient_constraints.min_values.keys())
+        self.min_values = np.array([nutrient_constraints.min_values[n] for n in self.nutrients], dtype=float)
+        self.max_values = np.array([nutrient_constraints.max_values[n] for n in self.nutrients], dtype=float)
+        self.weights = np.array([nutrient_constraints.weights[n] for n in self.nutrients], dtype=float)
+        # evaluate_nutrition 과 같은 값을 쓰도록 엔진 소유 영양 행렬(없으면 기본 행렬) 사용
+        self.nutrient_matrix = nutrient_matrix if nutrient_matrix is not None else get_nutrient_matrix()
+
+    def harmony(self, i: int, j: int) -> float:
+        """H[i, j] — CSR 행 안에서 이진 탐색"""
+        h = self.harmony_matrix
+        start, end = h.indptr[i], h.indptr[i + 1]
+        k = start + int(np.searchsorted(h.indices[start:end], j))
+        return float(h.data[k]) if k < end and h.indices[k] == j else 0.0
+
+    def add_harmony_row(self, vector: np.ndarray, i: int, sign: float):
+        """vector += sign * H[i, :] (대칭이므로 열 i 와 같음)"""
+        h = self.harmony_matrix
+        start, end = h.indptr[i], h.indptr[i + 1]
+        vector[h.indices[start:end]] += sign * h.data[start:end]
+
+    def nutrient_vector(self, menu: Menu) -> np.ndarray:
+        return self.nutrient_matrix.vector(menu, self.nutrients).astype(float)
+
+class DietState:
+    """
+    식단 하나의 증분 평가 상태
+
+    일별 영양 합계, 식재료별 총량, 메뉴별 등장 횟수와 (조화 행렬 × 등장 횟수) 벡터를 보관해
+    메뉴 교체/배식 비율 조정 한 번의 목적함수 변화를 전체 식단 재평가 없이 계산한다.
+    """
+
+    def __init__(self, diet: Diet, tables: DeltaTables):
+        self.tables = tables
+        self.meals = [list(meal.menus) for meal in diet.meals]
+        self.dates = [meal.date for meal in diet.meals]
+        self.meal_types = [meal.meal_type for meal in diet.meals]
+        self.days = len(self.meals) // 3
+
+        # 영양: 일별 합계와 일별 점수
+        self.day_totals = np.zeros((max(self.days, 1), len(tables.nutrients)))
+        for m, menus in enumerate(self.meals[:self.days * 3]):
+            for menu in menus:
+                self.day_totals[m // 3] += tables.nutrient_vector(menu) * menu.serving_ratio
+        self.day_scores = np.array([self._day_score(totals) for totals in self.day_totals[:self.days]])
+        self.week_totals = self.day_totals[:self.days].sum(axis=0) if self.days else np.zeros(len(tables.nutrients))
+        for menus in self.meals[self.days * 3:]:
+            for menu in menus:
+                self.week_totals += tables.nutrient_vector(menu) * menu.serving_ratio
+
+        # 비용: 식재료별 필요량과 포장 정보
+        self.ingredient_totals = defaultdict(float)
+        self.package_info = {}
+        for menus in self.meals:
+            for menu in menus:
+                self._add_ingredients(self.ingredient_totals, menu, menu.serving_ratio)
+        self.total_cost = sum(self._ingredient_cost(name, amount) for name, amount in self.ingredient_totals.items())
+
+        # 조화: 알려진 메뉴 등장 횟수 c, H·c, 쌍 합계
+        names = [menu.name for menus in self.meals for menu in menus]
+        self.name_counts = Counter(names)
+        self.total_menus = len(names)
+        self.sum_sq = sum(count * count for count in self.name_counts.values())
+        counts = np.zeros(len(tables.menu_to_index))
+        for name in names:
+            idx = tables.menu_to_index.get(name)
+            if idx is not None:
+                counts[idx] += 1
+        self.known = int(counts.sum())
+        self.hc = tables.harmony_matrix @ counts
+        self.pair_sum = float((counts @ self.hc - np.dot(counts, tables.harmony_diagonal)) / 2) if len(counts) else 0.0
+
+        self.fitness = self._objectives(self.day_scores.sum(), self.total_cost, self.pair_sum, self.known, self.sum_sq)
+
+    # --- 개별 목적함수 ---
+    def _day_score(self, totals: np.ndarray) -> float:
+        tables = self.tables
+        max_penalty = 100 / len(totals)
+        clamped = np.clip(totals, tables.min_values, tables.max_values)
+        penalties = np.minimum(max_penalty, np.abs((totals - clamped) / clamped) * tables.weights * max_penalty)
+        return max(0.0, 100 - penalties.sum())
+
+    def _add_ingredients(self, totals, menu: Menu, ratio: float, sign: float = 1.0):
+        servings = self.tables.servings
+        for ing in menu.ingredients:
+            totals[ing.name] += sign * ing.amount_g * ratio * servings
+            if ing.name not in self.package_info:
+                self.package_info[ing.name] = (ing.package_size, ing.package_size * ing.price_per_g)
+
+    def _ingredient_cost(self, name: str, amount: float) -> float:
+        package_size, package_price = self.package_info[name]
+        return math.ceil(round(amount, 9) / package_size) * package_price if amount > 1e-9 else 0.0
+
+    def _objectives(self, day_score_sum, total_cost, pair_sum, known, sum_sq) -> Tuple[float, float, float, float]:
+        nutrition = max(0.0, min(100.0, day_score_sum / self.days)) if self.days else 0.0
+        min_cost, max_cost = self.tables.cost_bounds
+        if total_cost <= min_cost:
+            cost = 100.0
+        elif total_cost >= max_cost:
+            cost = 0.0
+        else:
+            cost = (1 - (total_cost - min_cost) / (max_cost - min_cost)) * 100
+        total_pairs = known * (known - 1) / 2
+        if total_pairs == 0 or self.tables.max_harmony <= 0:
+            harmony = 0.0
+        else:
+            harmony = pair_sum / total_pairs / self.tables.max_harmony * 100
+        diversity = (1 - sum_sq / self.total_menus ** 2) * 100 if self.total_menus else 0.0
+        return (nutrition, max(0.0, min(100.0, cost)), harmony, diversity)
+
+    # --- 이동 평가 ---
+    def _nutrition_change(self, meal_idx: int, delta: np.ndarray):
+        week_totals = self.week_totals + delta
+        if meal_idx >= self.days * 3:
+            return self.day_scores.sum(), None, week_totals
+        day = meal_idx // 3
+        new_day_score = self._day_score(self.day_totals[day] + delta)
+        return self.day_scores.sum() - self.day_scores[day] + new_day_score, new_day_score, week_totals
+
+    def _cost_change(self, old_menu: Menu, old_ratio: float, new_menu: Menu, new_ratio: float) -> Tuple[float, Dict[str, float]]:
+        changes = defaultdict(float)
+        self._add_ingredients(changes, old_menu, old_ratio, -1.0)
+        self._add_ingredients(changes, new_menu, new_ratio, 1.0)
+        total_cost = self.total_cost
+        for name, change in changes.items():
+            before = self.ingredient_totals.get(name, 0.0)
+            total_cost += self._ingredient_cost(name, before + change) - self._ingredient_cost(name, before)
+        return total_cost, changes
+
+    def evaluate_move(self, meal_idx: int, slot: int, new_menu: Menu, new_ratio: float):
+        """meal_idx 끼니 slot 번째 메뉴를 (new_menu, new_ratio) 로 바꿨을 때의 적합도와 적용에 필요한 정보"""
+        tables = self.tables
+        old_menu = self.meals[meal_idx][slot]
+        nutrient_delta = tables.nutrient_vector(new_menu) * new_ratio - tables.nutrient_vector(old_menu) * old_menu.serving_ratio
+        day_score_sum, new_day_score, week_totals = self._nutrition_change(meal_idx, nutrient_delta)
+        total_cost, ingredient_changes = self._cost_change(old_menu, old_menu.serving_ratio, new_menu, new_ratio)
+
+        pair_sum, known, sum_sq = self.pair_sum, self.known, self.sum_sq
+        if new_menu.name != old_menu.name:
+            a = tables.menu_to_index.get(old_menu.name)
+            b = tables.menu_to_index.get(new_menu.name)
+            if a is not None:
+                pair_sum -= self.hc[a] - tables.harmony_diagonal[a]
+                known -= 1
+            if b is not None:
+                pair_sum += self.hc[b] - (tables.harmony(b, a) if a is not None else 0.0)
+                known += 1
+            count_a = self.name_counts[old_menu.name]
+            count_b = self.name_counts.get(new_menu.name, 0)
+            sum_sq += (2 * count_b + 1) - (2 * count_a - 1)
+
+        fitness = self._objectives(day_score_sum, total_cost, pair_sum, known, sum_sq)
+        move = (meal_idx, slot, new_menu, new_ratio, nutrient_delta, new_day_score, week_totals,
+                total_cost, ingredient_changes, pair_sum, known, sum_sq)
+        return fitness, move
+
+    def is_feasible(self, week_totals: np.ndarray = None) -> bool:
+        """주간 일평균 영양소가 제약 범위 안인지 (validate_weekly_constraints 와 같은 기준)"""
+        if week_totals is None:
+            week_totals = self.week_totals
+        if not self.days:
+            return False
+        daily = week_totals / self.days
+        return bool(np.all(daily >= self.tables.min_values) and np.all(daily <= self.tables.max_values))
+
+    def apply(self, move, fitness):
+        (meal_idx, slot, new_menu, new_ratio, nutrient_delta, new_day_score, week_totals,
+         total_cost, ingredient_changes, pair_sum, known, sum_sq) = move
+        tables = self.tables
+        old_menu = self.meals[meal_idx][slot]
+        if new_day_score is not None:
+            day = meal_idx // 3
+            self.day_totals[day] += nutrient_delta
+            self.day_scores[day] = new_day_score
+        self.week_totals = week_totals
+        for name, change in ingredient_changes.items():
+            self.ingredient_totals[name] += change
+        self.total_cost = total_cost
+        if new_menu.name != old_menu.name:
+            a = tables.menu_to_index.get(old_menu.name)
+            b = tables.menu_to_index.get(new_menu.name)
+            if a is not None:
+                tables.add_harmony_row(self.hc, a, -1.0)
+            if b is not None:
+                tables.add_harmony_row(self.hc, b, 1.0)
+            self.name_counts[old_menu.name] -= 1
+            if self.name_counts[old_menu.name] == 0:
+                del self.name_counts[old_menu.name]
+            self.name_counts[new_menu.name] += 1
+        self.pair_sum, self.known, self.sum_sq = pair_sum, known, sum_sq
+        self.meals[meal_idx][slot] = new_menu.with_ratio(new_ratio)
+        self.fitness = fitness
+
+    def to_diet(self) -> Diet:
+        return Diet([Meal(list(menus), date, meal_type) for menus, date, meal_type in zip(self.meals, self.dates, self.meal_types)])
+
+class MemeticLocalSearch:
+    """
+    세대마다 상위 top_k 개 해에 적용하는 지역 탐색
+
+    같은 카테고리 메뉴 교체와 배식 비율 미세 조정을 무작위 순서로 시도해, 개선되는 첫 이동을 바로 받아들인다 (first-improvement).
+    개선 여부는 해마다 무작위로 정한 목적함수 가중합으로 판단하고, 영양 제약을 만족하던 해가 위반하게 되는 이동은 받지 않는다.
+    모든 이동은 DietState 의 증분 평가로만 점수를 매긴다.
+    """
+
+    def __init__(self, all_menus: List[Menu], nutrient_constraints: NutrientConstraints, top_k: int = 10,
+                 max_moves: int = 200, max_accepted: int = 20, ratio_step: float = 0.05,
+                 min_ratio: float = 0.6, max_ratio: float = 1.0):
+        self.nutrient_constraints = nutrient_constraints
+        self.top_k = top_k
+        self.max_moves = max_moves
+        self.max_accepted = max_accepted
+        self.ratio_step = ratio_step
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+        self.menus_by_category: Dict[str, List[Menu]] = defaultdict(list)
+        for menu in all_menus:
+            self.menus_by_category[menu.category].append(menu)
+        self._tables = None
+        self._tables_key = None
+        self.n_moves = 0
+        self.n_accepted = 0
+
+    def tables_for(self, diet_db: Diet, engine=None, n_days: int = 7) -> DeltaTables:
+        servings = engine.current_servings if engine is not None else get_servings()
+        key = (id(diet_db), servings, n_days)
+        if self._tables_key != key:
+            if engine is not None and diet_db is engine.diet_db:
+                harmony_data = (engine.tables.harmony_matrix, engine.tables.menu_to_index)
+                self._tables = DeltaTables(diet_db, self.nutrient_constraints, harmony_data,
+                                           engine.tables.cost_bounds(servings, n_days), servings, n_days,
+                                           engine.tables.nutrient_matrix)
+            else:
+                self._tables = DeltaTables(diet_db, self.nutrient_constraints, n_days=n_days)
+            self._tables_key = key
+        return self._tables
+
+    def _random_move(self, state: DietState):
+        meal_idx = np.random.randint(len(state.meals))
+        if not state.meals[meal_idx]:
+            return None
+        slot = np.random.randint(len(state.meals[meal_idx]))
+        menu = state.meals[meal_idx][slot]
+        if np.random.random() < 0.5:
+            candidates = self.menus_by_category.get(menu.category)
+            if not candidates:
+                return None
+            new_menu = candidates[np.random.randint(len(candidates))]
+            if new_menu.name == menu.name:
+                return None
+            return meal_idx, slot, new_menu, menu.serving_ratio
+        new_ratio = float(np.clip(menu.serving_ratio + np.random.choice([-1, 1]) * self.ratio_step, self.min_ratio, self.max_ratio))
+        if new_ratio == menu.serving_ratio:
+            return None
+        return meal_idx, slot, menu, new_ratio
+
+    def improve(self, diet: Diet, tables: DeltaTables) -> Tuple[Diet, Tuple[float, ...], int]:
+        """식단 하나에 지역 탐색 적용 → (개선된 식단, 증분 평가 적합도, 받아들인 이동 수)"""
+        state = DietState(diet, tables)
+        weights = np.random.dirichlet(np.ones(4))
+        feasible = state.is_feasible()
+        accepted = 0
+        for _ in range(self.max_moves):
+            move = self._random_move(state)
+            if move is None:
+                continue
+            self.n_moves += 1
+            fitness, applied = state.evaluate_move(*move)
+            if np.dot(weights, fitness) <= np.dot(weights, state.fitness) + 1e-9:
+                continue
+            if feasible and not state.is_feasible(applied[6]):
+                continue
+            state.apply(applied, fitness)
+            feasible = feasible or state.is_feasible()
+            accepted += 1
+            if accepted >= self.max_accepted:
+                break
+        self.n_accepted += accepted
+        return state.to_diet(), state.fitness, accepted
+
+    def select_top_k(self, fitnesses: np.ndarray, non_dominated_mask) -> List[int]:
+        """비지배 해 우선, 부족하면 목적함수 합이 큰 순서로 top_k 개 인덱스"""
+        fitnesses = np.asarray(fitnesses, dtype=float)
+        if len(fitnesses) == 0:
+            return []
+        front = np.flatnonzero(non_dominated_mask(fitnesses))
+        if len(front) >= self.top_k:
+            return np.random.choice(front, self.top_k, replace=False).tolist()
+        rest = np.setdiff1d(np.arange(len(fitnesses)), front)
+        rest = rest[np.argsort(-fitnesses[rest].sum(axis=1))]
+        return front.tolist() + rest[:self.top_k - len(front)].tolist()
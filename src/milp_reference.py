@@ -0,0 +1,359 @@
+import numpy as np
+import scipy.sparse as sp
+from concurrent.futures import ProcessPoolExecutor
+from scipy.optimize import milp, LinearConstraint, Bounds
+from typing import List, Dict, Tuple
+from Diet_class import Diet, Meal, Menu, NutrientConstraints, get_servings
+from evaluation_function import (calculate_harmony_matrix, calculate_cost_bounds, evaluate_nutrition, evaluate_cost,
+                                 evaluate_harmony, evaluate_diversity)
+
+OBJECTIVE_NAMES = ['nutrition', 'cost', 'harmony', 'diversity']
+
+class MILPProblem:
+    """
+    주간 메뉴 선택 MILP (초기 식단의 끼니/카테고리 슬롯 구조 유지)
+
+    변수: x[슬롯, 후보 메뉴, 배식 비율 단계] (0/1), 일별 영양 부족/초과량, 메뉴별 등장 횟수 제곱 상한 q
+    목적함수 4개는 모두 변수에 대한 아핀식 (objective_coefs @ z + objective_consts) 으로 표현된다.
+    - 영양: 일별 부족/초과량에 대한 선형 벌점 (평가 함수의 영양소별 벌점 상한은 무시)
+    - 비용: 포장 단위 올림 없이 g 당 가격으로 선형화
+    - 조화: 기준 식단 등장 횟수 c0 근처의 1차 근사
+    - 다양성: 정수 n 에서 n² 과 일치하는 할선들로 Σ n² 을 정확히 표현
+    """
+
+    def __init__(self, template: Diet, slot_candidates: List[List[Menu]], ratio_levels: Tuple[float, ...],
+                 columns: List[Tuple[int, int, int]], n_x: int, A: sp.csr_matrix, lb: np.ndarray, ub: np.ndarray,
+                 integrality: np.ndarray, bounds: Bounds, objective_coefs: np.ndarray, objective_consts: np.ndarray):
+        self.template = template
+        self.slot_candidates = slot_candidates
+        self.ratio_levels = ratio_levels
+        self.columns = columns  # x 변수 → (슬롯, 후보 번호, 비율 단계)
+        self.n_x = n_x
+        self.A = A
+        self.lb = lb
+        self.ub = ub
+        self.integrality = integrality
+        self.bounds = bounds
+        self.objective_coefs = objective_coefs
+        self.objective_consts = objective_consts
+
+    def decode(self, z: np.ndarray) -> Diet:
+        chosen = {}
+        for column in np.flatnonzero(z[:self.n_x] > 0.5):
+            slot, candidate, level = self.columns[column]
+            chosen[slot] = (self.slot_candidates[slot][candidate], self.ratio_levels[level])
+        meals = []
+        slot = 0
+        for meal in self.template.meals:
+            menus = []
+            for _ in meal.menus:
+                menu, ratio = chosen[slot]
+                menus.append(menu.with_ratio(ratio))
+                slot += 1
+            meals.append(Meal(menus, meal.date, meal.meal_type))
+        return Diet(meals)
+
+    def objective_values(self, z: np.ndarray) -> np.ndarray:
+        return self.objective_coefs @ z + self.objective_consts
+
+def _solve_scalarization(problem: MILPProblem, scalarization: Dict, time_limit_s: float, mip_rel_gap: float) -> Dict:
+    """워커 프로세스: 가중합 또는 ε-제약 스칼라화 하나를 풀기"""
+    constraints = [LinearConstraint(problem.A, problem.lb, problem.ub)]
+    if scalarization['type'] == 'weighted':
+        c = -np.asarray(scalarization['weights']) @ problem.objective_coefs
+    else:
+        c = -problem.objective_coefs[scalarization['objective']]
+        for objective, epsilon in scalarization['epsilons'].items():
+            # f_o(z) >= ε  →  coef_o @ z >= ε - const_o
+            constraints.append(LinearConstraint(problem.objective_coefs[objective][None, :],
+                                                epsilon - problem.objective_consts[objective], np.inf))
+    result = milp(c, integrality=problem.integrality, bounds=problem.bounds, constraints=constraints,
+                  options={'time_limit': time_limit_s, 'mip_rel_gap': mip_rel_gap})
+    if result.x is None:
+        return {'scalarization': scalarization, 'status': result.status, 'message': result.message, 'x': None}
+    return {'scalarization': scalarization, 'status': result.status, 'message': result.message, 'x': result.x}
+
+class MILPReferenceSolver:
+    """
+    scipy.optimize.milp 로 가중합 / ε-제약 스칼라화 문제들을 병렬로 풀어 기준(reference) 파레토 프론트를 만든다
+
+    MILP 목적함수는 근사이므로, 얻은 식단은 실제 평가 함수로 다시 평가한 뒤 비지배 해만 프론트로 사용한다.
+    time_limit_s 안에 최적성이 증명되지 않으면 그때까지의 최선 해(incumbent)를 사용한다.
+    incumbent 도 없이 시간 제한에 걸린 문제는 제한을 retry_time_factor 배로 늘려 한 번 더 풀고,
+    그래도 해가 없는 스칼라화는 dropped_scalarizations 에 남기고 개수를 출력한다.
+    """
+
+    def __init__(self, diet_db: Diet, all_menus: List[Menu], nutrient_constraints: NutrientConstraints,
+                 ratio_levels: Tuple[float, ...] = (0.6, 0.7, 0.8, 0.9, 1.0), max_candidates_per_category: int = 20,
+                 time_limit_s: float = 60.0, mip_rel_gap: float = 1e-3, retry_time_factor: float = 4.0):
+        self.diet_db = diet_db
+        self.all_menus = all_menus
+        self.nutrient_constraints = nutrient_constraints
+        self.ratio_levels = tuple(ratio_levels)
+        self.max_candidates_per_category = max_candidates_per_category
+        self.time_limit_s = time_limit_s
+        self.mip_rel_gap = mip_rel_gap
+        self.retry_time_factor = retry_time_factor
+        self.dropped_scalarizations: List[Dict] = []  # 마지막 reference_front 에서 해를 찾지 못한 스칼라화
+        harmony_matrix, _, _, self.menu_to_index = calculate_harmony_matrix(diet_db)
+        self.harmony_matrix = harmony_matrix.astype(float)  # CSR (H·c 와 대각만 쓰므로 밀집 행렬 불필요)
+        self.servings = get_servings()
+        self._cost_bounds: Dict[int, Tuple[float, float]] = {}
+
+    def cost_bounds(self, n_days: int = 7) -> Tuple[float, float]:
+        """기간(일)별 비용 정규화 기준"""
+        if n_days not in self._cost_bounds:
+            self._cost_bounds[n_days] = calculate_cost_bounds(self.diet_db, self.servings, n_days)
+        return self._cost_bounds[n_days]
+
+    # --- 정확한 평가 ---
+    def evaluate(self, diet: Diet) -> List[float]:
+        return [
+            float(evaluate_nutrition(diet, self.nutrient_constraints)),
+            float(evaluate_cost(self.diet_db, diet, self.cost_bounds(max(diet.n_days, 1)))),
+            float(evaluate_harmony(self.diet_db, diet, (self.harmony_matrix, self.menu_to_index))),
+            float(evaluate_diversity(diet)),
+        ]
+
+    # --- 문제 구성 ---
+    def _menu_cost(self, menu: Menu) -> float:
+        """배식 비율 1.0 기준 1회 제공 비용 (포장 단위 올림 없음)"""
+        return sum(ing.amount_g * ing.price_per_g for ing in menu.ingredients) * self.servings
+
+    def _select_candidates(self, template: Diet, harmony_gradient: Dict[str, float]) -> Dict[str, List[Menu]]:
+        """카테고리별 후보 메뉴: 기준 식단 메뉴 + 조화 기울기 상위 + 저비용 상위"""
+        by_category: Dict[str, Dict[str, Menu]] = {}
+        for menu in self.all_menus:
+            by_category.setdefault(menu.category, {})[menu.name] = menu
+        candidates = {}
+        for meal in template.meals:
+            for menu in meal.menus:
+                candidates.setdefault(menu.category, {})[menu.name] = menu
+        half = max(self.max_candidates_per_category // 2, 1)
+        for category, chosen in candidates.items():
+            pool = list(by_category.get(category, {}).values())
+            by_harmony = sorted(pool, key=lambda menu: -harmony_gradient.get(menu.name, 0.0))[:half]
+            by_cost = sorted(pool, key=self._menu_cost)[:half]
+            for menu in by_harmony + by_cost:
+                if len(chosen) >= self.max_candidates_per_category:
+                    break
+                chosen.setdefault(menu.name, menu)
+        return {category: list(chosen.values()) for category, chosen in candidates.items()}
+
+    def build(self, template: Diet) -> MILPProblem:
+        nutrients = list(self.nutrient_constraints.min_values.keys())
+        min_values = np.array([self.nutrient_constraints.min_values[n] for n in nutrients], dtype=float)
+        max_values = np.array([self.nutrient_constraints.max_values[n] for n in nutrients], dtype=float)
+        weights = np.array([self.nutrient_constraints.weights[n] for n in nutrients], dtype=float)
+        n_nutrients = len(nutrients)
+        days = len(template.meals) // 3
+        slots = [(meal_idx, menu) for meal_idx, meal in enumerate(template.meals) for menu in meal.menus]
+        n_slots = len(slots)
+
+        # 기준 식단 등장 횟수 c0 에서의 조화 기울기 (H c0 - diag/2)
+        counts0 = np.zeros(len(self.menu_to_index))
+        for _, menu in slots:
+            if menu.name in self.menu_to_index:
+                counts0[self.menu_to_index[menu.name]] += 1
+        hc0 = self.harmony_matrix @ counts0
+        diagonal = self.harmony_matrix.diagonal()
+        gradient = hc0 - diagonal / 2
+        pair0 = float((counts0 @ hc0 - counts0 @ diagonal) / 2)
+        harmony_gradient = {name: gradient[idx] for name, idx in self.menu_to_index.items()}
+
+        candidates_by_category = self._select_candidates(template, harmony_gradient)
+        slot_candidates = [candidates_by_category[menu.category] for _, menu in slots]
+        distinct_menus = sorted({menu.name for candidates in slot_candidates for menu in candidates})
+        menu_column = {name: i for i, name in enumerate(distinct_menus)}
+
+        # x 변수 열 구성
+        columns = []
+        for slot, candidates in enumerate(slot_candidates):
+            for candidate in range(len(candidates)):
+                for level in range(len(self.ratio_levels)):
+                    columns.append((slot, candidate, level))
+        n_x = len(columns)
+        n_dev = days * n_nutrients
+        n_q = len(distinct_menus)
+        under_start, over_start, q_start = n_x, n_x + n_dev, n_x + 2 * n_dev
+        n_vars = q_start + n_q
+
+        nutrient_values = np.zeros((n_nutrients, n_x))
+        slot_rows, slot_cols = [], []
+        menu_rows, menu_cols = [], []
+        cost_coefs = np.zeros(n_vars)
+        harmony_coefs = np.zeros(n_vars)
+        day_of_column = np.empty(n_x, dtype=int)
+        for column, (slot, candidate, level) in enumerate(columns):
+            menu = slot_candidates[slot][candidate]
+            ratio = self.ratio_levels[level]
+            nutrient_values[:, column] = [menu.nutrients.get(n, 0.0) * ratio for n in nutrients]
+            slot_rows.append(slot)
+            slot_cols.append(column)
+            menu_rows.append(menu_column[menu.name])
+            menu_cols.append(column)
+            cost_coefs[column] = self._menu_cost(menu) * ratio
+            if menu.name in self.menu_to_index:
+                harmony_coefs[column] = gradient[self.menu_to_index[menu.name]]
+            day_of_column[column] = slots[slot][0] // 3
+
+        rows, lbs, ubs = [], [], []
+        # 1) 슬롯마다 (메뉴, 비율) 하나
+        rows.append(sp.csr_matrix((np.ones(n_x), (slot_rows, slot_cols)), shape=(n_slots, n_vars)))
+        lbs.append(np.ones(n_slots))
+        ubs.append(np.ones(n_slots))
+        # 2) 주간 일평균 영양소 범위 (validate_weekly_constraints 와 같은 기준)
+        weekly = sp.hstack([sp.csr_matrix(nutrient_values / days), sp.csr_matrix((n_nutrients, n_vars - n_x))])
+        rows.append(weekly.tocsr())
+        lbs.append(min_values)
+        ubs.append(max_values)
+        # 3) 일별 부족/초과량: D + under >= L,  D - over <= U
+        for day in range(days):
+            day_values = np.where((day_of_column == day)[None, :], nutrient_values, 0.0)
+            under = sp.csr_matrix((np.ones(n_nutrients), (np.arange(n_nutrients), under_start + day * n_nutrients + np.arange(n_nutrients))), shape=(n_nutrients, n_vars))
+            over = sp.csr_matrix((np.ones(n_nutrients), (np.arange(n_nutrients), over_start + day * n_nutrients + np.arange(n_nutrients))), shape=(n_nutrients, n_vars))
+            day_matrix = sp.hstack([sp.csr_matrix(day_values), sp.csr_matrix((n_nutrients, n_vars - n_x))]).tocsr()
+            rows.append(day_matrix + under)
+            lbs.append(min_values)
+            ubs.append(np.full(n_nutrients, np.inf))
+            rows.append(day_matrix - over)
+            lbs.append(np.full(n_nutrients, -np.inf))
+            ubs.append(max_values)
+        # 4) 다양성: q_j >= (2t+1) n_j - t(t+1)  (정수 n 에서 q_j = n_j²)
+        menu_counts = sp.csr_matrix((np.ones(n_x), (menu_rows, menu_cols)), shape=(n_q, n_vars))
+        q_identity = sp.csr_matrix((np.ones(n_q), (np.arange(n_q), q_start + np.arange(n_q))), shape=(n_q, n_vars))
+        max_count = max(sum(1 for candidates in slot_candidates if any(m.name == name for m in candidates)) for name in distinct_menus)
+        for t in range(max_count):
+            rows.append((2 * t + 1) * menu_counts - q_identity)
+            lbs.append(np.full(n_q, -np.inf))
+            ubs.append(np.full(n_q, t * (t + 1)))
+
+        A = sp.vstack(rows).tocsr()
+        lb = np.concatenate(lbs)
+        ub = np.concatenate(ubs)
+        integrality = np.zeros(n_vars)
+        integrality[:n_x] = 1
+        upper = np.full(n_vars, np.inf)
+        upper[:n_x] = 1
+        bounds = Bounds(np.zeros(n_vars), upper)
+
+        # 목적함수 (최대화 기준 아핀식)
+        objective_coefs = np.zeros((4, n_vars))
+        objective_consts = np.zeros(4)
+        max_penalty = 100 / n_nutrients
+        objective_coefs[0, under_start:over_start] = -np.tile(weights * max_penalty / min_values, days) / days
+        objective_coefs[0, over_start:q_start] = -np.tile(weights * max_penalty / max_values, days) / days
+        objective_consts[0] = 100
+        min_cost, max_cost = self.cost_bounds(max(days, 1))
+        objective_coefs[1] = -100 * cost_coefs / (max_cost - min_cost)
+        objective_consts[1] = 100 * (1 + min_cost / (max_cost - min_cost))
+        total_pairs = n_slots * (n_slots - 1) / 2
+        max_harmony = self.harmony_matrix.max()
+        harmony_scale = 100 / (total_pairs * max_harmony) if total_pairs and max_harmony > 0 else 0.0
+        objective_coefs[2] = harmony_scale * harmony_coefs
+        objective_consts[2] = harmony_scale * (pair0 - gradient @ counts0)
+        objective_coefs[3, q_start:] = -100 / n_slots ** 2
+        objective_consts[3] = 100
+
+        return MILPProblem(template, slot_candidates, self.ratio_levels, columns, n_x, A, lb, ub, integrality,
+                           bounds, objective_coefs, objective_consts)
+
+    # --- 스칼라화 ---
+    @staticmethod
+    def weight_vectors(n_divisions: int = 3) -> List[np.ndarray]:
+        """4목적 단순체 격자 가중치 (각 성분이 1/n_divisions 의 배수)"""
+        vectors = []
+        for a in range(n_divisions + 1):
+            for b in range(n_divisions + 1 - a):
+                for c in range(n_divisions + 1 - a - b):
+                    d = n_divisions - a - b - c
+                    vectors.append(np.array([a, b, c, d], dtype=float) / n_divisions)
+        return vectors
+
+    def weighted_sum_scalarizations(self, n_divisions: int = 3) -> List[Dict]:
+        return [{'type': 'weighted', 'weights': weights} for weights in self.weight_vectors(n_divisions)]
+
+    def epsilon_scalarizations(self, problem: MILPProblem, anchor_points: np.ndarray, objective: int = 0,
+                               n_levels: int = 3) -> List[Dict]:
+        """objective 를 최대화하면서 나머지 목적 하나씩을 앵커 해들의 범위 안 ε 이상으로 강제"""
+        scalarizations = []
+        for other in range(len(OBJECTIVE_NAMES)):
+            if other == objective:
+                continue
+            low, high = anchor_points[:, other].min(), anchor_points[:, other].max()
+            if high - low < 1e-9:
+                continue
+            for epsilon in np.linspace(low, high, n_levels + 2)[1:-1]:
+                scalarizations.append({'type': 'epsilon', 'objective': objective, 'epsilons': {other: float(epsilon)}})
+        return scalarizations
+
+    def solve_batch(self, problem: MILPProblem, scalarizations: List[Dict], max_workers: int = None) -> List[Dict]:
+        """스칼라화 문제들을 프로세스 풀에서 병렬로 풀고 식단/적합도로 변환 (해를 찾지 못한 문제는 dropped_scalarizations 에 추가)"""
+        raw_results = self._solve_raw(problem, scalarizations, self.time_limit_s, max_workers)
+        # 시간 제한(status 1) 안에 incumbent 를 하나도 못 찾은 문제는 제한을 늘려 다시 풂
+        timed_out = [i for i, raw in enumerate(raw_results) if raw['x'] is None and raw['status'] == 1]
+        if timed_out and self.retry_time_factor > 1:
+            retry_limit = self.time_limit_s * self.retry_time_factor
+            print(f"MILP {len(timed_out)}개가 {self.time_limit_s:g}초 안에 해를 찾지 못해 {retry_limit:g}초로 다시 풉니다")
+            retried = self._solve_raw(problem, [scalarizations[i] for i in timed_out], retry_limit, max_workers)
+            for i, raw in zip(timed_out, retried):
+                raw_results[i] = raw
+
+        results = []
+        for raw in raw_results:
+            if raw['x'] is None:
+                print(f"MILP 실패 ({raw['scalarization']['type']}): {raw['message']}")
+                self.dropped_scalarizations.append({'scalarization': raw['scalarization'], 'status': raw['status'],
+                                                    'message': raw['message']})
+                continue
+            diet = problem.decode(raw['x'])
+            results.append({
+                'scalarization': raw['scalarization'],
+                'status': raw['status'],
+                'diet': diet,
+                'milp_objectives': problem.objective_values(raw['x']),
+                'fitness': np.array(self.evaluate(diet)),
+            })
+        return results
+
+    def _solve_raw(self, problem: MILPProblem, scalarizations: List[Dict], time_limit_s: float,
+                   max_workers: int = None) -> List[Dict]:
+        if not scalarizations:
+            return []
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_solve_scalarization, [problem] * len(scalarizations), scalarizations,
+                                     [time_limit_s] * len(scalarizations),
+                                     [self.mip_rel_gap] * len(scalarizations)))
+
+    def reference_front(self, template: Diet, n_divisions: int = 3, epsilon_levels: int = 3,
+                        max_workers: int = None) -> Tuple[List[Diet], np.ndarray]:
+        """가중합 스칼라화로 앵커 해를 구하고, 그 범위에서 ε-제약 문제를 추가로 푼 뒤 실제 평가 기준 비지배 해 반환"""
+        problem = self.build(template)
+        self.dropped_scalarizations = []
+        scalarizations = self.weighted_sum_scalarizations(n_divisions)
+        n_solved = len(scalarizations)
+        results = self.solve_batch(problem, scalarizations, max_workers)
+        if results and epsilon_levels > 0:
+            anchors = np.array([result['milp_objectives'] for result in results])
+            scalarizations = self.epsilon_scalarizations(problem, anchors, 0, epsilon_levels)
+            n_solved += len(scalarizations)
+            results += self.solve_batch(problem, scalarizations, max_workers)
+        if self.dropped_scalarizations:
+            n_timed_out = sum(1 for dropped in self.dropped_scalarizations if dropped['status'] == 1)
+            print(f"MILP 스칼라화 {n_solved}개 중 {len(self.dropped_scalarizations)}개 제외 "
+                  f"(시간 제한 {n_timed_out}개) — 기준 프론트가 불완전할 수 있습니다")
+        if not results:
+            return [], np.empty((0, len(OBJECTIVE_NAMES)))
+
+        fitnesses = np.array([result['fitness'] for result in results])
+        ge = np.all(fitnesses[:, None, :] >= fitnesses[None, :, :], axis=2)
+        gt = np.any(fitnesses[:, None, :] > fitnesses[None, :, :], axis=2)
+        mask = ~np.any(ge & gt, axis=0)
+        diets, front, seen = [], [], set()
+        for result, keep in zip(results, mask):
+            key = tuple(np.round(result['fitness'], 6))
+            if keep and key not in seen:
+                seen.add(key)
+                diets.append(result['diet'])
+                front.append(result['fitness'])
+        return diets, np.array(front)
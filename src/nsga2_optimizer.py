@@ -1,6 +1,6 @@
 from optimizer_base import DietOptimizer
 import numpy as np
-from typing import List, Tuple, Dict, Set
+from typing import List, Tuple, Dict, Set, Optional
 from Diet_class import Diet, Meal
 from functools import lru_cache
 from concurrent.futures import ThreadPoolExecutor
@@ -23,6 +23,7 @@ class NSGA2Optimizer(DietOptimizer):
         return self.fitness_cache[diet_hash]
 
     def _batch_process_fitness(self, population: List[Diet], diet_db: Diet) -> np.ndarray:
+        self._prefetch_fitness(population, diet_db)
         futures = []
         for i in range(0, len(population), self.batch_size):
             batch = population[i:i + self.batch_size]
@@ -137,15 +138,10 @@ class NSGA2Optimizer(DietOptimizer):
             offspring.extend([child1, child2])
         return offspring
 
-    def _create_initial_individual(self, base_diet):
-        mutated = self.mutate(base_diet)
-        for meal in mutated.meals:
-            for menu in meal.menus:
-                menu.serving_ratio = np.random.uniform(0.6, 0.9)
-        return mutated
-
-    def optimize(self, diet_db: Diet, initial_diet: Diet, generations: int = 100) -> List[Diet]:
+    def optimize(self, diet_db: Diet, initial_diet: Diet, generations: int = 100,
+                 time_limit_s: Optional[float] = None, max_evaluations: Optional[int] = None) -> List[Diet]:
         # 초기화
+        self._start_budget(time_limit_s, max_evaluations, diet_db)
         self.good_solutions_archive.clear()
         self.backup_solutions.clear()
         self.constraint_solutions.clear()
@@ -160,20 +156,19 @@ class NSGA2Optimizer(DietOptimizer):
         population.extend([f.result() for f in futures])
 
         initial_fitness = self._get_cached_fitness(initial_diet, diet_db)
-        best_fitness = float('-inf')
         patience = 10
-        no_improvement_count = 0
 
         for generation in range(generations):
             print(f"=== Generation {generation + 1}/{generations} ===")
+            population = self._receive_immigrants(population)
             fitnesses = self._batch_process_fitness(population, diet_db)
+
+            if self._on_generation(generation, generations, fitnesses, population):
+                print(f"Optimization stopped at generation {generation} ({self.stop_reason})")
+                return self._stopped_solutions(diet_db)
             
-            current_best = np.max(fitnesses[:, 0])
-            if current_best > best_fitness:
-                best_fitness = current_best
-                no_improvement_count = 0
-            else:
-                no_improvement_count += 1
+            # 첫 번째 목적함수만 보지 않고 전체 프론트의 하이퍼볼륨 정체 세대 수로 변이율 조정
+            no_improvement_count = min(self.convergence.stall_count, patience)
 
             # 종료 조건 확인
             if self.check_termination(initial_fitness, population, diet_db):
@@ -187,7 +182,7 @@ class NSGA2Optimizer(DietOptimizer):
                 batch = selected_population[i:i + self.batch_size]
                 offspring_batch = self._create_offspring_batch(batch, mutation_prob)
                 offspring_population.extend(offspring_batch)
-            population = selected_population + offspring_population[:self.population_size - len(selected_population)]
+            population = selected_population + self._screen_offspring(offspring_population, self.population_size - len(selected_population))
 
             if generation % 10 == 0:
                 if len(self.fitness_cache) > 1000:
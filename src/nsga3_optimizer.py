@@ -1,6 +1,6 @@
 from optimizer_base import DietOptimizer
 import numpy as np
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 from Diet_class import Diet, Meal
 from concurrent.futures import ThreadPoolExecutor
 import heapq
@@ -256,15 +256,10 @@ class NSGA3Optimizer(DietOptimizer):
 
         return [population[i] for i in selected]
 
-    def _create_initial_individual(self, base_diet):
-        mutated = self.mutate(base_diet)
-        for meal in mutated.meals:
-            for menu in meal.menus:
-                menu.serving_ratio = np.random.uniform(0.6, 0.9)
-        return mutated
-
-    def optimize(self, diet_db: Diet, initial_diet: Diet, generations: int = 100) -> List[Diet]:
+    def optimize(self, diet_db: Diet, initial_diet: Diet, generations: int = 100,
+                 time_limit_s: Optional[float] = None, max_evaluations: Optional[int] = None) -> List[Diet]:
         # 초기화
+        self._start_budget(time_limit_s, max_evaluations, diet_db)
         self.good_solutions_archive.clear()
         self.backup_solutions.clear()
         self.constraint_solutions.clear()
@@ -280,6 +275,8 @@ class NSGA3Optimizer(DietOptimizer):
 
         for generation in range(generations):
             print(f"=== Generation {generation + 1}/{generations} ===")
+            population = self._receive_immigrants(population)
+            self._prefetch_fitness(population, diet_db)
             fitnesses = []
             for i in range(0, len(population), self.batch_size):
                 batch = population[i:i + self.batch_size]
@@ -287,6 +284,10 @@ class NSGA3Optimizer(DietOptimizer):
                 fitnesses.extend([f.result() for f in batch_futures])
             fitnesses = np.array(fitnesses)
 
+            if self._on_generation(generation, generations, fitnesses, population):
+                print(f"Optimization stopped at generation {generation} ({self.stop_reason})")
+                return self._stopped_solutions(diet_db)
+
             # 종료 조건 체크 
             if self.check_termination(initial_fitness, population, diet_db):
                 print(f"Termination condition met at generation {generation}")
@@ -308,7 +309,7 @@ class NSGA3Optimizer(DietOptimizer):
                     
                 offspring.extend([child1, child2])
 
-            population = selected + offspring[:self.population_size - len(selected)]
+            population = selected + self._screen_offspring(offspring, self.population_size - len(selected))
 
             # 주기적 캐시 정리
             if generation % 10 == 0:
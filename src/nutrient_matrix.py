@@ -0,0 +1,145 @@
+import threading
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Iterable, Sequence, Tuple, Optional
+from Diet_class import Diet, Menu, MEALS_PER_DAY
+
+class NutrientMatrix:
+    """
+    메뉴 × 영양소 float32 행렬 (영양소 목록은 메뉴 DB 'nutrient' 시트의 열에서 결정)
+
+    식단의 메뉴 인덱스와 배식 비율만 모은 뒤 행렬 행을 한 번에 꺼내 합산하므로
+    영양소가 늘어도 행렬 폭만 넓어지고 메뉴 × 영양소 Python 반복은 생기지 않는다.
+    처음 보는 메뉴(MenuSpec)는 Menu.nutrients 로 자동 등록한다.
+    평가 엔진은 EvaluationTables.nutrient_matrix 로 자기 행렬을 가지며, 모듈 기본 행렬은 엔진 없이 부르는 평가 함수용이다.
+    """
+
+    def __init__(self, nutrients: Sequence[str] = ()):
+        self.nutrients: List[str] = list(nutrients)
+        self.nutrient_to_index: Dict[str, int] = {n: i for i, n in enumerate(self.nutrients)}
+        # 메뉴 이름이 아니라 MenuSpec.spec_id 로 행을 찾는다 — 같은 이름의 메뉴 데이터가 바뀌면 새 spec 이므로 새 행
+        self.spec_to_index: Dict[int, int] = {}
+        self._rows: List[np.ndarray] = []
+        self._values: Optional[np.ndarray] = None
+        self._selections: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_menus(cls, menus: Iterable[Menu], nutrients: Sequence[str] = ()) -> 'NutrientMatrix':
+        matrix = cls(nutrients)
+        for menu in menus:
+            matrix.register(menu)
+        return matrix
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def register(self, menu: Menu) -> int:
+        spec_id = menu.spec.spec_id
+        idx = self.spec_to_index.get(spec_id)
+        if idx is not None:
+            return idx
+        with self._lock:
+            if spec_id in self.spec_to_index:
+                return self.spec_to_index[spec_id]
+            for nutrient in menu.nutrients:
+                if nutrient not in self.nutrient_to_index:
+                    self.nutrient_to_index[nutrient] = len(self.nutrients)
+                    self.nutrients.append(nutrient)
+            row = np.zeros(len(self.nutrients), dtype=np.float32)
+            for nutrient, amount in menu.nutrients.items():
+                row[self.nutrient_to_index[nutrient]] = amount
+            idx = len(self._rows)
+            self._rows.append(row)
+            self._values = None
+            self._selections = {}
+            self.spec_to_index[spec_id] = idx
+            return idx
+
+    @property
+    def values(self) -> np.ndarray:
+        """(메뉴 수, 영양소 수) float32 — 등록 후 영양소가 늘었으면 앞선 행은 0으로 채움"""
+        with self._lock:
+            if self._values is None:
+                values = np.zeros((len(self._rows), len(self.nutrients)), dtype=np.float32)
+                for i, row in enumerate(self._rows):
+                    values[i, :len(row)] = row
+                self._values = values
+            return self._values
+
+    def select(self, nutrients: Sequence[str]) -> np.ndarray:
+        """주어진 영양소 열만 고른 (메뉴 수, len(nutrients)) 행렬 — 행렬에 없는 영양소는 0 열"""
+        key = tuple(nutrients)
+        selected = self._selections.get(key)
+        if selected is None:
+            with self._lock:
+                values = self.values
+                selected = np.zeros((values.shape[0], len(key)), dtype=np.float32)
+                for j, nutrient in enumerate(key):
+                    column = self.nutrient_to_index.get(nutrient)
+                    if column is not None:
+                        selected[:, j] = values[:, column]
+                self._selections[key] = selected
+        return selected
+
+    def vector(self, menu: Menu, nutrients: Sequence[str]) -> np.ndarray:
+        idx = self.register(menu)
+        return self.select(nutrients)[idx]
+
+    def encode(self, diet: Diet) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """식단 → (메뉴 인덱스, 배식 비율, 끼니 번호) 평탄 배열"""
+        ids, ratios, meal_idx = [], [], []
+        for m, meal in enumerate(diet.meals):
+            for menu in meal.menus:
+                ids.append(self.register(menu))
+                ratios.append(menu.serving_ratio)
+                meal_idx.append(m)
+        return np.array(ids, dtype=np.int64), np.array(ratios, dtype=float), np.array(meal_idx, dtype=np.int64)
+
+    def daily_totals(self, diet: Diet, nutrients: Sequence[str], days: int = None) -> np.ndarray:
+        """(일 수, 영양소 수) 일별 배식 비율 반영 합계 — days 일을 넘는 끼니는 제외"""
+        if days is None:
+            days = len(diet.meals) // MEALS_PER_DAY
+        ids, ratios, meal_idx = self.encode(diet)
+        day_idx = meal_idx // MEALS_PER_DAY
+        keep = day_idx < days
+        totals = np.zeros((days, len(nutrients)))
+        np.add.at(totals, day_idx[keep], self.select(nutrients)[ids[keep]] * ratios[keep, None])
+        return totals
+
+    def total(self, diet: Diet, nutrients: Sequence[str]) -> np.ndarray:
+        """식단 전체 배식 비율 반영 합계 (영양소 수,)"""
+        ids, ratios, _ = self.encode(diet)
+        return ratios @ self.select(nutrients)[ids].astype(float) if len(ids) else np.zeros(len(nutrients))
+
+_default_matrix: Optional[NutrientMatrix] = None
+_default_lock = threading.Lock()
+
+def get_nutrient_matrix() -> NutrientMatrix:
+    """엔진 없이 부르는 평가 함수가 쓰는 기본 영양 행렬 (빈 스키마로 시작해 메뉴를 spec 단위로 자동 등록)"""
+    global _default_matrix
+    if _default_matrix is None:
+        with _default_lock:
+            if _default_matrix is None:
+                _default_matrix = NutrientMatrix()
+    return _default_matrix
+
+NUMERIC_COLUMN_RATIO = 0.9  # 값이 있는 칸 중 이 비율 이상이 숫자여야 영양소 열로 봄
+
+def _is_id_column(column) -> bool:
+    name = str(column).strip().lower()
+    return name in ('id', 'no', 'no.', '번호', '코드') or name.endswith(('_id', ' id', '코드', '번호'))
+
+def nutrient_columns(menu_nutri_df: pd.DataFrame) -> List[str]:
+    """'nutrient' 시트에서 영양소로 쓸 열 — Menu 와 ID/코드 열(food_id 등)을 제외하고 값 대부분이 숫자인 열"""
+    columns = []
+    for column in menu_nutri_df.columns:
+        if column == 'Menu' or _is_id_column(column):
+            continue
+        values = menu_nutri_df[column].dropna()
+        if values.empty:
+            continue
+        numeric = pd.to_numeric(values, errors='coerce').notna()
+        if numeric.mean() >= NUMERIC_COLUMN_RATIO:
+            columns.append(column)
+    return columns
@@ -0,0 +1,153 @@
+import threading
+import time
+import traceback
+import uuid
+from typing import Callable, Dict, List, Optional
+from Diet_class import Diet
+from job_scheduler import FairJobScheduler, AdmissionError
+
+class OptimizationJob:
+    """백그라운드에서 실행되는 최적화 작업 1건의 상태"""
+
+    def __init__(self, job_id: str, owner: str, generations: int):
+        self.job_id = job_id
+        self.owner = owner
+        self.generations = generations
+        self.status = 'queued'  # queued → running → completed / cancelled / failed
+        self.progress = {'generation': 0, 'generations': generations, 'front_size': 0, 'best_scores': [],
+                         'elapsed_s': 0.0, 'time_limit_s': None, 'evaluations': 0}
+        self.result = None
+        self.error = None
+        self.context = {}  # 재연결 시 화면 복원에 필요한 호출자 데이터
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def update_progress(self, progress: Dict):
+        with self._lock:
+            self.progress = dict(progress)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ('completed', 'cancelled', 'failed')
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+    def snapshot(self) -> Dict:
+        """화면 표시용 상태 사본 (폴링 시 사용)"""
+        with self._lock:
+            return {
+                'job_id': self.job_id,
+                'owner': self.owner,
+                'status': self.status,
+                'progress': dict(self.progress),
+                'error': self.error,
+                'duration': self.duration,
+            }
+
+class JobManager:
+    """
+    최적화를 요청 스레드 밖(스케줄러 워커 스레드)에서 실행하고 작업 ID로 조회/취소/재연결을 지원
+
+    작업은 FairJobScheduler 를 거쳐 실행되므로 동시 실행 수가 제한되고 사용자 간 순서가 공정하게 돌아간다.
+    Streamlit 에서는 st.cache_resource 로 프로세스당 하나만 만들어 모든 세션이 공유한다.
+    """
+
+    def __init__(self, max_finished_jobs: int = 200, scheduler: FairJobScheduler = None):
+        self.max_finished_jobs = max_finished_jobs
+        self.scheduler = scheduler if scheduler is not None else FairJobScheduler()
+        self._jobs: Dict[str, OptimizationJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, optimizer, diet_db: Diet, initial_diet: Diet, generations: int, owner: str = '',
+               postprocess: Callable = None, context: Dict = None, time_limit_s: float = None) -> str:
+        """
+        최적화 작업 등록 후 작업 ID 반환
+
+        Args:
+            optimizer: DietOptimizer (작업마다 새 인스턴스 사용)
+            diet_db: 식단 DB
+            initial_diet: 초기 식단
+            generations: 세대 수
+            owner: 작업 소유자 (사용자명)
+            postprocess: optimize 결과(해 목록)를 받아 최종 결과로 변환하는 함수 (백그라운드에서 실행)
+            context: 작업과 함께 보관할 호출자 데이터
+            time_limit_s: 실행 시간 제한(초) — 시간이 다 되면 그때까지의 최선 해로 종료
+
+        Raises:
+            AdmissionError: 대기열 제한 초과
+        """
+        job = OptimizationJob(uuid.uuid4().hex[:12], owner, generations)
+        job.context = dict(context or {})
+        optimizer.progress_callback = job.update_progress
+        optimizer.stop_event = job.cancel_event
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._evict_finished_jobs()
+
+        run = lambda: optimizer.optimize(diet_db, initial_diet, generations, time_limit_s=time_limit_s)
+        try:
+            self.scheduler.submit(job.job_id, owner, lambda: self._run_job(job, run, postprocess))
+        except AdmissionError:
+            with self._lock:
+                del self._jobs[job.job_id]
+            raise
+        return job.job_id
+
+    def _run_job(self, job: OptimizationJob, run: Callable, postprocess: Callable = None):
+        if job.cancel_event.is_set():
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+            return
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            solutions = run()
+            job.result = postprocess(solutions) if postprocess is not None else solutions
+            job.status = 'cancelled' if job.cancel_event.is_set() else 'completed'
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = 'failed'
+            traceback.print_exc()
+        finally:
+            job.finished_at = time.time()
+
+    def _evict_finished_jobs(self):
+        finished = [job for job in self._jobs.values() if job.is_finished]
+        if len(finished) <= self.max_finished_jobs:
+            return
+        finished.sort(key=lambda job: job.finished_at)
+        for job in finished[:len(finished) - self.max_finished_jobs]:
+            del self._jobs[job.job_id]
+
+    def get(self, job_id: str) -> Optional[OptimizationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.is_finished:
+            return False
+        job.cancel()
+        if self.scheduler.cancel(job_id):
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+        return True
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        return self.scheduler.queue_position(job_id)
+
+    def jobs_for(self, owner: str) -> List[OptimizationJob]:
+        with self._lock:
+            return sorted((job for job in self._jobs.values() if job.owner == owner),
+                          key=lambda job: job.created_at, reverse=True)
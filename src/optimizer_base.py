@@ -1,7 +1,14 @@
+import threading
+import time
 from abc import ABC, abstractmethod
 from Diet_class import Meal, Diet, Menu
-from typing import List
+from typing import List, Optional, Tuple
 import numpy as np
+from convergence import HypervolumeStagnation
+from surrogate import RidgeSurrogate
+from repair import NutrientRepair
+from local_search import MemeticLocalSearch
+from solution_archive import SolutionArchive, diet_fingerprint
 from evaluation_function import evaluate_nutrition, evaluate_cost, evaluate_harmony, evaluate_diversity, validate_weekly_constraints_detailed, validate_weekly_constraints
 
 class DietOptimizer(ABC):
@@ -16,14 +23,242 @@ class DietOptimizer(ABC):
         self.mutation_menu_prob = 0.7
         self.crossover_prob = 0.8
 
-        self.good_solutions_archive = []
-        self.backup_solutions = []  # 3가지 이상 개선된 해들
-        self.constraint_solutions = []  # 제약조건만 만족하는 해들
+        # 해 아카이브: 식단 전체 지문으로 중복을 거르고, 용량을 넘으면 우선순위가 낮고 붐비는 해부터 버림
+        self.backup_capacity = 200
+        self.constraint_capacity = 200
+        self.good_solutions_archive = SolutionArchive(self.archive_size)
+        self.backup_solutions = SolutionArchive(self.backup_capacity, priority=lambda entry: (entry[2], entry[1]))  # 3가지 이상 개선된 해들
+        self.constraint_solutions = SolutionArchive(self.constraint_capacity, priority=lambda entry: entry[1])  # 제약조건만 만족하는 해들
+
+        self.engine = None  # 공유 OptimizerEngine (attach_engine 으로 연결)
+        self.progress_callback = None  # 세대마다 진행 상황(dict)을 받는 콜백
+        self.stop_event = None  # 외부에서 set() 하면 현재 세대 후 중단
+
+        # 시간/평가 횟수 예산 (optimize 의 time_limit_s / max_evaluations)
+        self.time_limit_s = None
+        self.max_evaluations = None
+        self.evaluation_count = 0
+        self.stop_reason = None
+        self._started_at = None
+        self._best_front: List[Tuple[Diet, List[float]]] = []  # 지금까지의 비지배 해 (언제든 조회 가능)
+        self._budget_lock = threading.Lock()
+
+        # 하이퍼볼륨 정체 조기 종료 (stagnation_patience=None 이면 추적만 하고 멈추지 않음)
+        self.stagnation_patience = 15
+        self.stagnation_tolerance = 1e-3
+        self.convergence = HypervolumeStagnation(self.stagnation_patience, self.stagnation_tolerance)
+
+        # 섬 모델 이주: migration_interval 세대마다 migration_callback(세대, 이주 보낼 해) → 받아들일 해
+        self.migration_interval = None
+        self.migration_size = 5
+        self.migration_callback = None
+        self._immigrants: List[Diet] = []
+
+        # 자식 해 사전 선별용 대리 모델 (surrogate.RidgeSurrogate 를 넣으면 사용, None 이면 사용 안 함)
+        self.surrogate = None
+        # 영양 제약 위반 자식 해의 배식 비율 보정 (repair.NutrientRepair, None 이면 사용 안 함)
+        self.repair = None
+        # 세대마다 상위 해에 적용하는 증분 평가 지역 탐색 (local_search.MemeticLocalSearch, None 이면 사용 안 함)
+        self.local_search = None
+        self._diet_db = None
+
+    def attach_engine(self, engine):
+        """공유 엔진의 스레드 풀, 사전 계산 테이블, 적합도 캐시를 사용하도록 연결"""
+        own_pool = getattr(self, 'thread_pool', None)
+        if own_pool is not None and own_pool is not engine.thread_pool:
+            own_pool.shutdown(wait=False)
+        self.thread_pool = engine.thread_pool
+        self.engine = engine
+
+    @property
+    def nutrient_matrix(self):
+        """엔진이 연결되어 있으면 엔진 소유 영양 행렬, 아니면 None (평가 함수가 기본 행렬 사용)"""
+        return self.engine.nutrient_matrix if self.engine is not None else None
 
     @abstractmethod
-    def optimize(self, diet_db: Diet, initial_diet: Diet, generations: int = 100) -> List[Diet]:
+    def optimize(self, diet_db: Diet, initial_diet: Diet, generations: int = 100,
+                 time_limit_s: Optional[float] = None, max_evaluations: Optional[int] = None) -> List[Diet]:
         pass
 
+    def _start_budget(self, time_limit_s: Optional[float] = None, max_evaluations: Optional[int] = None,
+                      diet_db: Diet = None):
+        """optimize 시작 시 호출: 예산과 평가 횟수, 지금까지의 최선 프론트 초기화"""
+        self._diet_db = diet_db
+        with self._budget_lock:
+            self.time_limit_s = time_limit_s
+            self.max_evaluations = max_evaluations
+            self.evaluation_count = 0
+            self.stop_reason = None
+            self._started_at = time.monotonic()
+            self._best_front = []
+        self._immigrants = []
+        self.good_solutions_archive.capacity = self.archive_size
+        self.backup_solutions.capacity = self.backup_capacity
+        self.constraint_solutions.capacity = self.constraint_capacity
+        if self.surrogate is not None:
+            self.surrogate.reset()
+        self.convergence = HypervolumeStagnation(self.stagnation_patience, self.stagnation_tolerance)
+
+    @property
+    def elapsed_s(self) -> float:
+        return time.monotonic() - self._started_at if self._started_at is not None else 0.0
+
+    def _budget_exhausted(self) -> Optional[str]:
+        """예산이 소진됐으면 이유('time_limit' / 'max_evaluations'), 아니면 None"""
+        if self.time_limit_s is not None and self.elapsed_s >= self.time_limit_s:
+            return 'time_limit'
+        if self.max_evaluations is not None and self.evaluation_count >= self.max_evaluations:
+            return 'max_evaluations'
+        return None
+
+    def _update_best_front(self, solutions: List[Diet], fitnesses: np.ndarray):
+        """이번 세대 해를 지금까지의 비지배 해와 합쳐 프론트 갱신 (archive_size 개까지)"""
+        if not len(solutions):
+            return
+        with self._budget_lock:
+            candidates = self._best_front + [(diet, list(map(float, fitness))) for diet, fitness in zip(solutions, fitnesses)]
+        candidate_fitnesses = np.array([fitness for _, fitness in candidates], dtype=float)
+        mask = self._non_dominated_mask(candidate_fitnesses)
+        front = []
+        seen = set()
+        for (diet, fitness), keep in zip(candidates, mask):
+            key = tuple(np.round(fitness, 6))
+            if keep and key not in seen:
+                seen.add(key)
+                front.append((diet, fitness))
+        with self._budget_lock:
+            self._best_front = front[:self.archive_size]
+
+    def get_best_front(self) -> List[Tuple[Diet, List[float]]]:
+        """지금까지 찾은 비지배 해 (식단, 적합도) 목록 — 최적화 도중 다른 스레드에서 호출해도 안전"""
+        with self._budget_lock:
+            return list(self._best_front)
+
+    def _migrate(self, generation: int):
+        """최선 프론트에서 이주 보낼 해를 골라 콜백에 넘기고, 돌려받은 해를 다음 세대에 넣도록 보관"""
+        front = self.get_best_front()
+        if len(front) > self.migration_size:
+            picked = np.random.choice(len(front), self.migration_size, replace=False)
+            front = [front[i] for i in picked]
+        immigrants = self.migration_callback(generation, [diet for diet, _ in front])
+        if immigrants:
+            self._immigrants.extend(immigrants)
+
+    def _receive_immigrants(self, population: List[Diet]) -> List[Diet]:
+        """받아둔 이주 해로 개체군의 뒤쪽 개체를 대체"""
+        if not self._immigrants:
+            return population
+        immigrants = self._immigrants[:len(population)]
+        self._immigrants = []
+        return population[:len(population) - len(immigrants)] + immigrants
+
+    def enable_surrogate(self, **kwargs) -> RidgeSurrogate:
+        """자식 해 사전 선별 사용 (인자는 RidgeSurrogate 설정)"""
+        self.surrogate = RidgeSurrogate(self.all_menus, **kwargs)
+        return self.surrogate
+
+    def enable_local_search(self, **kwargs) -> MemeticLocalSearch:
+        """상위 해 지역 탐색 사용 (인자는 MemeticLocalSearch 설정)"""
+        self.local_search = MemeticLocalSearch(self.all_menus, self.nutrient_constraints, **kwargs)
+        return self.local_search
+
+    def _apply_local_search(self, solutions: List[Diet], fitnesses: np.ndarray):
+        """상위 해를 지역 탐색으로 개선해 다음 세대에 넣고 최선 프론트에도 반영"""
+        if self._diet_db is None or not len(solutions):
+            return
+        # 증분 평가는 기간 전체 쌍 조화도(scope='horizon') 기준이라 다른 범위에서는 적용하지 않음
+        if self.engine is not None and self.engine.harmony_scope != 'horizon':
+            return
+        tables = self.local_search.tables_for(self._diet_db, self.engine, max(solutions[0].n_days, 1))
+        improved, improved_fitnesses = [], []
+        for idx in self.local_search.select_top_k(fitnesses, self._non_dominated_mask):
+            diet, fitness, accepted = self.local_search.improve(solutions[idx], tables)
+            if accepted:
+                improved.append(diet)
+                improved_fitnesses.append(fitness)
+        if improved:
+            self._immigrants.extend(improved)
+            self._update_best_front(improved, np.array(improved_fitnesses))
+
+    def enable_repair(self, **kwargs) -> NutrientRepair:
+        """자식 해 영양 보정 사용 (인자는 NutrientRepair 설정)"""
+        kwargs.setdefault('nutrient_matrix', self.nutrient_matrix)
+        self.repair = NutrientRepair(self.nutrient_constraints, **kwargs)
+        return self.repair
+
+    def _offspring_target(self, n: int) -> int:
+        """대리 모델이 켜져 있으면 선별로 버려질 만큼 자식 해를 더 만듦"""
+        if self.surrogate is not None and self.surrogate.ready:
+            return int(np.ceil(n / self.surrogate.keep_fraction))
+        return n
+
+    def _screen_offspring(self, candidates: List[Diet], n: int) -> List[Diet]:
+        """자식 해 중 정확히 평가할 n 개 선택 (대리 모델이 없거나 꺼져 있으면 앞에서부터 n 개) 후 영양 보정"""
+        if self.surrogate is None:
+            offspring = candidates[:max(n, 0)]
+        else:
+            offspring = self.surrogate.screen(candidates, n, self._non_dominated_mask)
+        if self.repair is not None and offspring:
+            offspring = self.repair.repair_batch(offspring)
+        return offspring
+
+    def _stopped_solutions(self, diet_db: Diet) -> List[Diet]:
+        """
+        중단 시 반환할 해: 취소/예산 소진이면 지금까지의 최선 프론트, 아니면 수집된 해 (없으면 최선 프론트 5개)
+
+        정체('stagnation')는 정상 종료로 보고 get_final_solutions 의 5개 해 규약을 따른다.
+        """
+        if self.stop_reason is not None and self.stop_reason != 'stagnation':
+            front = [diet for diet, _ in self.get_best_front()]
+            if front:
+                return front
+        solutions = self.get_final_solutions(diet_db)
+        if not solutions:
+            solutions = [diet for diet, _ in self.get_best_front()[:5]]
+        return solutions
+
+    def _non_dominated_mask(self, fitnesses: np.ndarray) -> np.ndarray:
+        fitnesses = np.asarray(fitnesses, dtype=float)
+        if len(fitnesses) == 0:
+            return np.zeros(0, dtype=bool)
+        ge = np.all(fitnesses[:, None, :] >= fitnesses[None, :, :], axis=2)
+        gt = np.any(fitnesses[:, None, :] > fitnesses[None, :, :], axis=2)
+        return ~np.any(ge & gt, axis=0)
+
+    def _on_generation(self, generation: int, generations: int, fitnesses: np.ndarray,
+                       solutions: List[Diet] = None) -> bool:
+        """세대마다 호출: 최선 프론트/하이퍼볼륨을 갱신하고 진행 상황을 보고한 뒤, 중단해야 하면 True 반환 (이유는 stop_reason)"""
+        if solutions is not None:
+            self._update_best_front(solutions, fitnesses)
+            if self.surrogate is not None:
+                self.surrogate.observe(solutions, fitnesses)
+        hypervolume = self.convergence.update(fitnesses)
+        if self.progress_callback is not None:
+            fitnesses = np.asarray(fitnesses, dtype=float)
+            front = fitnesses[self._non_dominated_mask(fitnesses)] if len(fitnesses) else fitnesses
+            self.progress_callback({
+                'generation': generation + 1,
+                'generations': generations,
+                'front_size': int(len(front)),
+                'best_scores': front.max(axis=0).tolist() if len(front) else [],
+                'elapsed_s': self.elapsed_s,
+                'time_limit_s': self.time_limit_s,
+                'evaluations': self.evaluation_count,
+                'hypervolume': hypervolume,
+            })
+        if self.stop_event is not None and self.stop_event.is_set():
+            self.stop_reason = 'cancelled'
+        else:
+            self.stop_reason = self._budget_exhausted()
+        if self.stop_reason is None and self.convergence.stagnated:
+            self.stop_reason = 'stagnation'
+        if self.stop_reason is None and self.local_search is not None and solutions is not None:
+            self._apply_local_search(solutions, fitnesses)
+        if (self.stop_reason is None and self.migration_callback is not None and self.migration_interval
+                and (generation + 1) % self.migration_interval == 0):
+            self._migrate(generation)
+        return self.stop_reason is not None
+
     def _dominates(self, a: List[float], b: List[float]) -> bool:
         return all(x >= y for x, y in zip(a, b)) and any(x > y for x, y in zip(a, b))
 
@@ -39,8 +274,7 @@ class DietOptimizer(ABC):
                 new_ratio = (menu1.serving_ratio + menu2.serving_ratio) / 2 + np.random.normal(0, 0.05)
                 new_ratio = np.clip(new_ratio, 0.6, 0.9)
                 
-                new_menu = Menu(selected_menu.name, selected_menu.nutrients, 
-                            selected_menu.ingredients, selected_menu.category, new_ratio)
+                new_menu = selected_menu.with_ratio(new_ratio)
                 child_menus.append(new_menu)
             child_meals.append(Meal(child_menus, meal1.date, meal1.meal_type))
         
@@ -58,20 +292,45 @@ class DietOptimizer(ABC):
                             selected_menu = np.random.choice(same_category_menus)
                         else:
                             selected_menu = menu
-                        new_menu = Menu(selected_menu.name, selected_menu.nutrients, selected_menu.ingredients, selected_menu.category, np.random.uniform(0.6, 1.0))
+                        new_menu = selected_menu.with_ratio(np.random.uniform(0.6, 1.0))
                     else:
-                        new_menu = Menu(menu.name, menu.nutrients, menu.ingredients, menu.category, np.clip(menu.serving_ratio + np.random.normal(0, 0.1), 0.6, 1.0))
+                        new_menu = menu.with_ratio(np.clip(menu.serving_ratio + np.random.normal(0, 0.1), 0.6, 1.0))
                     mutated_menus.append(new_menu)
                 mutated_meals.append(Meal(mutated_menus, meal.date, meal.meal_type))
             else:
                 mutated_meals.append(meal)
         return Diet(mutated_meals)
 
-    def fitness(self, diet_db: Diet, weeklydiet: Diet) -> List[float]:
+    def _create_initial_individual(self, base_diet: Diet) -> Diet:
+        """초기 개체: 변이 후 모든 메뉴의 배식 비율을 새로 뽑음 (mutate 가 그대로 둔 끼니는 원본과 메뉴 객체를 공유하므로 새로 만듦)"""
+        mutated = self.mutate(base_diet)
+        return Diet([Meal([menu.with_ratio(np.random.uniform(0.6, 0.9))
+                           for menu in meal.menus], meal.date, meal.meal_type)
+                     for meal in mutated.meals])
+
+    def _prefetch_fitness(self, diets: List[Diet], diet_db: Diet):
+        """엔진에 프로세스 풀이 있으면 개체군 전체를 한 번에 평가해 두어 이후 개별 fitness 호출이 캐시에서 끝나게 함"""
+        if self.engine is not None and diet_db is self.engine.diet_db:
+            evaluated = self.engine.prefetch(diets)
+            with self._budget_lock:
+                self.evaluation_count += evaluated
+
+    def fitness(self, diet_db: Diet, weeklydiet: Diet, count: bool = True) -> List[float]:
         '''if not self.validate_nutrient_constraints(weeklydiet):
             return [-float('inf'), -float('inf'), -float('inf'), -float('inf')]'''
-        
-        nutrition_score = evaluate_nutrition(weeklydiet, self.nutrient_constraints)
+        # evaluation_count 는 새로 계산한 평가만 셈 (엔진 캐시 적중과 count=False 인 재평가는 제외)
+        if self.engine is not None and diet_db is self.engine.diet_db:
+            result, fresh = self.engine.evaluate(weeklydiet)
+            if count and fresh:
+                with self._budget_lock:
+                    self.evaluation_count += 1
+            return result
+
+        if count:
+            with self._budget_lock:
+                self.evaluation_count += 1
+
+        nutrition_score = evaluate_nutrition(weeklydiet, self.nutrient_constraints, self.nutrient_matrix)
         cost_score = evaluate_cost(diet_db, weeklydiet)
         harmony_score = evaluate_harmony(diet_db, weeklydiet)
         diversity_score = evaluate_diversity(weeklydiet)
@@ -86,10 +345,10 @@ class DietOptimizer(ABC):
             # 종료 조건 체크 (상세 출력 생략)
 
             for i, diet in enumerate(current_solutions):
-                current_fitness = self.fitness(diet_db, diet)
+                current_fitness = self.fitness(diet_db, diet, count=False)
                 improvements = sum(1 for init, curr in zip(initial_fitness, current_fitness) if curr > init)
                 
-                constraint_satisfied, violations = validate_weekly_constraints_detailed(diet, self.nutrient_constraints)
+                constraint_satisfied, violations = validate_weekly_constraints_detailed(diet, self.nutrient_constraints, self.nutrient_matrix)
                 if constraint_satisfied:
                     valid_constraint_count += 1
                     
@@ -101,11 +360,11 @@ class DietOptimizer(ABC):
 
                 # 3가지 이상 개선된 해는 무조건 backup에 저장 (중복 체크 완화)
                 if improvements >= 3:
-                    self.backup_solutions.append((diet, improvements, constraint_satisfied))
+                    self.backup_solutions.append((diet, improvements, constraint_satisfied), current_fitness)
 
                 # 제약조건 만족하는 모든 해를 저장 (개선 수 상관없이)
                 if constraint_satisfied:
-                    self.constraint_solutions.append((diet, improvements))
+                    self.constraint_solutions.append((diet, improvements), current_fitness)
 
                 # 기존 조건: 3가지 이상 개선 + 제약조건 만족
                 if improvements >= 3 and constraint_satisfied and not self._is_duplicate(diet):
@@ -113,12 +372,11 @@ class DietOptimizer(ABC):
                     improved_count += 1
             
             for diet in current_valid_solutions:
-                if not self._is_duplicate(diet):
-                    self.good_solutions_archive.append(diet)
+                self.good_solutions_archive.append(diet)
             
-            self.good_solutions_archive = [
-                diet for diet in self.good_solutions_archive if validate_weekly_constraints(diet, self.nutrient_constraints)
-            ]
+            self.good_solutions_archive.retain(
+                lambda diet: validate_weekly_constraints(diet, self.nutrient_constraints, self.nutrient_matrix)
+            )
             
             print(f"제약조건 만족 해: {valid_constraint_count}/{len(current_solutions)}")
             print(f"현재 세대 수집된 해: {len(current_valid_solutions)}개")
@@ -129,30 +387,10 @@ class DietOptimizer(ABC):
             return len(self.good_solutions_archive) >= 5
 
     def _is_duplicate_in_backup(self, new_diet):
-        new_menus = [meal.menus[0].name for meal in new_diet.meals[:10]]
-        for diet, _, _ in self.backup_solutions:
-            existing_menus = [meal.menus[0].name for meal in diet.meals[:10]]
-            if new_menus == existing_menus:
-                return True
-        return False
-
-    def _is_duplicate_final(self, new_diet, solution_list):
-            new_signature = [(meal.menus[0].name, round(meal.menus[0].serving_ratio, 2)) 
-                            for meal in new_diet.meals[:10]]
-            for existing_diet in solution_list:
-                existing_signature = [(meal.menus[0].name, round(meal.menus[0].serving_ratio, 2)) 
-                                    for meal in existing_diet.meals[:10]]
-                if new_signature == existing_signature:
-                    return True
-            return False
+        return new_diet in self.backup_solutions
 
     def _is_duplicate_in_constraint(self, new_diet):
-        new_menus = [meal.menus[0].name for meal in new_diet.meals[:10]]
-        for diet, _ in self.constraint_solutions:
-            existing_menus = [meal.menus[0].name for meal in diet.meals[:10]]
-            if new_menus == existing_menus:
-                return True
-        return False
+        return new_diet in self.constraint_solutions
 
     def get_final_solutions(self, diet_db) -> List[Diet]:
         print(f"\n=== get_final_solutions 시작 ===")
@@ -164,6 +402,7 @@ class DietOptimizer(ABC):
             return self.good_solutions_archive[:5]
         
         final_solutions = self.good_solutions_archive[:]
+        selected = {diet_fingerprint(diet) for diet in final_solutions}
         needed = 5 - len(final_solutions)
         print(f"추가로 필요한 해: {needed}개")
         
@@ -179,7 +418,9 @@ class DietOptimizer(ABC):
         for diet, improvements, constraint_satisfied in sorted(constraint_satisfied_backup, key=lambda x: x[1], reverse=True):
             if needed <= 0:
                 break
-            if not self._is_duplicate_final(diet, final_solutions):
+            fingerprint = diet_fingerprint(diet)
+            if fingerprint not in selected:
+                selected.add(fingerprint)
                 final_solutions.append(diet)
                 needed -= 1
                 added_from_backup_satisfied += 1
@@ -194,7 +435,9 @@ class DietOptimizer(ABC):
         for diet, improvements, constraint_satisfied in sorted(constraint_violated_backup, key=lambda x: x[1], reverse=True):
             if needed <= 0:
                 break
-            if not self._is_duplicate_final(diet, final_solutions):
+            fingerprint = diet_fingerprint(diet)
+            if fingerprint not in selected:
+                selected.add(fingerprint)
                 final_solutions.append(diet)
                 needed -= 1
                 added_from_backup_violated += 1
@@ -204,10 +447,8 @@ class DietOptimizer(ABC):
         
         # 3단계: 여전히 부족하면 제약조건만 만족하는 해로 채우기
         if needed > 0:
-            unique_constraint_solutions = []
-            for diet, improvements in self.constraint_solutions:
-                if not self._is_duplicate_final(diet, final_solutions + [d for d, _ in unique_constraint_solutions]):
-                    unique_constraint_solutions.append((diet, improvements))
+            unique_constraint_solutions = [(diet, improvements) for diet, improvements in self.constraint_solutions
+                                           if diet_fingerprint(diet) not in selected]
             
             print(f"유니크한 제약조건 해: {len(unique_constraint_solutions)}개")
             
@@ -226,11 +467,4 @@ class DietOptimizer(ABC):
         return final_solutions
             
     def _is_duplicate(self, new_diet):
-        new_signature = [(meal.menus[0].name, round(meal.menus[0].serving_ratio, 2)) 
-                        for meal in new_diet.meals[:10]]
-        for existing_diet in self.good_solutions_archive:
-            existing_signature = [(meal.menus[0].name, round(meal.menus[0].serving_ratio, 2)) 
-                                 for meal in existing_diet.meals[:10]]
-            if new_signature == existing_signature:
-                return True
-        return False
+        return new_diet in self.good_solutions_archive
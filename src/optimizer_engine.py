@@ -0,0 +1,182 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple
+from Diet_class import Diet, Menu, NutrientConstraints, get_servings
+from evaluation_function import (calculate_harmony_index, evaluate_nutrition,
+                                 evaluate_cost, evaluate_harmony, evaluate_diversity)
+from emoea_optimizer import LRUCache
+from procurement import ProcurementCostEngine
+from nutrient_matrix import NutrientMatrix
+
+def diet_signature(diet: Diet) -> Tuple:
+    """식단 전체(끼니 구분, 메뉴명, 배식 비율)를 나타내는 해시 가능한 키"""
+    return tuple(tuple((menu.name, menu.serving_ratio) for menu in meal.menus) for meal in diet.meals)
+
+def catalogue_snapshot_key(*paths: str) -> Tuple:
+    """DB 파일들의 (경로, 크기, 수정시각) — 파일이 바뀌면 다른 엔진이 만들어지도록 하는 키"""
+    key = []
+    for path in paths:
+        stat = os.stat(path)
+        key.append((os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(key)
+
+def constraints_key(nutrient_constraints: NutrientConstraints) -> Tuple:
+    return (
+        tuple(sorted(nutrient_constraints.min_values.items())),
+        tuple(sorted(nutrient_constraints.max_values.items())),
+        tuple(sorted(nutrient_constraints.weights.items())),
+    )
+
+class EvaluationTables:
+    """diet_db 에서만 파생되는 조화 행렬, 구매 비용 엔진, 영양 행렬, (인분/기간별) 비용 상/하한을 한 번만 계산해 보관"""
+
+    def __init__(self, diet_db: Diet, history=None, nutrient_matrix: NutrientMatrix = None):
+        self.diet_db = diet_db
+        self.history = history  # DietHistory 가 있으면 누적 통계를 그대로 사용 (전체 재계산 없음)
+        # 희소 조화 행렬 (상위 쌍/조회용)
+        self.harmony_index = history.harmony_index() if history is not None else calculate_harmony_index(diet_db)
+        self.harmony_matrix = self.harmony_index.matrix  # CSR 그대로 사용 (밀집 사본은 harmony_index.to_dense() 로 필요할 때만)
+        self.menus, self.menu_counts, self.menu_to_index = (self.harmony_index.menus, self.harmony_index.menu_counts,
+                                                            self.harmony_index.menu_to_index)
+        if history is not None:
+            self.procurement = ProcurementCostEngine(list(history.unique_menus.values()))
+        else:
+            self.procurement = ProcurementCostEngine.from_diet(diet_db)
+        # 엔진(과 for_problem 으로 만든 엔진들)이 공유하는 메뉴 × 영양소 행렬 — 모듈 전역 대신 테이블이 소유
+        self.nutrient_matrix = nutrient_matrix if nutrient_matrix is not None else NutrientMatrix()
+        self._cost_bounds = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_history(cls, history, diet_db: Diet = None) -> 'EvaluationTables':
+        """DietHistory 의 누적 통계로 테이블 생성 (이력은 끼니를 보관하지 않으므로 diet_db 는 엔진이 쓰는 식단 DB)"""
+        return cls(diet_db, history)
+
+    def cost_bounds(self, servings: int, n_days: int = 7) -> Tuple[float, float]:
+        key = (servings, n_days)
+        bounds = self._cost_bounds.get(key)
+        if bounds is None:
+            with self._lock:
+                bounds = self._cost_bounds.get(key)
+                if bounds is None:
+                    if self.history is not None:
+                        bounds = self.history.cost_bounds(servings, n_days)
+                    else:
+                        bounds = self.procurement.cost_bounds(self.diet_db, servings, n_days)
+                    self._cost_bounds[key] = bounds
+        return bounds
+
+class OptimizerEngine:
+    """
+    프로세스 전체에서 공유하는 최적화 엔진 (카탈로그 스냅샷 + 영양 제약조건 단위)
+
+    워커 스레드 풀, 사전 계산된 비용/조화 테이블, 적합도 캐시를 보관하므로
+    같은 조건의 최적화기는 매번 새로 준비할 필요 없이 바로 최적화를 시작할 수 있다.
+    """
+
+    def __init__(self, diet_db: Diet, all_menus: List[Menu], nutrient_constraints: NutrientConstraints,
+                 max_workers: int = 4, cache_size: int = 20000, tables: EvaluationTables = None,
+                 servings: int = None, thread_pool: ThreadPoolExecutor = None, harmony_scope: str = 'horizon'):
+        self.diet_db = diet_db
+        self.all_menus = all_menus
+        self.nutrient_constraints = nutrient_constraints
+        if tables is None:
+            tables = EvaluationTables(diet_db, nutrient_matrix=NutrientMatrix.from_menus(all_menus))
+        self.tables = tables
+        self.servings = servings  # None 이면 전역 인분(get_servings) 사용
+        self.harmony_scope = harmony_scope  # evaluate_harmony 의 scope ('horizon' / 'day' / 'meal')
+        self._owns_thread_pool = thread_pool is None
+        self.thread_pool = thread_pool or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='diet-engine')
+        self.fitness_cache = LRUCache(cache_size)
+        self.process_pool = None  # shared_evaluation.SharedEvaluationPool (enable_process_pool 로 사용)
+
+    @property
+    def harmony_matrix(self):
+        return self.tables.harmony_matrix
+
+    @property
+    def nutrient_matrix(self) -> NutrientMatrix:
+        return self.tables.nutrient_matrix
+
+    @property
+    def current_servings(self) -> int:
+        return self.servings if self.servings is not None else get_servings()
+
+    def for_problem(self, nutrient_constraints: NutrientConstraints, servings: int = None,
+                    cache_size: int = 20000, fitness_cache: LRUCache = None) -> 'OptimizerEngine':
+        """
+        카탈로그 테이블(조화 행렬, 구매 비용 엔진, 비용 상/하한)과 스레드 풀은 공유하고 영양 제약/인분만 다른 엔진
+
+        적합도 캐시 키에 인분이 들어 있으므로, 영양 제약이 같은 객체이면 (또는 fitness_cache 를 넘기면) 캐시도 공유한다.
+        """
+        if fitness_cache is None and nutrient_constraints is self.nutrient_constraints:
+            fitness_cache = self.fitness_cache
+        engine = OptimizerEngine(self.diet_db, self.all_menus, nutrient_constraints, cache_size=cache_size,
+                                 tables=self.tables, servings=servings, thread_pool=self.thread_pool,
+                                 harmony_scope=self.harmony_scope)
+        if fitness_cache is not None:
+            engine.fitness_cache = fitness_cache
+        return engine
+
+    def fitness(self, weeklydiet: Diet) -> List[float]:
+        return self.evaluate(weeklydiet)[0]
+
+    def evaluate(self, weeklydiet: Diet) -> Tuple[List[float], bool]:
+        """(적합도, 새로 계산했는지) — 캐시 적중이면 False"""
+        servings = self.current_servings
+        key = (servings, diet_signature(weeklydiet))
+        cached = self.fitness_cache.get(key)
+        if cached is not None:
+            return list(cached), False
+
+        nutrition_score = evaluate_nutrition(weeklydiet, self.nutrient_constraints, self.tables.nutrient_matrix)
+        cost_score = evaluate_cost(self.diet_db, weeklydiet, self.tables.cost_bounds(servings, max(weeklydiet.n_days, 1)),
+                                   self.tables.procurement.cost(weeklydiet, servings))
+        harmony_data = (self.tables.harmony_matrix, self.tables.menu_to_index, self.tables.harmony_index.max_value)
+        harmony_score = evaluate_harmony(self.diet_db, weeklydiet, harmony_data, self.harmony_scope)
+        diversity_score = evaluate_diversity(weeklydiet)
+        result = (float(nutrition_score), float(cost_score), float(harmony_score), float(diversity_score))
+        self.fitness_cache.put(key, result)
+        return list(result), True
+
+    def enable_process_pool(self, max_workers: int = 4, capacity: int = 256):
+        """개체군 평가를 공유 메모리 프로세스 풀로 처리 (카탈로그/개체군을 한 번 올리고 워커는 인덱스 범위만 받음)"""
+        from shared_evaluation import SharedEvaluationPool
+        if self.process_pool is None:
+            self.process_pool = SharedEvaluationPool(self, max_workers=max_workers, capacity=capacity)
+        return self.process_pool
+
+    def prefetch(self, diets: List[Diet]) -> int:
+        """캐시에 없는 식단들을 프로세스 풀로 한 번에 평가해 적합도 캐시에 넣고 새로 평가한 수 반환 (풀이 없으면 0)"""
+        if self.process_pool is None:
+            return 0
+        servings = self.current_servings
+        missing: Dict[int, Dict[Tuple, Diet]] = {}  # 기간(일)별로 묶어 평가
+        for diet in diets:
+            key = (servings, diet_signature(diet))
+            if self.fitness_cache.get(key) is None:
+                missing.setdefault(diet.n_days, {}).setdefault(key, diet)
+        for group in missing.values():
+            fitnesses = self.process_pool.evaluate(list(group.values()), servings)
+            for key, values in zip(group, fitnesses):
+                self.fitness_cache.put(key, tuple(float(v) for v in values))
+        return sum(len(group) for group in missing.values())
+
+    def create_optimizer(self, optimizer_cls=None, repair: bool = True):
+        """엔진 자원을 공유하는 최적화기 생성 (기본값 SPEA2, 자식 해 영양 보정 사용)"""
+        if optimizer_cls is None:
+            from spea2_optimizer import SPEA2Optimizer
+            optimizer_cls = SPEA2Optimizer
+        optimizer = optimizer_cls(self.all_menus, self.nutrient_constraints, self.tables.harmony_matrix)
+        optimizer.attach_engine(self)
+        if repair:
+            optimizer.enable_repair()
+        return optimizer
+
+    def shutdown(self):
+        if self.process_pool is not None:
+            self.process_pool.close()
+            self.process_pool = None
+        if self._owns_thread_pool:
+            self.thread_pool.shutdown(wait=False)
@@ -6,14 +6,26 @@ from optimizer_base import DietOptimizer
 from scipy import stats
 import pickle
 import os
-from openpyxl import Workbook
+from results_store import ResultsStore
+from excel_export import write_benchmark_workbook
 
 class PerformanceEvaluator:
-    def __init__(self, diet_db: Diet, initial_diet: Diet, optimizers: Dict[str, DietOptimizer]):
+    # 기록하는 지표 이름 (igd 는 기준 프론트가 있을 때만 execution_time 앞에 추가)
+    METRICS = ['hypervolume', 'spacing', 'diversity', 'convergence', 'execution_time']
+    OPTIONAL_METRICS = ['igd']
+
+    def __init__(self, diet_db: Diet, initial_diet: Diet, optimizers: Dict[str, DietOptimizer], dataset_name: str = 'default',
+                 reference_front: np.ndarray = None):
         self.diet_db = diet_db
         self.initial_diet = initial_diet
         self.optimizers = optimizers
-        self.metrics = ['hypervolume', 'spacing', 'diversity', 'convergence', 'execution_time']
+        self.dataset_name = dataset_name
+        self.metrics = list(self.METRICS)
+        # 기준 프론트 (milp_reference.MILPReferenceSolver.reference_front 의 적합도 행렬) 가 있으면 IGD 도 계산
+        self.reference_front = np.asarray(reference_front, dtype=float) if reference_front is not None else None
+        if self.reference_front is not None:
+            self.metrics.insert(4, 'igd')
+        self.pareto_fronts = {}  # 알고리즘별 실행마다의 최종 해 적합도 행렬
 
     def calculate_hypervolume(self, solutions: List[Diet], optimizer: DietOptimizer) -> float:
         if not solutions:
@@ -64,12 +76,22 @@ class PerformanceEvaluator:
         improvements = np.maximum(0, final_fitnesses - initial_fitness)
         return np.mean(improvements)
 
-    def run_single_optimizer(self, optimizer_name: str, generations: int = 100, num_runs: int = 10, save_path: str = None):
+    def calculate_igd(self, solutions: List[Diet], optimizer: DietOptimizer) -> float:
+        """기준 프론트의 각 점에서 가장 가까운 해까지의 평균 거리 (작을수록 좋음, 해나 기준 프론트가 없으면 nan)"""
+        if not solutions or self.reference_front is None or len(self.reference_front) == 0:
+            return np.nan
+        fitnesses = np.array([optimizer.fitness(self.diet_db, solution) for solution in solutions])
+        distances = np.linalg.norm(self.reference_front[:, None, :] - fitnesses[None, :, :], axis=2)
+        return float(distances.min(axis=1).mean())
+
+    def run_single_optimizer(self, optimizer_name: str, generations: int = 100, num_runs: int = 10, save_path: str = None,
+                             time_limit_s: float = None, max_evaluations: int = None):
         if optimizer_name not in self.optimizers:
             raise ValueError(f"Optimizer {optimizer_name} not found")
         
         optimizer = self.optimizers[optimizer_name]
         results = {metric: [] for metric in self.metrics}
+        self.pareto_fronts[optimizer_name] = []
         
         print(f"\nEvaluating {optimizer_name}...")
         
@@ -78,7 +100,8 @@ class PerformanceEvaluator:
             start_time = time.time()
             
             try:
-                solutions = optimizer.optimize(self.diet_db, self.initial_diet, generations)
+                solutions = optimizer.optimize(self.diet_db, self.initial_diet, generations,
+                                               time_limit_s=time_limit_s, max_evaluations=max_evaluations)
                 execution_time = time.time() - start_time
                 
                 if not solutions:
@@ -87,11 +110,18 @@ class PerformanceEvaluator:
                     results['spacing'].append(0.0)
                     results['diversity'].append(0.0)
                     results['convergence'].append(0.0)
+                    if 'igd' in results:
+                        results['igd'].append(np.nan)
+                    self.pareto_fronts[optimizer_name].append(np.empty((0, 4)))
                 else:
+                    self.pareto_fronts[optimizer_name].append(
+                        np.array([optimizer.fitness(self.diet_db, solution) for solution in solutions]))
                     results['hypervolume'].append(self.calculate_hypervolume(solutions, optimizer))
                     results['spacing'].append(self.calculate_spacing(solutions, optimizer))
                     results['diversity'].append(self.calculate_diversity(solutions, optimizer))
                     results['convergence'].append(self.calculate_convergence(solutions, optimizer))
+                    if 'igd' in results:
+                        results['igd'].append(self.calculate_igd(solutions, optimizer))
                 
                 results['execution_time'].append(execution_time)
                 
@@ -99,6 +129,7 @@ class PerformanceEvaluator:
                 print(f"Error in {optimizer_name} Run {run + 1}: {e}")
                 for metric in self.metrics:
                     results[metric].append(0.0)
+                self.pareto_fronts[optimizer_name].append(np.empty((0, 4)))
             
             print(f"Run {run + 1}/{num_runs} completed")
         
@@ -108,31 +139,40 @@ class PerformanceEvaluator:
         return results
 
     def save_single_result(self, optimizer_name: str, results: Dict, save_path: str):
-        os.makedirs(save_path, exist_ok=True)
-        filename = os.path.join(save_path, f"{optimizer_name}_results.pkl")
-        with open(filename, 'wb') as f:
-            pickle.dump({optimizer_name: results}, f)
-        print(f"Results saved to {filename}")
+        store = ResultsStore(save_path)
+        run_offset = store.next_run_offset(self.dataset_name, optimizer_name)
+        store.append_results(self.dataset_name, optimizer_name, results,
+                             fronts=self.pareto_fronts.get(optimizer_name), run_offset=run_offset)
+        print(f"Results appended to {save_path} ({self.dataset_name}/{optimizer_name})")
 
-    def load_single_result(self, optimizer_name: str, save_path: str) -> Dict:
+    def _load_legacy_pickle(self, optimizer_name: str, save_path: str) -> Dict:
         filename = os.path.join(save_path, f"{optimizer_name}_results.pkl")
         with open(filename, 'rb') as f:
             return pickle.load(f)
 
+    def load_single_result(self, optimizer_name: str, save_path: str) -> Dict:
+        results = ResultsStore(save_path).to_results_dict(dataset=self.dataset_name, algorithms=[optimizer_name])
+        if results:
+            return results
+        # 저장소 도입 이전의 피클 결과
+        return self._load_legacy_pickle(optimizer_name, save_path)
+
     def combine_results(self, save_path: str, optimizer_names: List[str] = None) -> Dict:
         if optimizer_names is None:
             optimizer_names = list(self.optimizers.keys())
         
-        combined_results = {}
+        combined_results = ResultsStore(save_path).to_results_dict(dataset=self.dataset_name, algorithms=optimizer_names)
         for name in optimizer_names:
-            try:
-                single_result = self.load_single_result(name, save_path)
-                combined_results.update(single_result)
+            if name in combined_results:
                 print(f"Loaded results for {name}")
+                continue
+            try:
+                combined_results.update(self._load_legacy_pickle(name, save_path))
+                print(f"Loaded results for {name} (legacy pickle)")
             except FileNotFoundError:
                 print(f"Results file for {name} not found")
         
-        return combined_results
+        return {name: combined_results[name] for name in optimizer_names if name in combined_results}
 
     def perform_statistical_analysis(self, results: Dict[str, Dict[str, List[float]]]) -> Dict:
         statistical_results = {}
@@ -144,7 +184,9 @@ class PerformanceEvaluator:
                 'pairwise_tests': {}
             }
             
-            algorithm_data = {name: results[name][metric] for name in results.keys()}
+            # IGD 처럼 계산할 수 없는 실행은 nan 으로 기록되므로 검정에서 제외
+            algorithm_data = {name: [value for value in results[name][metric] if not np.isnan(value)]
+                              for name in results.keys()}
             
             # Normality test
             for alg_name, data in algorithm_data.items():
@@ -201,68 +243,22 @@ class PerformanceEvaluator:
         
         return statistical_results
 
+    def _summary(self, values: List[float]) -> Dict[str, float]:
+        """nan(계산할 수 없는 실행)을 제외한 평균/표준편차/최소/최대 — 값이 하나도 없으면 모두 nan"""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return {'mean': np.nan, 'std': np.nan, 'min': np.nan, 'max': np.nan}
+        return {'mean': np.mean(values), 'std': np.std(values), 'min': np.min(values), 'max': np.max(values)}
+
     def save_combined_results_to_excel(self, results: Dict, filename: str = 'combined_optimization_results.xlsx'):
         statistics = {}
         for name in results.keys():
-            statistics[name] = {
-                metric: {
-                    'mean': np.mean(results[name][metric]),
-                    'std': np.std(results[name][metric]),
-                    'min': np.min(results[name][metric]),
-                    'max': np.max(results[name][metric])
-                }
-                for metric in self.metrics
-            }
+            statistics[name] = {metric: self._summary(results[name][metric]) for metric in self.metrics}
 
         # Perform statistical analysis
         statistical_analysis = self.perform_statistical_analysis(results)
 
-        # Save to Excel
-        wb = Workbook()
-        
-        # Raw Results Sheet
-        ws_raw = wb.active
-        ws_raw.title = 'Raw Results'
-        
-        row = 1
-        for metric in self.metrics:
-            ws_raw.cell(row=row, column=1, value=metric.upper())
-            row += 1
-            
-            headers = ['Algorithm'] + [f'Run {i+1}' for i in range(len(next(iter(results.values()))[metric]))]
-            for col, header in enumerate(headers, 1):
-                ws_raw.cell(row=row, column=col, value=header)
-            
-            for alg_name in results.keys():
-                row += 1
-                ws_raw.cell(row=row, column=1, value=alg_name)
-                for col, value in enumerate(results[alg_name][metric], 2):
-                    ws_raw.cell(row=row, column=col, value=value)
-            
-            row += 2
-
-        # Summary Statistics Sheet
-        ws_summary = wb.create_sheet('Summary Statistics')
-        
-        row = 1
-        for metric in self.metrics:
-            ws_summary.cell(row=row, column=1, value=metric.upper())
-            row += 1
-            
-            headers = ['Algorithm', 'Mean', 'Std', 'Min', 'Max']
-            for col, header in enumerate(headers, 1):
-                ws_summary.cell(row=row, column=col, value=header)
-            
-            for alg_name in results.keys():
-                row += 1
-                stats = statistics[alg_name][metric]
-                ws_summary.cell(row=row, column=1, value=alg_name)
-                ws_summary.cell(row=row, column=2, value=stats['mean'])
-                ws_summary.cell(row=row, column=3, value=stats['std'])
-                ws_summary.cell(row=row, column=4, value=stats['min'])
-                ws_summary.cell(row=row, column=5, value=stats['max'])
-            
-            row += 2
-                    
-        wb.save(filename)
+        # Save to Excel (streaming writer)
+        write_benchmark_workbook(filename, results, self.metrics, statistics)
         print(f"Combined results saved to {filename}")
\ No newline at end of file
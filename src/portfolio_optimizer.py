@@ -0,0 +1,96 @@
+import numpy as np
+from typing import List, Dict, Type, Optional
+from Diet_class import Diet
+from optimizer_base import DietOptimizer
+from island_model import IslandModelOptimizer, _DietCodec
+
+class SharedArchiveChannel:
+    """모든 구성 알고리즘이 공유하는 전역 비지배 아카이브 (매니저 리스트 + 락)"""
+
+    def __init__(self, entries, lock, archive_size: int):
+        self.entries = entries  # (압축 식단, 적합도, 보낸 섬 번호)
+        self.lock = lock
+        self.archive_size = archive_size
+
+    def exchange(self, island_id: int, optimizer: DietOptimizer, codec: _DietCodec, rng: np.random.Generator,
+                 emigrants: List[Diet]) -> List[Diet]:
+        archive = self.publish(island_id, optimizer, codec)
+
+        # 다른 알고리즘이 찾은 해 중 일부를 받아옴
+        others = [entry for entry in archive if entry[2] != island_id]
+        if len(others) > optimizer.migration_size:
+            others = [others[i] for i in rng.choice(len(others), optimizer.migration_size, replace=False)]
+        return [codec.decode(encoded) for encoded, _, _ in others]
+
+    def publish(self, island_id: int, optimizer: DietOptimizer, codec: _DietCodec) -> List:
+        """optimizer 의 최선 프론트를 공유 아카이브에 합치고 합쳐진 아카이브 반환 (알고리즘 종료 시에도 호출됨)"""
+        own = [(codec.encode(diet), list(fitness), island_id) for diet, fitness in optimizer.get_best_front()]
+        with self.lock:
+            candidates = list(self.entries) + own
+            mask = optimizer._non_dominated_mask(np.array([fitness for _, fitness, _ in candidates], dtype=float))
+            archive, seen = [], set()
+            for entry, keep in zip(candidates, mask):
+                key = tuple(np.round(entry[1], 6))
+                if keep and key not in seen:
+                    seen.add(key)
+                    archive.append(entry)
+            archive = archive[:self.archive_size]
+            self.entries[:] = archive
+        return archive
+
+    def snapshot(self) -> List:
+        with self.lock:
+            return list(self.entries)
+
+class PortfolioOptimizer(IslandModelOptimizer):
+    """
+    알고리즘 포트폴리오 최적화기
+
+    NSGA-II, NSGA-III, SPEA2, ε-MOEA 를 각각 별도 프로세스에서 같은 시간 예산으로 동시에 실행한다.
+    exchange_interval 세대마다 각 알고리즘의 최선 프론트를 전역 비지배 아카이브에 합치고, 다른 알고리즘이 찾은 해를 받아간다.
+    각 알고리즘은 끝날 때도 최종 프론트를 아카이브에 합치므로 첫 교환 전에 종료해도 기여가 남는다.
+    """
+
+    def __init__(self, all_menus, nutrient_constraints, harmony_matrix, optimizer_classes: List[Type[DietOptimizer]] = None,
+                 exchange_interval: int = 5, exchange_size: int = 5, shared_archive_size: int = 100,
+                 optimizer_params: Dict = None, archive_limit: int = 50, quiet: bool = True):
+        if optimizer_classes is None:
+            from nsga2_optimizer import NSGA2Optimizer
+            from nsga3_optimizer import NSGA3Optimizer
+            from spea2_optimizer import SPEA2Optimizer
+            from emoea_optimizer import EpsilonMOEAOptimizer
+            optimizer_classes = [NSGA2Optimizer, NSGA3Optimizer, SPEA2Optimizer, EpsilonMOEAOptimizer]
+        super().__init__(all_menus, nutrient_constraints, harmony_matrix, optimizer_cls=optimizer_classes[0],
+                         n_islands=len(optimizer_classes), migration_interval=exchange_interval,
+                         migration_size=exchange_size, optimizer_params=optimizer_params,
+                         archive_limit=archive_limit, quiet=quiet)
+        self.optimizer_classes = list(optimizer_classes)
+        self.shared_archive_size = shared_archive_size
+        self.contributions: Dict[str, int] = {}  # 알고리즘 → 최종 공유 아카이브에 남은 해 수
+
+    def _describe(self) -> str:
+        names = ', '.join(cls.__name__ for cls in self.optimizer_classes)
+        return f"Portfolio: {names} (shared archive, every {self.migration_interval} generations)"
+
+    def _island_classes(self) -> List[Type[DietOptimizer]]:
+        return self.optimizer_classes
+
+    def _make_channel(self, manager):
+        return SharedArchiveChannel(manager.list(), manager.Lock(), self.shared_archive_size)
+
+    def _after_islands(self, channel: SharedArchiveChannel, codec: _DietCodec):
+        entries = channel.snapshot()
+        if entries:
+            self._update_best_front([codec.decode(encoded) for encoded, _, _ in entries],
+                                    np.array([fitness for _, fitness, _ in entries]))
+        self.contributions = {cls.__name__: 0 for cls in self.optimizer_classes}
+        for _, _, island_id in entries:
+            self.contributions[self.optimizer_classes[island_id].__name__] += 1
+        print(f"Shared archive: {len(entries)} solutions {self.contributions}")
+
+    def optimize(self, diet_db: Diet, initial_diet: Diet, generations: int = 100,
+                 time_limit_s: Optional[float] = None, max_evaluations: Optional[int] = None,
+                 seed: int = None) -> List[Diet]:
+        """모든 알고리즘을 같은 시간 예산(time_limit_s)으로 실행하고 합쳐진 비지배 프론트의 식단 반환 (적합도와 함께는 get_best_front)"""
+        super().optimize(diet_db, initial_diet, generations, time_limit_s, max_evaluations, seed)
+        return [diet for diet, _ in self.get_best_front()]
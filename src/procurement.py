@@ -0,0 +1,248 @@
+import threading
+import numpy as np
+import scipy.sparse as sp
+from typing import List, Dict, Tuple, Union, Sequence, Optional
+from Diet_class import Diet, Menu, get_servings, MEALS_PER_DAY
+
+COST_BOUND_CATEGORIES = ['밥', '국', '주찬', '부찬', '부찬', '김치']
+
+class ServingsCostCurve:
+    """
+    인분 수에 따른 구매 비용 계단 함수
+
+    비용은 breakpoints[i] 인분을 넘는 순간 step_increments[i] 만큼 오른다 (포장 수가 늘어나는 지점).
+    cost_at(s) = base_cost + (s 보다 작은 브레이크포인트의 증가분 합).
+    곡선은 [min_servings, max_servings] 에서만 계산되므로 범위 밖 인분은 ValueError.
+    """
+
+    def __init__(self, min_servings: float, max_servings: float, base_cost: float, breakpoints: np.ndarray,
+                 step_increments: np.ndarray, jump_ingredients: List[List[str]]):
+        self.min_servings = min_servings
+        self.max_servings = max_servings
+        self.base_cost = base_cost
+        self.breakpoints = breakpoints
+        self.step_increments = step_increments
+        self.jump_ingredients = jump_ingredients
+        self._cumulative = np.concatenate([[0.0], np.cumsum(step_increments)])
+
+    @property
+    def step_costs(self) -> np.ndarray:
+        """각 브레이크포인트 직후의 비용"""
+        return self.base_cost + self._cumulative[1:]
+
+    def _check_range(self, servings):
+        servings = np.asarray(servings, dtype=float)
+        if servings.size and (servings.min() < self.min_servings or servings.max() > self.max_servings):
+            raise ValueError(f"인분 수는 곡선 범위 {self.min_servings:g}~{self.max_servings:g} 안이어야 합니다 "
+                             f"(입력: {servings.min():g}~{servings.max():g})")
+
+    def cost_at(self, servings):
+        """인분(스칼라 또는 배열)의 비용 — min_servings ~ max_servings 범위 안에서 calculate_actual_cost 와 같음"""
+        self._check_range(servings)
+        costs = self.base_cost + self._cumulative[np.searchsorted(self.breakpoints, servings, side='left')]
+        return float(costs) if np.ndim(costs) == 0 else costs
+
+    def next_breakpoint(self, servings: float) -> Optional[Tuple[float, float, List[str]]]:
+        """servings 이상에서 처음으로 비용이 오르는 지점 (인분, 증가액, 포장이 늘어나는 식재료), 없으면 None"""
+        self._check_range(servings)
+        i = int(np.searchsorted(self.breakpoints, servings, side='left'))
+        if i >= len(self.breakpoints):
+            return None
+        return float(self.breakpoints[i]), float(self.step_increments[i]), self.jump_ingredients[i]
+
+class ProcurementCostEngine:
+    """
+    식재료 구매 비용 계산 엔진 (calculate_actual_cost 의 벡터화 버전)
+
+    메뉴 × 식재료 1인분 그램 희소 행렬 G 와 식재료별 포장 단위/포장 가격 벡터를 한 번만 만들어 두고,
+    식단들의 메뉴 사용량 행렬 U (메뉴별 배식 비율 합) 로 필요 그램 = U @ G × 인분,
+    포장 수 = ceil(필요 그램 / 포장 단위), 비용 = 포장 수 @ 포장 가격을 한 번에 계산한다.
+    식단 하나/개체군 전체, 인분 하나/인분 벡터(예: 20~200명)를 모두 같은 호출로 처리한다.
+    """
+
+    def __init__(self, menus: Sequence[Menu]):
+        self.menu_to_index: Dict[str, int] = {}
+        self.ingredient_to_index: Dict[str, int] = {}
+        self.menus: List[Menu] = []
+        self._package_size: List[float] = []
+        self._package_price: List[float] = []
+        self._entries: List[Tuple[int, int, float]] = []  # (메뉴, 식재료, 1인분 g)
+        self._grams = None
+        self._lock = threading.RLock()  # 처음 보는 메뉴 등록과 행렬 재구성을 여러 스레드에서 안전하게
+        for menu in menus:
+            self._register(menu)
+
+    @classmethod
+    def from_diet(cls, diet_db: Diet) -> 'ProcurementCostEngine':
+        return cls([menu for meal in diet_db.meals for menu in meal.menus])
+
+    def _register(self, menu: Menu) -> int:
+        idx = self.menu_to_index.get(menu.name)
+        if idx is not None:
+            return idx
+        with self._lock:
+            return self._append_menu(menu)
+
+    def _append_menu(self, menu: Menu) -> int:
+        if menu.name in self.menu_to_index:
+            return self.menu_to_index[menu.name]
+        idx = len(self.menus)
+        self.menu_to_index[menu.name] = idx
+        self.menus.append(menu)
+        for ing in menu.ingredients:
+            col = self.ingredient_to_index.get(ing.name)
+            if col is None:
+                col = len(self._package_size)
+                self.ingredient_to_index[ing.name] = col
+                self._package_size.append(float(ing.package_size))
+                self._package_price.append(float(ing.package_size * ing.price_per_g))
+            self._entries.append((idx, col, float(ing.amount_g)))
+        self._grams = None
+        return idx
+
+    @property
+    def grams(self) -> sp.csr_matrix:
+        """메뉴 × 식재료 1인분 그램 행렬 (같은 메뉴에 같은 식재료가 여러 번 있으면 합산)"""
+        with self._lock:
+            if self._grams is None:
+                self._build_grams()
+            return self._grams
+
+    def _build_grams(self):
+        rows, cols, data = zip(*self._entries) if self._entries else ((), (), ())
+        self._grams = sp.csr_matrix((data, (rows, cols)), shape=(len(self.menus), len(self._package_size)))
+        self._grams.sum_duplicates()
+        self.package_size = np.array(self._package_size, dtype=float)
+        self.package_price = np.array(self._package_price, dtype=float)
+
+    def usage_matrix(self, diets: Sequence[Diet]) -> sp.csr_matrix:
+        """식단 × 메뉴 사용량 (메뉴별 배식 비율 합), 처음 보는 메뉴는 자동 등록"""
+        rows, cols, data = [], [], []
+        for row, diet in enumerate(diets):
+            for meal in diet.meals:
+                for menu in meal.menus:
+                    rows.append(row)
+                    cols.append(self._register(menu))
+                    data.append(float(menu.serving_ratio))
+        return sp.csr_matrix((data, (rows, cols)), shape=(len(diets), len(self.menus)))
+
+    def gram_totals(self, diets: Sequence[Diet]) -> np.ndarray:
+        """식단 × 식재료 1인분 기준 필요 그램"""
+        with self._lock:
+            usage = self.usage_matrix(diets)
+            return (usage @ self.grams).toarray()
+
+    def _packages(self, grams: np.ndarray, servings: np.ndarray) -> np.ndarray:
+        needed = grams[..., None, :] * servings[:, None]
+        # 부동소수 누적 오차로 포장 단위 경계에서 한 포장이 더 잡히지 않도록 반올림 후 올림
+        return np.ceil(np.round(needed, 9) / self.package_size)
+
+    def package_counts(self, diets: Union[Diet, Sequence[Diet]], servings=None) -> np.ndarray:
+        """식재료별 포장 수 — (식단 수, 인분 수, 식재료 수), 단일 식단/단일 인분이면 해당 축 생략"""
+        single_diet = isinstance(diets, Diet)
+        servings_array, single_servings = self._servings_array(servings)
+        packages = self._packages(self.gram_totals([diets] if single_diet else diets), servings_array)
+        return self._squeeze(packages, single_diet, single_servings)
+
+    def cost(self, diets: Union[Diet, Sequence[Diet]], servings=None):
+        """
+        구매 비용 — 식단/식단 목록과 인분/인분 벡터를 받아
+        float, (식단 수,), (인분 수,), (식단 수, 인분 수) 중 입력에 맞는 모양으로 반환
+        """
+        single_diet = isinstance(diets, Diet)
+        servings_array, single_servings = self._servings_array(servings)
+        grams = self.gram_totals([diets] if single_diet else diets)
+        costs = self._packages(grams, servings_array) @ self.package_price
+        costs = self._squeeze(costs, single_diet, single_servings)
+        return float(costs) if single_diet and single_servings else costs
+
+    def cost_curves(self, diets: Sequence[Diet], min_servings: float = 1, max_servings: float = 200) -> List[ServingsCostCurve]:
+        """
+        식단별 인분-비용 곡선을 식재료 총량에서 해석적으로 계산 (인분마다 재평가하지 않음)
+
+        식재료 j 의 포장 수 ceil(g_j·s / P_j) 는 s = k·P_j / g_j 를 넘을 때 하나씩 늘어나므로,
+        범위 안의 k 들을 모두 모아 정렬하면 비용 계단 함수가 된다.
+        """
+        grams = self.gram_totals(list(diets))
+        names = np.array(list(self.ingredient_to_index.keys()), dtype=object)
+        curves = []
+        for row in grams:
+            used = np.flatnonzero(row > 0)
+            per_serving = row[used]
+            sizes = self.package_size[used]
+            base_packages = np.ceil(np.round(per_serving * min_servings, 9) / sizes)
+            top_packages = np.ceil(np.round(per_serving * max_servings, 9) / sizes)
+            jumps = (top_packages - base_packages).astype(int)
+
+            ingredient = np.repeat(np.arange(len(used)), jumps)
+            offsets = np.arange(len(ingredient)) - np.repeat(np.cumsum(jumps) - jumps, jumps)
+            points = np.round((base_packages[ingredient] + offsets) * sizes[ingredient] / per_serving[ingredient], 9)
+            order = np.argsort(points, kind='stable')
+            points, ingredient = points[order], ingredient[order]
+
+            breakpoints, starts = np.unique(points, return_index=True)
+            increments = np.add.reduceat(self.package_price[used][ingredient], starts) if len(points) else np.zeros(0)
+            groups = np.split(ingredient, starts[1:]) if len(points) else []
+            curves.append(ServingsCostCurve(
+                min_servings, max_servings, float(base_packages @ self.package_price[used]),
+                breakpoints, increments, [names[used[group]].tolist() for group in groups],
+            ))
+        return curves
+
+    def cost_curve(self, diet: Diet, min_servings: float = 1, max_servings: float = 200) -> ServingsCostCurve:
+        return self.cost_curves([diet], min_servings, max_servings)[0]
+
+    def menu_costs(self, ratio: float, servings=None) -> np.ndarray:
+        """메뉴 하나만으로 이뤄진 식단의 비용 (메뉴 수,) — 0인 칸은 포장도 0이라 희소 원소만 계산"""
+        if servings is None:
+            servings = get_servings()
+        grams = self.grams
+        packages = grams.copy()
+        packages.data = np.ceil(np.round(grams.data * ratio * servings, 9) / self.package_size[grams.indices])
+        return np.asarray(packages @ self.package_price).ravel()
+
+    def cost_bounds(self, diet_db: Diet, servings=None, n_days: int = 7,
+                    categories: Sequence[str] = COST_BOUND_CATEGORIES) -> Tuple[float, float]:
+        """calculate_cost_bounds 와 같은 기준: 카테고리별 최저가(0.6)/최고가(1.0) 메뉴로 채운 n_days 일 식단의 비용"""
+        if servings is None:
+            servings = get_servings()
+        unique_menus: Dict[str, Menu] = {}
+        for meal in diet_db.meals:
+            for menu in meal.menus:
+                unique_menus.setdefault(menu.name, menu)
+        db_menus = list(unique_menus.values())
+        indices = np.array([self._register(menu) for menu in db_menus], dtype=int)
+        min_costs = self.menu_costs(0.6, servings)[indices]
+        max_costs = self.menu_costs(1.0, servings)[indices]
+
+        cheapest, expensive = {}, {}
+        for position, menu in enumerate(db_menus):
+            category = menu.category
+            if category not in cheapest or min_costs[position] < min_costs[cheapest[category]]:
+                cheapest[category] = position
+            if max_costs[position] > (max_costs[expensive[category]] if category in expensive else 0):
+                expensive[category] = position
+
+        bounds = []
+        for chosen, ratio in ((cheapest, 0.6), (expensive, 1.0)):
+            grams = np.zeros(self.grams.shape[1])
+            for category in categories:
+                if category in chosen:
+                    grams += self.grams[indices[chosen[category]]].toarray().ravel() * ratio * n_days * MEALS_PER_DAY
+            bounds.append(float(self._packages(grams, np.array([float(servings)]))[0] @ self.package_price))
+        return bounds[0], bounds[1]
+
+    @staticmethod
+    def _servings_array(servings) -> Tuple[np.ndarray, bool]:
+        if servings is None:
+            servings = get_servings()
+        single = np.ndim(servings) == 0
+        return np.atleast_1d(np.asarray(servings, dtype=float)), single
+
+    @staticmethod
+    def _squeeze(values: np.ndarray, single_diet: bool, single_servings: bool) -> np.ndarray:
+        if single_servings:
+            values = values[:, 0]
+        if single_diet:
+            values = values[0]
+        return values
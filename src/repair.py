@@ -0,0 +1,118 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import linprog
+from typing import List, Tuple
+from Diet_class import Diet, Meal, NutrientConstraints
+from nutrient_matrix import NutrientMatrix, get_nutrient_matrix
+
+class NutrientRepair:
+    """
+    영양 제약 위반 식단의 배식 비율 보정
+
+    메뉴 선택은 그대로 두고 serving_ratio 만 [min_ratio, max_ratio] 안에서 조정해
+    주간 일평균 영양소가 (min, max) 범위에 들어가도록 한다. 일평균 영양소는 비율에 대해 선형이므로
+    |r - r0| 합을 최소화하는 LP 로 풀고, 범위를 맞출 수 없으면 위반량(탄성 변수)에 큰 벌점을 줘 최대한 가깝게 맞춘다.
+    위반 식단들은 블록 대각 LP 하나로 묶어 한 번에 푼다.
+    """
+
+    def __init__(self, nutrient_constraints: NutrientConstraints, min_ratio: float = 0.6, max_ratio: float = 1.0,
+                 violation_penalty: float = 1000.0, tolerance: float = 1e-6, nutrient_matrix: NutrientMatrix = None):
+        self.nutrient_constraints = nutrient_constraints
+        # 엔진이 있으면 엔진 소유 영양 행렬 (없으면 기본 행렬)
+        self.nutrient_matrix = nutrient_matrix if nutrient_matrix is not None else get_nutrient_matrix()
+        self.nutrients = list(nutrient_constraints.min_values.keys())
+        self.min_values = np.array([nutrient_constraints.min_values[n] for n in self.nutrients], dtype=float)
+        self.max_values = np.array([nutrient_constraints.max_values[n] for n in self.nutrients], dtype=float)
+        # 영양소마다 단위가 달라 상한값으로 나눠 같은 척도로 맞춤
+        self.scale = 1.0 / np.maximum(np.abs(self.max_values), 1e-9)
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+        self.violation_penalty = violation_penalty
+        # LP 해가 경계에 정확히 놓이면 HiGHS 오차로 경계를 살짝 넘어 validate_weekly_constraints(엄격 비교)에서 탈락하므로
+        # 상대 tolerance 만큼 안쪽으로 줄인 범위를 목표로 삼는다
+        self.tolerance = tolerance
+        self.target_min = self.min_values + tolerance * np.abs(self.min_values)
+        self.target_max = np.maximum(self.max_values - tolerance * np.abs(self.max_values), self.target_min)
+        self.n_repaired = 0
+        self.n_failed = 0
+
+    def _daily_matrix(self, diet: Diet) -> Tuple[np.ndarray, np.ndarray]:
+        """(영양소 × 메뉴) 일평균 기여 행렬과 현재 비율"""
+        menus = [menu for meal in diet.meals for menu in meal.menus]
+        days = max(len(diet.meals) // 3, 1)
+        nutrient_matrix = self.nutrient_matrix
+        ids = [nutrient_matrix.register(menu) for menu in menus]
+        matrix = nutrient_matrix.select(self.nutrients)[ids].T.astype(float) / days
+        ratios = np.array([menu.serving_ratio for menu in menus], dtype=float)
+        return matrix.reshape(len(self.nutrients), len(menus)), ratios
+
+    def violation(self, matrix: np.ndarray, ratios: np.ndarray) -> np.ndarray:
+        daily = matrix @ ratios
+        return np.maximum(self.min_values - daily, 0) + np.maximum(daily - self.max_values, 0)
+
+    def repair_batch(self, diets: List[Diet]) -> List[Diet]:
+        """위반 식단만 골라 보정한 새 식단 목록 반환 (입력 식단과 메뉴 객체는 수정하지 않음)"""
+        systems = [self._daily_matrix(diet) for diet in diets]
+        targets = [i for i, (matrix, ratios) in enumerate(systems)
+                   if len(ratios) and np.any(self.violation(matrix, ratios) > 0)]
+        if not targets:
+            return list(diets)
+
+        n_nutrients = len(self.nutrients)
+        blocks, b_parts, c_parts, bounds, offsets = [], [], [], [], []
+        offset = 0
+        for i in targets:
+            matrix, ratios = systems[i]
+            scaled = matrix * self.scale[:, None]
+            n = len(ratios)
+            eye = sp.identity(n, format='csr')
+            zeros_nk = sp.csr_matrix((n, n_nutrients))
+            eye_k = sp.identity(n_nutrients, format='csr')
+            # 변수 순서: r(n), t(n), 부족 여유(k), 초과 여유(k)
+            blocks.append(sp.vstack([
+                sp.hstack([eye, -eye, zeros_nk, zeros_nk]),             #  r - t <= r0
+                sp.hstack([-eye, -eye, zeros_nk, zeros_nk]),            # -r - t <= -r0
+                sp.hstack([sp.csr_matrix(-scaled), sp.csr_matrix((n_nutrients, n)), -eye_k, sp.csr_matrix((n_nutrients, n_nutrients))]),
+                sp.hstack([sp.csr_matrix(scaled), sp.csr_matrix((n_nutrients, n)), sp.csr_matrix((n_nutrients, n_nutrients)), -eye_k]),
+            ]))
+            b_parts.append(np.concatenate([ratios, -ratios, -self.target_min * self.scale, self.target_max * self.scale]))
+            c_parts.append(np.concatenate([np.zeros(n), np.ones(n), np.full(2 * n_nutrients, self.violation_penalty)]))
+            bounds.extend([(self.min_ratio, self.max_ratio)] * n + [(0, None)] * (n + 2 * n_nutrients))
+            offsets.append(offset)
+            offset += 2 * n + 2 * n_nutrients
+
+        result = linprog(np.concatenate(c_parts), A_ub=sp.block_diag(blocks, format='csr'), b_ub=np.concatenate(b_parts),
+                         bounds=bounds, method='highs')
+        repaired = list(diets)
+        if result.status != 0:
+            self.n_failed += len(targets)
+            return repaired
+
+        for i, start in zip(targets, offsets):
+            matrix, ratios = systems[i]
+            n = len(ratios)
+            repaired[i] = self._with_ratios(diets[i], result.x[start:start + n])
+            # 여유 변수가 0 이고, 보정된 비율로 다시 계산한 일평균이 원래 범위 안(검증과 같은 엄격 비교)일 때만 성공
+            slack = result.x[start + 2 * n:start + 2 * n + 2 * n_nutrients]
+            new_ratios = np.clip(result.x[start:start + n], self.min_ratio, self.max_ratio)
+            daily = matrix @ new_ratios
+            if np.all(slack <= 1e-9) and not np.any((daily < self.min_values) | (daily > self.max_values)):
+                self.n_repaired += 1
+            else:
+                self.n_failed += 1
+        return repaired
+
+    def repair(self, diet: Diet) -> Diet:
+        return self.repair_batch([diet])[0]
+
+    def _with_ratios(self, diet: Diet, ratios: np.ndarray) -> Diet:
+        meals = []
+        position = 0
+        for meal in diet.meals:
+            menus = []
+            for menu in meal.menus:
+                ratio = float(np.clip(ratios[position], self.min_ratio, self.max_ratio))
+                menus.append(menu.with_ratio(ratio))
+                position += 1
+            meals.append(Meal(menus, meal.date, meal.meal_type))
+        return Diet(meals)
@@ -0,0 +1,178 @@
+import os
+import pickle
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as pads
+import pyarrow.parquet as pq
+from datetime import datetime
+from typing import List, Dict, Optional
+
+OBJECTIVES = ['nutrition', 'cost', 'harmony', 'diversity']
+
+METRIC_SCHEMA = pa.schema([
+    ('dataset', pa.string()),
+    ('algorithm', pa.string()),
+    ('run', pa.int32()),
+    ('metric', pa.string()),
+    ('value', pa.float64()),
+])
+
+FRONT_SCHEMA = pa.schema(
+    [('dataset', pa.string()), ('algorithm', pa.string()), ('run', pa.int32()), ('solution', pa.int32())]
+    + [(objective, pa.float64()) for objective in OBJECTIVES]
+)
+
+def _build_filter(dataset=None, algorithm=None, run=None, metric=None):
+    """값 또는 값 목록으로 pyarrow 필터식 생성 (파일 스캔 단계에서 걸러짐)"""
+    expression = None
+    for column, value in (('dataset', dataset), ('algorithm', algorithm), ('run', run), ('metric', metric)):
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            condition = pads.field(column).isin(list(value))
+        else:
+            condition = pads.field(column) == value
+        expression = condition if expression is None else expression & condition
+    return expression
+
+class ResultsStore:
+    """
+    벤치마크 결과를 Parquet 파트 파일로 누적 저장하는 컬럼형 저장소
+
+    - metrics/: (dataset, algorithm, run, metric, value) 한 행당 하나의 지표 값
+    - fronts/: (dataset, algorithm, run, solution, 목적함수 4개) 각 실행의 최종 파레토 해 적합도
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.metrics_dir = os.path.join(root, 'metrics')
+        self.fronts_dir = os.path.join(root, 'fronts')
+
+    def _write_part(self, directory: str, table: pa.Table):
+        if table.num_rows == 0:
+            return
+        os.makedirs(directory, exist_ok=True)
+        part_name = f"part-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        pq.write_table(table, os.path.join(directory, part_name))
+
+    def append_results(self, dataset: str, algorithm: str, results: Dict[str, List[float]],
+                       fronts: Optional[List[np.ndarray]] = None, run_offset: int = 0):
+        """
+        한 알고리즘의 여러 실행 결과를 한 번에 추가 (기존 파일은 수정하지 않음)
+
+        Args:
+            dataset: 데이터셋(초기 식단) 이름
+            algorithm: 알고리즘 이름
+            results: {지표명: [실행별 값]}
+            fronts: 실행별 최종 파레토 해 적합도 행렬 (n_solutions × 4)
+            run_offset: 실행 번호 시작값 (이어서 추가할 때 사용)
+        """
+        rows = {'dataset': [], 'algorithm': [], 'run': [], 'metric': [], 'value': []}
+        for metric, values in results.items():
+            for run, value in enumerate(values, run_offset + 1):
+                rows['dataset'].append(dataset)
+                rows['algorithm'].append(algorithm)
+                rows['run'].append(run)
+                rows['metric'].append(metric)
+                rows['value'].append(float(value))
+        self._write_part(self.metrics_dir, pa.table(rows, schema=METRIC_SCHEMA))
+
+        if fronts:
+            front_rows = {name: [] for name in FRONT_SCHEMA.names}
+            for run, front in enumerate(fronts, run_offset + 1):
+                front = np.asarray(front, dtype=np.float64).reshape(-1, len(OBJECTIVES))
+                for solution, fitness in enumerate(front):
+                    front_rows['dataset'].append(dataset)
+                    front_rows['algorithm'].append(algorithm)
+                    front_rows['run'].append(run)
+                    front_rows['solution'].append(solution)
+                    for objective, value in zip(OBJECTIVES, fitness):
+                        front_rows[objective].append(float(value))
+            self._write_part(self.fronts_dir, pa.table(front_rows, schema=FRONT_SCHEMA))
+
+    def _read(self, directory: str, schema: pa.Schema, columns: Optional[List[str]], **filters) -> pd.DataFrame:
+        if not os.path.isdir(directory) or not os.listdir(directory):
+            return schema.empty_table().to_pandas() if columns is None else schema.empty_table().select(columns).to_pandas()
+        dataset = pads.dataset(directory, format='parquet', schema=schema)
+        return dataset.to_table(columns=columns, filter=_build_filter(**filters)).to_pandas()
+
+    def read_metrics(self, dataset=None, algorithm=None, run=None, metric=None, columns: List[str] = None) -> pd.DataFrame:
+        return self._read(self.metrics_dir, METRIC_SCHEMA, columns, dataset=dataset, algorithm=algorithm, run=run, metric=metric)
+
+    def read_fronts(self, dataset=None, algorithm=None, run=None, columns: List[str] = None) -> pd.DataFrame:
+        return self._read(self.fronts_dir, FRONT_SCHEMA, columns, dataset=dataset, algorithm=algorithm, run=run)
+
+    def read_front_matrices(self, dataset: str, algorithm: str) -> Dict[int, np.ndarray]:
+        """실행 번호 → 파레토 해 적합도 행렬"""
+        df = self.read_fronts(dataset=dataset, algorithm=algorithm).sort_values(['run', 'solution'])
+        return {int(run): group[OBJECTIVES].to_numpy() for run, group in df.groupby('run')}
+
+    def datasets(self) -> List[str]:
+        return sorted(self.read_metrics(columns=['dataset'])['dataset'].unique())
+
+    def next_run_offset(self, dataset: str, algorithm: str) -> int:
+        runs = self.read_metrics(dataset=dataset, algorithm=algorithm, columns=['run'])['run']
+        return int(runs.max()) if len(runs) else 0
+
+    def to_results_dict(self, dataset: str = None, algorithms: List[str] = None) -> Dict[str, Dict[str, List[float]]]:
+        """PerformanceEvaluator 형식 {알고리즘: {지표: [실행별 값]}} 으로 변환"""
+        df = self.read_metrics(dataset=dataset, algorithm=algorithms).sort_values(['algorithm', 'metric', 'run'])
+        results = {}
+        for (algorithm, metric), group in df.groupby(['algorithm', 'metric'], sort=False):
+            results.setdefault(algorithm, {})[metric] = group['value'].tolist()
+        if algorithms is not None:
+            results = {name: results[name] for name in algorithms if name in results}
+        return results
+
+    def read_long_dataframe(self, algorithms: List[str] = None, metrics: List[str] = None) -> pd.DataFrame:
+        """분석 노트북용 긴 형식 (Algorithm, Dataset, Dataset_ID, Run, Metric, Value)"""
+        df = self.read_metrics(algorithm=algorithms, metric=metrics)
+        dataset_ids = {name: i for i, name in enumerate(sorted(df['dataset'].unique()), 1)}
+        return pd.DataFrame({
+            'Algorithm': df['algorithm'],
+            'Dataset': df['dataset'],
+            'Dataset_ID': df['dataset'].map(dataset_ids),
+            'Run': df['run'],
+            'Metric': df['metric'],
+            'Value': df['value'],
+        })
+
+    def import_pickle_results(self, pickle_path: str, dataset: str):
+        """기존 {알고리즘: {지표: [값]}} 피클 파일을 저장소로 옮김"""
+        with open(pickle_path, 'rb') as f:
+            legacy = pickle.load(f)
+        for algorithm, results in legacy.items():
+            self.append_results(dataset, algorithm, results)
+
+    def import_excel_results(self, excel_path: str, dataset: str, metrics: List[str] = None):
+        """
+        save_combined_results_to_excel 로 저장된 'Raw Results' 시트를 저장소로 옮김
+
+        지표 제목 행은 metrics (기본값: PerformanceEvaluator 의 지표 이름) 의 대문자 이름과 일치하는 행으로 찾는다.
+        """
+        if metrics is None:
+            from performance_metrics import PerformanceEvaluator
+            metrics = PerformanceEvaluator.METRICS + PerformanceEvaluator.OPTIONAL_METRICS
+        titles = {metric.upper(): metric for metric in metrics}
+        raw = pd.read_excel(excel_path, sheet_name='Raw Results', header=None)
+        results = {}
+        metric = None
+        n_runs = 0
+        for row in raw.itertuples(index=False):
+            first = row[0]
+            if not isinstance(first, str):
+                continue
+            if first == 'Algorithm':
+                n_runs = sum(1 for value in row[1:] if isinstance(value, str) and value.startswith('Run '))
+                continue
+            if first in titles and not any(pd.notna(value) for value in row[1:]):
+                metric = titles[first]
+                continue
+            if metric is not None:
+                # 빈 셀은 계산할 수 없었던 실행(nan)이므로 실행 번호가 밀리지 않게 nan 으로 유지
+                values = [float(value) if pd.notna(value) else np.nan for value in row[1:1 + n_runs]]
+                results.setdefault(first, {})[metric] = values
+        for algorithm, algorithm_results in results.items():
+            self.append_results(dataset, algorithm, algorithm_results)
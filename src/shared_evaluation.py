@@ -0,0 +1,285 @@
+import threading
+import numpy as np
+import scipy.sparse as sp
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import List, Dict, Tuple, Optional
+from Diet_class import Diet, Menu, MEALS_PER_DAY
+from evaluation_function import (nutrition_score_from_totals, cost_score_from_bounds, harmony_pair_sum_indices,
+                                 simpson_diversity, HARMONY_SCOPES)
+from procurement import ProcurementCostEngine
+
+class SharedArrays:
+    """
+    이름 → ndarray 묶음을 배열마다 공유 메모리 블록 하나에 올린 것
+
+    spec (블록 이름, 모양, dtype) 만 다른 프로세스에 넘기면 attach 로 복사 없이 같은 메모리를 NumPy 뷰로 쓴다.
+    만든 쪽(owner)이 close 할 때 블록을 해제(unlink)한다.
+    """
+
+    def __init__(self, blocks: Dict[str, shared_memory.SharedMemory], spec: Dict[str, Tuple[str, Tuple, str]], owner: bool):
+        self._blocks = blocks
+        self.spec = spec
+        self.owner = owner
+        self.arrays: Dict[str, np.ndarray] = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=blocks[name].buf)
+            for name, (_, shape, dtype) in spec.items()
+        }
+
+    @classmethod
+    def create(cls, arrays: Dict[str, np.ndarray]) -> 'SharedArrays':
+        blocks, spec = {}, {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks[name] = block
+            spec[name] = (block.name, array.shape, array.dtype.str)
+        shared = cls(blocks, spec, owner=True)
+        for name, array in arrays.items():
+            shared.arrays[name][...] = array
+        return shared
+
+    @classmethod
+    def empty(cls, shapes: Dict[str, Tuple[Tuple, np.dtype]]) -> 'SharedArrays':
+        return cls.create({name: np.zeros(shape, dtype=dtype) for name, (shape, dtype) in shapes.items()})
+
+    @classmethod
+    def attach(cls, spec: Dict[str, Tuple[str, Tuple, str]]) -> 'SharedArrays':
+        return cls({name: shared_memory.SharedMemory(name=block_name) for name, (block_name, _, _) in spec.items()},
+                   spec, owner=False)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def close(self):
+        self.arrays = {}
+        for block in self._blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+        self._blocks = {}
+
+def compile_catalogue(engine, menus: List[Menu]) -> Tuple[Dict[str, np.ndarray], Dict[str, int]]:
+    """
+    평가에 필요한 카탈로그 데이터를 메뉴 인덱스 기준 배열로 변환
+
+    영양(float32 메뉴 × 제약 영양소), 식재료 그램 CSR 과 포장 단위/가격, 조화 행렬 CSR 과 메뉴 → 조화 행렬 인덱스,
+    영양 제약 (하한/상한/가중치) 을 담는다. Menu 객체 그래프는 워커로 보내지 않는다.
+    """
+    unique: Dict[str, Menu] = {}
+    for menu in menus:
+        unique.setdefault(menu.name, menu)
+    catalogue_menus = list(unique.values())
+    menu_to_index = {name: i for i, name in enumerate(unique)}
+
+    nc = engine.nutrient_constraints
+    nutrients = list(nc.min_values)
+    nutrient_matrix = engine.tables.nutrient_matrix
+    rows = [nutrient_matrix.register(menu) for menu in catalogue_menus]
+    procurement = ProcurementCostEngine(catalogue_menus)
+    grams = procurement.grams
+    harmony = engine.tables.harmony_index.matrix  # CSR 세 배열만 공유 (밀집 N×N 행렬은 만들지 않음)
+
+    arrays = {
+        'nutrients': nutrient_matrix.select(nutrients)[rows],
+        'constraints': np.array([[nc.min_values[n] for n in nutrients], [nc.max_values[n] for n in nutrients],
+                                 [nc.weights[n] for n in nutrients]], dtype=float),
+        'grams_data': grams.data.astype(float),
+        'grams_indices': grams.indices.astype(np.int32),
+        'grams_indptr': grams.indptr.astype(np.int64),
+        'package_size': procurement.package_size,
+        'package_price': procurement.package_price,
+        'harmony_data': harmony.data.astype(float),
+        'harmony_indices': harmony.indices.astype(np.int32),
+        'harmony_indptr': harmony.indptr.astype(np.int64),
+        'harmony_ids': np.array([engine.tables.menu_to_index.get(name, -1) for name in unique], dtype=np.int64),
+    }
+    return arrays, menu_to_index
+
+# --- 워커 프로세스 ---
+
+_worker_state: Optional[Dict] = None
+
+def _attach_worker(catalogue_spec: Dict, population_spec: Dict):
+    """워커 초기화: 카탈로그/개체군 공유 메모리에 붙고 CSR 행렬 등 뷰만 준비 (데이터 복사 없음)"""
+    global _worker_state
+    catalogue = SharedArrays.attach(catalogue_spec)
+    population = SharedArrays.attach(population_spec)
+    n_menus = len(catalogue['nutrients'])
+    grams = sp.csr_matrix((catalogue['grams_data'], catalogue['grams_indices'], catalogue['grams_indptr']),
+                          shape=(n_menus, len(catalogue['package_size'])))
+    n_harmony = len(catalogue['harmony_indptr']) - 1
+    harmony = sp.csr_matrix((catalogue['harmony_data'], catalogue['harmony_indices'], catalogue['harmony_indptr']),
+                            shape=(n_harmony, n_harmony))
+    _worker_state = {
+        'catalogue': catalogue,
+        'population': population,
+        'grams_t': grams.T.tocsr(),
+        'harmony': harmony,
+        'max_harmony': float(harmony.max()) if harmony.nnz else 0.0,
+    }
+
+def _evaluate_rows(start: int, stop: int) -> int:
+    """개체군 버퍼의 [start, stop) 행을 평가해 공유 적합도 버퍼에 기록 (작업 인자는 인덱스 범위뿐)"""
+    state = _worker_state
+    catalogue, population = state['catalogue'], state['population']
+    servings, min_cost, max_cost, scope_code = population['params']
+    min_values, max_values, weights = catalogue['constraints']
+    scope = HARMONY_SCOPES[int(scope_code)]
+
+    for row in range(start, stop):
+        n_meals = int(population['lengths'][row])
+        ids = population['menu_ids'][row, :n_meals]
+        filled = ids >= 0
+        meal_idx = np.nonzero(filled)[0]
+        ids = ids[filled].astype(np.int64)
+        ratios = population['ratios'][row, :n_meals][filled]
+
+        # 영양: 일별 합계
+        days = n_meals // MEALS_PER_DAY
+        day_idx = meal_idx // MEALS_PER_DAY
+        in_days = day_idx < days
+        totals = np.zeros((days, catalogue['nutrients'].shape[1]))
+        np.add.at(totals, day_idx[in_days], catalogue['nutrients'][ids[in_days]] * ratios[in_days, None])
+        nutrition = nutrition_score_from_totals(totals, min_values, max_values, weights)
+
+        # 비용: 메뉴 사용량 → 식재료 그램 → 포장 수
+        usage = np.bincount(ids, weights=ratios, minlength=len(catalogue['nutrients']))
+        needed = state['grams_t'] @ usage
+        packages = np.ceil(np.round(needed * servings, 9) / catalogue['package_size'])
+        cost = cost_score_from_bounds(float(packages @ catalogue['package_price']), (min_cost, max_cost))
+
+        # 조화: scope 별 그룹 안의 모든 쌍
+        harmony_ids = catalogue['harmony_ids'][ids]
+        if scope == 'meal':
+            group_of = meal_idx
+        elif scope == 'day':
+            group_of = day_idx
+        else:
+            group_of = np.zeros(len(ids), dtype=np.int64)
+        harmony_sum, total_pairs = 0.0, 0
+        for group in np.unique(group_of):
+            known = harmony_ids[(group_of == group) & (harmony_ids >= 0)]
+            pair_sum, pairs = harmony_pair_sum_indices(known, state['harmony'])
+            harmony_sum += pair_sum
+            total_pairs += pairs
+        max_harmony = state['max_harmony']
+        harmony = (harmony_sum / total_pairs / max_harmony * 100) if total_pairs and max_harmony > 0 else 0
+
+        counts = np.bincount(ids)
+        diversity = simpson_diversity(counts[counts > 0].tolist(), len(ids))
+
+        population['fitness'][row] = (nutrition, cost, harmony, diversity)
+    return stop - start
+
+# --- 부모 프로세스 ---
+
+class SharedEvaluationPool:
+    """
+    공유 메모리 기반 프로세스 풀 적합도 평가
+
+    컴파일된 카탈로그 배열을 한 번 공유 메모리에 올리고, 세대마다 개체군을 (메뉴 인덱스, 배식 비율) 배열로
+    공유 버퍼에 써 넣는다. 워커는 두 버퍼를 복사 없는 NumPy 뷰로 읽어 평가하고 결과를 공유 (n, 4) 적합도 버퍼에 쓴다.
+    작업마다 주고받는 것은 행 인덱스 범위뿐이다.
+    처음 보는 메뉴가 나오거나 개체군 버퍼가 작으면 버퍼를 다시 만들고 워커를 재시작한다.
+    공유 버퍼가 하나뿐이므로 여러 스레드(엔진을 공유하는 최적화기들)의 evaluate 는 _lock 으로 한 번에 하나씩 실행한다.
+    """
+
+    def __init__(self, engine, max_workers: int = 4, capacity: int = 256, chunk_size: int = 16):
+        self.engine = engine
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._menus: List[Menu] = list(engine.all_menus) + [menu for meal in engine.diet_db.meals for menu in meal.menus]
+        self.catalogue: Optional[SharedArrays] = None
+        self.population: Optional[SharedArrays] = None
+        self.menu_to_index: Dict[str, int] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._publish_catalogue()
+        self._allocate_population(capacity, 21, 6)
+
+    def _publish_catalogue(self):
+        arrays, self.menu_to_index = compile_catalogue(self.engine, self._menus)
+        if self.catalogue is not None:
+            self.catalogue.close()
+        self.catalogue = SharedArrays.create(arrays)
+        self._restart_pool()
+
+    def _allocate_population(self, capacity: int, max_meals: int, max_slots: int):
+        if self.population is not None:
+            self.population.close()
+        self.population = SharedArrays.empty({
+            'menu_ids': ((capacity, max_meals, max_slots), np.int32),
+            'ratios': ((capacity, max_meals, max_slots), np.float64),
+            'lengths': ((capacity,), np.int32),
+            'fitness': ((capacity, 4), np.float64),
+            'params': ((4,), np.float64),  # 인분, 최저 비용, 최고 비용, 조화 범위
+        })
+        self._restart_pool()
+
+    def _restart_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self.catalogue is not None and self.population is not None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_attach_worker,
+                                             initargs=(self.catalogue.spec, self.population.spec))
+
+    def _prepare(self, diets: List[Diet]):
+        """새 메뉴는 카탈로그에 추가하고, 개체군 버퍼가 작으면 키움"""
+        unknown = [menu for diet in diets for meal in diet.meals for menu in meal.menus if menu.name not in self.menu_to_index]
+        if unknown:
+            self._menus.extend(unknown)
+            self._publish_catalogue()
+        capacity, max_meals, max_slots = self.population['menu_ids'].shape
+        need_meals = max((len(diet.meals) for diet in diets), default=0)
+        need_slots = max((len(meal.menus) for diet in diets for meal in diet.meals), default=0)
+        if len(diets) > capacity or need_meals > max_meals or need_slots > max_slots:
+            self._allocate_population(max(len(diets), capacity), max(need_meals, max_meals), max(need_slots, max_slots))
+
+    def evaluate(self, diets: List[Diet], servings: int = None) -> np.ndarray:
+        """식단들의 적합도 (n, 4) — OptimizerEngine.fitness 와 같은 정의"""
+        if not diets:
+            return np.zeros((0, 4))
+        # _prepare → 버퍼 쓰기 → 제출 → 결과 복사 동안 다른 스레드가 같은 행을 덮어쓰지 못하게 잠금
+        with self._lock:
+            self._prepare(diets)
+            servings = servings if servings is not None else self.engine.current_servings
+            population = self.population
+            menu_ids, ratios = population['menu_ids'], population['ratios']
+            n_days = max(diets[0].n_days, 1)
+            if any(max(diet.n_days, 1) != n_days for diet in diets):
+                raise ValueError("한 번에 평가하는 식단들의 기간(일 수)이 같아야 합니다")
+
+            menu_ids[:len(diets)] = -1
+            for row, diet in enumerate(diets):
+                population['lengths'][row] = len(diet.meals)
+                for m, meal in enumerate(diet.meals):
+                    for slot, menu in enumerate(meal.menus):
+                        menu_ids[row, m, slot] = self.menu_to_index[menu.name]
+                        ratios[row, m, slot] = menu.serving_ratio
+            min_cost, max_cost = self.engine.tables.cost_bounds(servings, n_days)
+            population['params'][:] = (servings, min_cost, max_cost, HARMONY_SCOPES.index(self.engine.harmony_scope))
+
+            futures = [self._pool.submit(_evaluate_rows, start, min(start + self.chunk_size, len(diets)))
+                       for start in range(0, len(diets), self.chunk_size)]
+            wait(futures)
+            for future in futures:
+                future.result()
+            return population['fitness'][:len(diets)].copy()
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+            for shared in (self.catalogue, self.population):
+                if shared is not None:
+                    shared.close()
+            self.catalogue = self.population = None
+
+    def __enter__(self) -> 'SharedEvaluationPool':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,101 @@
+import numpy as np
+from typing import Callable, Iterable, List, Optional
+from Diet_class import Diet
+
+def diet_fingerprint(diet: Diet, decimals: int = 2) -> int:
+    """식단 전체(모든 끼니의 모든 메뉴 이름 + 반올림한 배식 비율)의 해시 — 중복 판정용"""
+    return hash(tuple((menu.name, round(float(menu.serving_ratio), decimals))
+                      for meal in diet.meals for menu in meal.menus))
+
+class SolutionArchive:
+    """
+    지문(fingerprint) 해시 집합으로 중복을 걸러내는 용량 제한 해 아카이브
+
+    항목은 식단 자체이거나 (식단, ...) 튜플이며, 리스트처럼 순회/인덱싱/clear 할 수 있다.
+    capacity 를 넘으면 priority(항목) 가 가장 낮은 항목 중 적합도 공간에서 가장 붐비는(최근접 거리가 가장 짧은) 것을,
+    적합도가 없으면 가장 오래된 것을 버려 우수하고 다양한 해를 남긴다.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, priority: Callable = None, decimals: int = 2):
+        self.capacity = capacity
+        self.priority = priority
+        self.decimals = decimals
+        self.clear()
+
+    def clear(self):
+        self._entries = []
+        self._fingerprints = []
+        self._fitnesses = []
+        self._index = set()
+
+    @staticmethod
+    def _diet_of(entry) -> Diet:
+        return entry[0] if isinstance(entry, tuple) else entry
+
+    def fingerprint(self, diet: Diet) -> int:
+        return diet_fingerprint(diet, self.decimals)
+
+    def __contains__(self, diet: Diet) -> bool:
+        return self.fingerprint(diet) in self._index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def __getitem__(self, item):
+        return self._entries[item]
+
+    def append(self, entry, fitness=None) -> bool:
+        """중복이 아니면 추가하고 True 반환 (용량 초과로 곧바로 밀려나면 False)"""
+        fingerprint = self.fingerprint(self._diet_of(entry))
+        if fingerprint in self._index:
+            return False
+        self._entries.append(entry)
+        self._fingerprints.append(fingerprint)
+        self._fitnesses.append(None if fitness is None else np.asarray(fitness, dtype=float))
+        self._index.add(fingerprint)
+        if self.capacity is not None and len(self._entries) > self.capacity:
+            self._evict()
+        return fingerprint in self._index
+
+    def extend(self, entries: Iterable):
+        for entry in entries:
+            self.append(entry)
+
+    def retain(self, predicate: Callable) -> None:
+        """predicate(항목) 이 참인 항목만 남김"""
+        kept = [i for i, entry in enumerate(self._entries) if predicate(entry)]
+        self._entries = [self._entries[i] for i in kept]
+        self._fingerprints = [self._fingerprints[i] for i in kept]
+        self._fitnesses = [self._fitnesses[i] for i in kept]
+        self._index = set(self._fingerprints)
+
+    def _evict(self):
+        """우선순위가 가장 낮은 항목 중 가장 붐비는(없으면 가장 오래된) 항목 하나를 제거"""
+        if self.priority is None:
+            candidates = list(range(len(self._entries)))
+        else:
+            priorities = [self.priority(entry) for entry in self._entries]
+            worst = min(priorities)
+            candidates = [i for i, priority in enumerate(priorities) if priority == worst]
+
+        victim = candidates[0]
+        if len(candidates) > 1 and all(self._fitnesses[i] is not None for i in candidates):
+            known = [i for i, fitness in enumerate(self._fitnesses) if fitness is not None]
+            points = np.array([self._fitnesses[i] for i in known])
+            scale = np.ptp(points, axis=0) + 1e-9
+            position = {idx: row for row, idx in enumerate(known)}
+            rows = [position[i] for i in candidates]
+            distances = np.linalg.norm((points[rows][:, None, :] - points[None, :, :]) / scale, axis=2)
+            distances[np.arange(len(rows)), rows] = np.inf
+            victim = candidates[int(np.argmin(distances.min(axis=1)))]
+
+        self._index.discard(self._fingerprints[victim])
+        del self._entries[victim]
+        del self._fingerprints[victim]
+        del self._fitnesses[victim]
+
+    def to_list(self) -> List:
+        return list(self._entries)
@@ -1,6 +1,6 @@
 from optimizer_base import DietOptimizer
 import numpy as np
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
 from Diet_class import Diet, Meal
 from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict
@@ -168,15 +168,10 @@ class SPEA2Optimizer(DietOptimizer):
             
             return [population[i] for i in selected]
 
-    def _create_initial_individual(self, base_diet):
-        mutated = self.mutate(base_diet)
-        for meal in mutated.meals:
-            for menu in meal.menus:
-                menu.serving_ratio = np.random.uniform(0.6, 0.9)
-        return mutated
-
-    def optimize(self, diet_db: Diet, initial_diet: Diet, generations: int = 200) -> List[Diet]:
+    def optimize(self, diet_db: Diet, initial_diet: Diet, generations: int = 200,
+                 time_limit_s: Optional[float] = None, max_evaluations: Optional[int] = None) -> List[Diet]:
         # 초기화
+        self._start_budget(time_limit_s, max_evaluations, diet_db)
         self.good_solutions_archive.clear()
         self.backup_solutions.clear()
         self.constraint_solutions.clear()
@@ -194,7 +189,9 @@ class SPEA2Optimizer(DietOptimizer):
         # 세대별 최적화
         for generation in range(generations):
             print(f"=== Generation {generation + 1}/{generations} ===")
+            population = self._receive_immigrants(population)
             all_solutions = population + self.archive
+            self._prefetch_fitness(all_solutions, diet_db)
             fitnesses = []
             for i in range(0, len(all_solutions), self.batch_size):
                 batch = all_solutions[i:i + self.batch_size]
@@ -204,6 +201,10 @@ class SPEA2Optimizer(DietOptimizer):
             fitnesses = np.array(fitnesses)
             
             self.archive = self._environmental_selection(all_solutions, fitnesses)
+
+            if self._on_generation(generation, generations, fitnesses, all_solutions):
+                print(f"Optimization stopped at generation {generation} ({self.stop_reason})")
+                return self._stopped_solutions(diet_db)
             
             # 종료 조건 체크
             if self.check_termination(initial_fitness, self.archive, diet_db):
@@ -212,7 +213,8 @@ class SPEA2Optimizer(DietOptimizer):
 
             # 새로운 세대 생성
             new_population = []
-            while len(new_population) < self.population_size:
+            n_offspring = self._offspring_target(self.population_size)
+            while len(new_population) < n_offspring:
                 parents = np.random.choice(self.archive if self.archive else population, size=2, replace=False)
 
                 if np.random.random() < self.crossover_prob:
@@ -228,7 +230,7 @@ class SPEA2Optimizer(DietOptimizer):
                 else:
                     new_population.extend(parents)
             
-            population = new_population[:self.population_size]
+            population = self._screen_offspring(new_population, self.population_size)
 
             if generation % 10 == 0:
                 self.fitness_cache.clear()
@@ -0,0 +1,123 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import List, Dict, Optional
+
+# 로그인 화면을 그릴 때는 import 되면 안 되는 무거운 모듈 (app.py 의 로그인 게이트 뒤로 미룬 것들)
+DEFERRED_MODULES = ['scipy', 'github', 'openpyxl', 'load_data', 'spea2_optimizer', 'optimizer_engine', 'evaluation_function']
+
+# import 시간 분해용 모듈 (app.py 가 쓰는 것들)
+PROFILED_MODULES = ['streamlit', 'pandas', 'numpy', 'scipy', 'openpyxl', 'github',
+                    'load_data', 'evaluation_function', 'optimizer_engine', 'spea2_optimizer']
+
+_FIRST_RENDER_SCRIPT = r'''
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+app.run()
+rendered = time.perf_counter()
+print(json.dumps({
+    'streamlit_import_s': imported - started,
+    'first_render_s': rendered - imported,
+    'deferred_loaded': [name for name in json.loads(sys.argv[3]) if name in sys.modules],
+    'exceptions': [str(e.value) for e in app.exception],
+}))
+'''
+
+def import_times(modules: List[str] = PROFILED_MODULES, cwd: str = None) -> Dict[str, Optional[float]]:
+    """모듈별 콜드 import 시간(초) — 새 인터프리터에서 python -X importtime 의 누적 시간, 설치되지 않았으면 None"""
+    cwd = cwd or os.path.dirname(os.path.abspath(__file__))
+    times = {}
+    for module in modules:
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                cwd=cwd, capture_output=True, text=True)
+        if result.returncode != 0:
+            times[module] = None
+            continue
+        cumulative = None
+        for line in result.stderr.splitlines():
+            match = re.match(r'import time:\s+\d+\s+\|\s+(\d+)\s+\|\s?(\s*)(\S+)$', line)
+            if match and match.group(3) == module and not match.group(2):
+                cumulative = int(match.group(1)) / 1e6
+        times[module] = cumulative
+    return times
+
+def first_render(app_path: str = 'app.py', timeout_s: float = 60.0) -> Dict:
+    """
+    새 인터프리터에서 app.py 를 streamlit AppTest 로 한 번 실행해 첫 화면(로그인 페이지)까지 걸린 시간 측정
+
+    total_s 는 인터프리터 시작부터 렌더 완료까지의 실제 경과 시간 (사용자가 기다리는 콜드 스타트)
+    """
+    app_path = os.path.abspath(app_path)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', _FIRST_RENDER_SCRIPT, app_path, str(timeout_s), json.dumps(DEFERRED_MODULES)],
+                            cwd=os.path.dirname(app_path), capture_output=True, text=True)
+    total_s = time.perf_counter() - started
+    if result.returncode != 0:
+        return {'status': 'failed', 'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown',
+                'total_s': total_s}
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    measured.update({'status': 'ok', 'error': None, 'total_s': total_s})
+    return measured
+
+def run_startup_benchmark(app_path: str = 'app.py', repeats: int = 3, history_path: str = None,
+                          max_regression: float = 0.25) -> Dict:
+    """
+    시작 시간 벤치마크 실행 후 기록
+
+    repeats 번 측정한 첫 렌더 시간의 최솟값을 history_path(JSON lines)의 이전 최솟값과 비교해
+    max_regression 비율 이상 느려졌거나, 로그인 화면에서 무거운 모듈이 import 되면 regression 으로 표시한다.
+    """
+    app_path = os.path.abspath(app_path)
+    if history_path is None:
+        history_path = os.path.join(os.path.dirname(app_path), 'results', 'startup_benchmark.jsonl')
+
+    runs = [first_render(app_path) for _ in range(repeats)]
+    ok_runs = [run for run in runs if run['status'] == 'ok']
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'status': 'ok' if ok_runs else 'failed',
+        'error': None if ok_runs else runs[0]['error'],
+        'total_s': min(run['total_s'] for run in ok_runs) if ok_runs else None,
+        'first_render_s': min(run['first_render_s'] for run in ok_runs) if ok_runs else None,
+        'streamlit_import_s': min(run['streamlit_import_s'] for run in ok_runs) if ok_runs else None,
+        'deferred_loaded': ok_runs[0]['deferred_loaded'] if ok_runs else [],
+        'import_times': import_times(cwd=os.path.dirname(app_path)),
+    }
+
+    baseline = None
+    if os.path.exists(history_path):
+        with open(history_path, 'r') as f:
+            previous = [json.loads(line) for line in f if line.strip()]
+        totals = [entry['total_s'] for entry in previous if entry.get('status') == 'ok' and entry.get('total_s')]
+        baseline = min(totals) if totals else None
+    record['baseline_total_s'] = baseline
+    record['regression'] = bool(record['deferred_loaded']) or (
+        baseline is not None and record['total_s'] is not None and record['total_s'] > baseline * (1 + max_regression))
+
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    with open(history_path, 'a') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return record
+
+if __name__ == "__main__":
+    record = run_startup_benchmark(sys.argv[1] if len(sys.argv) > 1 else 'app.py')
+    if record['status'] != 'ok':
+        print(f"첫 화면 렌더 실패: {record['error']}")
+        sys.exit(2)
+    print(f"첫 화면까지 {record['total_s']:.2f}초 (streamlit import {record['streamlit_import_s']:.2f}초, "
+          f"렌더 {record['first_render_s']:.2f}초, 기준 {record['baseline_total_s'] or 0:.2f}초)")
+    for module, seconds in record['import_times'].items():
+        print(f"  import {module}: {'-' if seconds is None else f'{seconds:.3f}초'}")
+    if record['deferred_loaded']:
+        print(f"로그인 화면에서 무거운 모듈이 import 됨: {record['deferred_loaded']}")
+    if record['regression']:
+        print("시작 시간 회귀 감지")
+        sys.exit(1)
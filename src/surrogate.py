@@ -0,0 +1,128 @@
+import numpy as np
+from collections import deque
+from typing import List, Dict
+from Diet_class import Diet, Menu
+
+class RidgeSurrogate:
+    """
+    자식 해 사전 선별용 온라인 릿지 회귀 대리 모델
+
+    특징: 메뉴별 등장 횟수 + 메뉴별 배식 비율 합 (영양/비용은 거의 선형 합이므로 이것만으로도 잘 맞음)
+    정확히 평가된 (식단, 적합도) 쌍이 들어올 때마다 다시 학습하고, 학습 전에 새 표본에 대한 예측 오차를 기록한다.
+    최근 오차(표준편차로 정규화한 MAE)가 error_threshold 를 넘으면 스스로 꺼진다.
+    """
+
+    def __init__(self, menus: List[Menu], alpha: float = 1.0, keep_fraction: float = 0.5, min_samples: int = 200,
+                 max_samples: int = 3000, error_threshold: float = 0.5, error_window: int = 5):
+        self.alpha = alpha
+        self.keep_fraction = keep_fraction
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.error_threshold = error_threshold
+        self.error_window = error_window
+        self.menu_to_index: Dict[str, int] = {}
+        for menu in menus:
+            self.menu_to_index.setdefault(menu.name, len(self.menu_to_index))
+        self.reset()
+
+    def reset(self):
+        self.active = True
+        self._x = deque(maxlen=self.max_samples)
+        self._y = deque(maxlen=self.max_samples)
+        self._seen = set()
+        self._weights = None
+        self._intercept = None
+        self.errors = deque(maxlen=self.error_window)
+        self.n_screened = 0
+        self.n_rejected = 0
+
+    def add_menus(self, diet: Diet):
+        """카탈로그에 없는 메뉴(초기 식단 등)를 특징에 추가 — 첫 학습 전까지만 가능"""
+        if self._weights is not None or self._x:
+            return
+        for meal in diet.meals:
+            for menu in meal.menus:
+                self.menu_to_index.setdefault(menu.name, len(self.menu_to_index))
+
+    @property
+    def ready(self) -> bool:
+        return self.active and self._weights is not None
+
+    def _signature(self, diet: Diet):
+        return tuple((menu.name, round(float(menu.serving_ratio), 4)) for meal in diet.meals for menu in meal.menus)
+
+    def features(self, diets: List[Diet]) -> np.ndarray:
+        n_menus = len(self.menu_to_index)
+        x = np.zeros((len(diets), 2 * n_menus), dtype=float)
+        for row, diet in enumerate(diets):
+            for meal in diet.meals:
+                for menu in meal.menus:
+                    idx = self.menu_to_index.get(menu.name)
+                    if idx is not None:
+                        x[row, idx] += 1.0
+                        x[row, n_menus + idx] += menu.serving_ratio
+        return x
+
+    def predict(self, diets: List[Diet]) -> np.ndarray:
+        return self.features(diets) @ self._weights + self._intercept
+
+    def observe(self, diets: List[Diet], fitnesses: np.ndarray):
+        """정확히 평가된 해를 반영: 처음 보는 해로 예측 오차를 기록한 뒤 학습 데이터에 추가하고 재학습"""
+        fresh = []
+        for diet, fitness in zip(diets, np.asarray(fitnesses, dtype=float)):
+            signature = self._signature(diet)
+            if signature not in self._seen:
+                self._seen.add(signature)
+                fresh.append((diet, fitness))
+        if not fresh:
+            return
+        for diet, _ in fresh:
+            self.add_menus(diet)
+        fresh_x = self.features([diet for diet, _ in fresh])
+        fresh_y = np.array([fitness for _, fitness in fresh])
+
+        if self._weights is not None and len(fresh) >= 5:
+            scale = np.std(np.array(self._y), axis=0) + 1e-9
+            error = float(np.mean(np.abs(fresh_x @ self._weights + self._intercept - fresh_y) / scale))
+            self.errors.append(error)
+            if self.active and len(self.errors) == self.error_window and np.mean(self.errors) > self.error_threshold:
+                self.active = False
+                print(f"Surrogate disabled: normalized error {np.mean(self.errors):.3f} > {self.error_threshold}")
+
+        self._x.extend(fresh_x)
+        self._y.extend(fresh_y)
+        if self.active and len(self._y) >= self.min_samples:
+            self._fit()
+
+    def _fit(self):
+        x = np.array(self._x)
+        y = np.array(self._y)
+        x_mean, y_mean = x.mean(axis=0), y.mean(axis=0)
+        xc, yc = x - x_mean, y - y_mean
+        n, d = xc.shape
+        # 표본 수와 특징 수 중 작은 쪽 크기의 선형계를 풂
+        if n < d:
+            self._weights = xc.T @ np.linalg.solve(xc @ xc.T + self.alpha * np.eye(n), yc)
+        else:
+            self._weights = np.linalg.solve(xc.T @ xc + self.alpha * np.eye(d), xc.T @ yc)
+        self._intercept = y_mean - x_mean @ self._weights
+
+    def screen(self, candidates: List[Diet], n_keep: int, non_dominated_mask) -> List[Diet]:
+        """예측 적합도로 비지배 정렬해 앞쪽 n_keep 개만 남김"""
+        if n_keep <= 0:
+            return []
+        if not self.ready or len(candidates) <= n_keep:
+            return candidates[:n_keep]
+        predicted = self.predict(candidates)
+        remaining = np.arange(len(candidates))
+        kept = []
+        while len(kept) < n_keep and len(remaining):
+            mask = non_dominated_mask(predicted[remaining])
+            front = remaining[mask]
+            # 같은 프론트 안에서는 정규화된 예측 합이 큰 순서
+            order = np.argsort(-(predicted[front] / (np.abs(predicted).max(axis=0) + 1e-9)).sum(axis=1))
+            kept.extend(front[order][:n_keep - len(kept)].tolist())
+            remaining = remaining[~mask]
+        self.n_screened += len(candidates)
+        self.n_rejected += len(candidates) - len(kept)
+        return [candidates[i] for i in kept]
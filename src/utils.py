@@ -1,10 +1,11 @@
 import pandas as pd
-from Diet_class import Meal, Diet
+from Diet_class import Meal, Diet, MEALS_PER_DAY
 
 def diet_to_dataframe(diet, title: str) -> pd.DataFrame:
-    meals_dict = {f'Day {i+1}': [] for i in range(7)}
+    n_days = -(-len(diet.meals) // MEALS_PER_DAY)  # 마지막 날 끼니가 모자라도 열을 만듦
+    meals_dict = {f'Day {i+1}': [] for i in range(n_days)}
     
-    for i in range(7):
+    for i in range(n_days):
         day_meals = {
             'Breakfast': "",
             'Lunch': "",